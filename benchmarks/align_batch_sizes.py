@@ -0,0 +1,72 @@
+"""
+Alignment throughput at several batch sizes.
+
+Transcribes a recording once, then aligns the same segments with every
+batch size and prints segments/s and the largest word timestamp deviation
+from the first batch size (1 = whisperx's one-segment-at-a-time path).
+
+    python benchmarks/align_batch_sizes.py recording.wav --language nl --batch-sizes 1 4 8 16 32
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pipeline import align_segments, alignment_batch_size, get_device  # noqa: E402
+
+
+def word_times(result):
+    return [(word.get("start"), word.get("end")) for segment in result["segments"] for word in segment.get("words", [])]
+
+
+def max_deviation(reference, result):
+    deviation = 0.0
+    for expected, actual in zip(word_times(reference), word_times(result)):
+        for expected_time, actual_time in zip(expected, actual):
+            if expected_time is not None and actual_time is not None:
+                deviation = max(deviation, abs(expected_time - actual_time))
+    return deviation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched wav2vec2 alignment")
+    parser.add_argument("audio", help="Recording to transcribe and align")
+    parser.add_argument("--language", default="nl", help="Language (alignment model) of the recording")
+    parser.add_argument("--model", default="tiny", help="Whisper model for the segments")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per batch size (best is reported)")
+    args = parser.parse_args()
+
+    import whisperx
+
+    device = get_device()
+    audio = whisperx.load_audio(args.audio)
+    asr = whisperx.load_model(args.model, device, compute_type=args.compute_type)
+    segments = asr.transcribe(audio, language=args.language)["segments"]
+    del asr
+
+    model_a, metadata = whisperx.load_align_model(language_code=args.language, device=device)
+    print(f"{len(segments)} segments, {len(audio) / 16000:.0f}s audio, {metadata.get('type')} model on {device}")
+
+    reference = None
+    for batch_size in args.batch_sizes:
+        effective = alignment_batch_size(model_a, metadata, batch_size)
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = align_segments([dict(s) for s in segments], model_a, metadata, audio, device, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        if reference is None:
+            reference = result
+        note = "" if effective == batch_size else f" (runs unbatched: {effective})"
+        print(f"batch {batch_size:>3}{note}: {len(segments) / best:8.1f} segments/s, "
+              f"max word deviation {max_deviation(reference, result) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Speaker recognition time against libraries of growing size.
+
+Fills a SpeakerLibrary with random unit embeddings, then matches a
+recording's speakers (noisy copies of enrolled voices) against it and
+prints the time per match() call and how many speakers were recognized.
+
+    python benchmarks/speaker_library_match.py --sizes 100 1000 10000 100000 --speakers 10
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from speaker_library import SpeakerLibrary  # noqa: E402
+
+
+def random_library(size, dim, rng, path):
+    library = SpeakerLibrary(path)
+    library.names = [f"person {i}" for i in range(size)]
+    embeddings = rng.standard_normal((size, dim)).astype(np.float32)
+    library.embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    library.counts = np.ones(size, dtype=np.int64)
+    return library
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SpeakerLibrary.match")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000],
+                        help="Enrolled speakers")
+    parser.add_argument("--speakers", type=int, default=10, help="Speakers in the recording")
+    parser.add_argument("--dim", type=int, default=256, help="Embedding size (pyannote: 256)")
+    parser.add_argument("--noise", type=float, default=0.02, help="Deviation of the recording from the enrollment")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per size (best is reported)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as temp:
+        for size in args.sizes:
+            library = random_library(size, args.dim, rng, Path(temp) / "speakers.npz")
+            enrolled = rng.choice(size, min(args.speakers, size), replace=False)
+            speakers = {f"SPEAKER_{i:02d}": library.embeddings[j] + args.noise * rng.standard_normal(args.dim)
+                        for i, j in enumerate(enrolled)}
+
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                matches = library.match(speakers)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+
+            correct = sum(matches.get(f"SPEAKER_{i:02d}", (None,))[0] == f"person {j}" for i, j in enumerate(enrolled))
+            print(f"{size:>8} enrolled: {best * 1000:8.2f} ms, {correct}/{len(enrolled)} recognized")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Audio extraction from video: demux fast path vs. full conversion.
+
+Builds a multi-track video with ffmpeg's lavfi sources (or uses the given
+file), then times convert_to_wav's fast path (video/subtitle/data packets
+discarded in the demuxer, one audio track mapped) against the plain
+`ffmpeg -i video out.wav` the app used before.
+
+    python benchmarks/video_demux.py --minutes 10 --size 1920x1080
+    python benchmarks/video_demux.py movie.mkv --track 1
+"""
+import argparse
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pipeline import run_ffmpeg  # noqa: E402
+
+WAV_ARGS = ['-ar', '16000', '-ac', '1', '-c:a', 'pcm_s16le', '-y']
+
+SUBTITLES = "1\n00:00:00,000 --> 00:00:05,000\nBenchmark\n"
+
+
+def build_fixture(path, minutes, size, tracks):
+    """Video (H.264) with `tracks` sine audio tracks and a subtitle track"""
+    seconds = minutes * 60
+    subtitles = path.with_suffix(".srt")
+    subtitles.write_text(SUBTITLES)
+
+    args = ['-f', 'lavfi', '-i', f'testsrc2=size={size}:rate=30:duration={seconds}']
+    for track in range(tracks):
+        args += ['-f', 'lavfi', '-i', f'sine=frequency={440 * (track + 1)}:duration={seconds}']
+    args += ['-i', str(subtitles), '-map', '0:v']
+    for track in range(tracks):
+        args += ['-map', f'{track + 1}:a']
+    args += ['-map', f'{tracks + 1}:s', '-c:v', 'libx264', '-preset', 'ultrafast', '-c:a', 'aac', '-c:s', 'srt',
+             '-y', str(path)]
+    run_ffmpeg(args)
+
+
+def fast_path(video, output, track):
+    run_ffmpeg(['-discard:v', 'all', '-discard:s', 'all', '-discard:d', 'all', '-i', str(video),
+                '-map', f'0:a:{track}', '-vn', '-sn', '-dn', *WAV_ARGS, str(output)])
+
+
+def full_conversion(video, output, track):
+    # No track selection before - ffmpeg picks the audio stream itself
+    run_ffmpeg(['-i', str(video), *WAV_ARGS, str(output)])
+
+
+def frames(path):
+    with wave.open(str(path), "rb") as f:
+        return f.getnframes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the video demux fast path")
+    parser.add_argument("video", nargs="?", help="Video to extract from (default: generated fixture)")
+    parser.add_argument("--minutes", type=float, default=5, help="Length of the generated fixture")
+    parser.add_argument("--size", default="1920x1080", help="Frame size of the generated fixture")
+    parser.add_argument("--tracks", type=int, default=2, help="Audio tracks in the generated fixture")
+    parser.add_argument("--track", type=int, default=0, help="Audio track to extract")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method (best is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp:
+        temp = Path(temp)
+        video = Path(args.video) if args.video else temp / "fixture.mkv"
+        if not args.video:
+            start = time.perf_counter()
+            build_fixture(video, args.minutes, args.size, args.tracks)
+            print(f"Fixture: {args.minutes:g} min {args.size}, {args.tracks} audio tracks + subtitles "
+                  f"({video.stat().st_size / (1024 * 1024):.0f} MB, built in {time.perf_counter() - start:.0f}s)")
+
+        results = {}
+        for name, method in (("full conversion", full_conversion), ("demux fast path", fast_path)):
+            output = temp / f"{name.replace(' ', '_')}.wav"
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                method(video, output, args.track)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results[name] = best
+            print(f"{name:>16}: {best:6.2f}s ({frames(output) / 16000:.0f}s audio)")
+
+        print(f"Speedup: {results['full conversion'] / results['demux fast path']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,19 +3,227 @@ import subprocess
 import importlib.metadata
 import os
 import shutil
+import json
+import hashlib
+import platform
+import site
+import argparse
+from datetime import datetime
+
+from model_store import STORE_ENV
 
 # Name of requirements-file
 REQ_FILE = "requirements.txt"
 # Download-URL for FFmpeg (Windows Builds)
 FFMPEG_URL = "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip"
+# Cached capability profile (read by mindscribe at startup)
+PROFILE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "capability_profile.json")
+PROFILE_VERSION = 1
+
+# SIMD extensions relevant for CTranslate2 / PyTorch on CPU
+SIMD_FLAGS = ["sse4_1", "sse4_2", "avx", "avx2", "fma", "f16c", "avx512f", "avx512_vnni", "avx_vnni", "neon", "asimd"]
 
 def get_installed_packages():
     """Returns a set of all installed package names (lowercase)."""
+    profile = load_capability_profile()
+    if profile and profile.get("packages"):
+        return set(profile["packages"])
+    return scan_installed_packages()
+
+def scan_installed_packages():
+    """Scans all installed distributions (slow on big environments)."""
     try:
         return {dist.metadata['Name'].lower() for dist in importlib.metadata.distributions()}
     except Exception:
         return set()
 
+def find_ffmpeg():
+    """Returns the path of ffmpeg (PATH or project folder) or None."""
+    ffmpeg_path = shutil.which("ffmpeg")
+    if not ffmpeg_path:
+        local_exe = os.path.join(os.getcwd(), "ffmpeg.exe")
+        if os.path.exists(local_exe):
+            ffmpeg_path = local_exe
+    return ffmpeg_path
+
+def get_hf_cache_dir(include_store=True):
+    """Hugging Face hub cache; without `include_store` the model store's redirect (see model_store.py) is ignored."""
+    hf_home = os.environ.get("HF_HOME", os.path.join(os.path.expanduser("~"), ".cache", "huggingface"))
+    cache = os.environ.get("HF_HUB_CACHE", os.path.join(hf_home, "hub"))
+    store = os.environ.get(STORE_ENV)
+    if not include_store and store and os.path.abspath(cache).startswith(os.path.abspath(store) + os.sep):
+        cache = os.path.join(hf_home, "hub")
+    return cache
+
+def _stat_signature(path):
+    try:
+        st = os.stat(path)
+        return [path, st.st_mtime_ns, st.st_size]
+    except OSError:
+        return [path, None, None]
+
+def environment_fingerprint():
+    """
+    Cheap hash of everything the profile depends on (only stat calls, no subprocesses).
+    Installing/removing packages or models changes the directory mtimes.
+    """
+    site_dirs = list(site.getsitepackages()) if hasattr(site, "getsitepackages") else []
+    user_site = site.getusersitepackages() if hasattr(site, "getusersitepackages") else None
+    if user_site:
+        site_dirs.append(user_site)
+
+    parts = {
+        "version": PROFILE_VERSION,
+        "python": [sys.executable, sys.version],
+        "path": os.environ.get("PATH", ""),
+        "cuda_visible_devices": os.environ.get("CUDA_VISIBLE_DEVICES"),
+        "ffmpeg": _stat_signature(find_ffmpeg() or ""),
+        "site_packages": [_stat_signature(d) for d in site_dirs],
+        # The app points HF_HUB_CACHE at the model store - the profile must still match there
+        "hf_cache": _stat_signature(get_hf_cache_dir(include_store=False)),
+    }
+    return hashlib.sha1(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+def probe_ffmpeg(ffmpeg_path):
+    """Version line and audio decoders of ffmpeg."""
+    info = {"path": ffmpeg_path, "version": None, "audio_decoders": []}
+    if not ffmpeg_path:
+        return info
+    try:
+        result = subprocess.run([ffmpeg_path, "-version"], capture_output=True, text=True)
+        info["version"] = result.stdout.split('\n')[0]
+        result = subprocess.run([ffmpeg_path, "-hide_banner", "-decoders"], capture_output=True, text=True)
+        for line in result.stdout.splitlines():
+            parts = line.split()
+            # e.g. " A....D aac   AAC (Advanced Audio Coding)"
+            if len(parts) >= 2 and len(parts[0]) == 6 and parts[0][0] == "A":
+                info["audio_decoders"].append(parts[1])
+    except Exception as e:
+        info["error"] = str(e)
+    return info
+
+def probe_cpu_flags():
+    """SIMD extensions supported by the CPU (best effort per platform)."""
+    flags = set()
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/cpuinfo") as f:
+                for line in f:
+                    if line.startswith(("flags", "Features")):
+                        flags.update(line.split(":", 1)[1].split())
+                        break
+        elif sys.platform == "win32":
+            import ctypes
+            is_present = ctypes.windll.kernel32.IsProcessorFeaturePresent
+            # PF_* constants from winnt.h
+            features = {"sse4_1": 37, "sse4_2": 38, "avx": 39, "avx2": 40, "avx512f": 41}
+            flags.update(name for name, pf in features.items() if is_present(pf))
+        elif sys.platform == "darwin":
+            if platform.machine() == "arm64":
+                flags.add("neon")
+            else:
+                result = subprocess.run(["sysctl", "-n", "machdep.cpu.features", "machdep.cpu.leaf7_features"],
+                                        capture_output=True, text=True)
+                flags.update(result.stdout.lower().replace(".", "_").split())
+    except Exception:
+        pass
+    return sorted(flag for flag in flags if flag in SIMD_FLAGS)
+
+def probe_ram_mb():
+    """Total physical memory in MB (None if unknown)."""
+    try:
+        import psutil
+        return psutil.virtual_memory().total // (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return status.ullTotalPhys // (1024 * 1024)
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except Exception:
+        return None
+
+def probe_torch():
+    """PyTorch version and available devices."""
+    info = {"version": None, "cuda": False, "devices": [], "mps": False}
+    try:
+        import torch
+        info["version"] = torch.__version__
+        info["cuda"] = torch.cuda.is_available()
+        if info["cuda"]:
+            info["devices"] = [torch.cuda.get_device_name(i) for i in range(torch.cuda.device_count())]
+        info["mps"] = bool(getattr(torch.backends, "mps", None) and torch.backends.mps.is_available())
+    except ImportError:
+        pass
+    except Exception as e:
+        info["error"] = str(e)
+    return info
+
+def probe_models():
+    """Model repositories already in the Hugging Face cache."""
+    cache_dir = get_hf_cache_dir()
+    if not os.path.isdir(cache_dir):
+        return []
+    return sorted(
+        name[len("models--"):].replace("--", "/")
+        for name in os.listdir(cache_dir)
+        if name.startswith("models--")
+    )
+
+def build_capability_profile():
+    """Probes the environment (ffmpeg, CPU, RAM, torch, models, packages)."""
+    return {
+        "version": PROFILE_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "fingerprint": environment_fingerprint(),
+        "ffmpeg": probe_ffmpeg(find_ffmpeg()),
+        "cpu": {
+            "cores": os.cpu_count(),
+            "machine": platform.machine(),
+            "simd": probe_cpu_flags(),
+        },
+        "ram_mb": probe_ram_mb(),
+        "torch": probe_torch(),
+        "models": probe_models(),
+        "packages": sorted(scan_installed_packages()),
+    }
+
+def save_capability_profile(profile):
+    tmp = PROFILE_FILE + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp, PROFILE_FILE)
+
+def load_capability_profile():
+    """Returns the cached profile, or None if missing or the environment changed."""
+    try:
+        with open(PROFILE_FILE, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if profile.get("version") != PROFILE_VERSION or profile.get("fingerprint") != environment_fingerprint():
+        return None
+    return profile
+
+def refresh_capability_profile():
+    """Builds and saves a fresh profile."""
+    profile = build_capability_profile()
+    save_capability_profile(profile)
+    return profile
+
 def parse_requirements(filename):
     """Reads requirements.txt and extracts package names."""
     required = []
@@ -70,14 +278,8 @@ def check_python_dependencies():
 def check_ffmpeg():
     print("\n--- 2. Checking FFmpeg ---")
     
-    # 1. Check: Is it in the system PATH?
-    ffmpeg_path = shutil.which("ffmpeg")
-    
-    # 2. Check: Is it directly in the current folder? (If not in PATH)
-    if not ffmpeg_path:
-        local_exe = os.path.join(os.getcwd(), "ffmpeg.exe")
-        if os.path.exists(local_exe):
-            ffmpeg_path = local_exe
+    # Is it in the system PATH or directly in the current folder?
+    ffmpeg_path = find_ffmpeg()
 
     if ffmpeg_path:
         print(f"[OK] FFmpeg gefunden: {ffmpeg_path}")
@@ -101,8 +303,23 @@ def check_ffmpeg():
         print("-" * 50)
         return False
 
-def check_cuda():
+def check_cuda(profile=None):
     print("\n--- 3. Checking GPU / CUDA ---")
+    if profile:
+        # Cached - importing torch takes seconds
+        torch_info = profile["torch"]
+        if not torch_info["version"]:
+            print("[ERROR] Could not import 'torch'.")
+            return
+        print(f"PyTorch Version: {torch_info['version']}")
+        if torch_info["cuda"]:
+            print(f"[OK] CUDA available: Yes")
+            print(f"     Device: {torch_info['devices'][0]}")
+        else:
+            print("[WARNING] CUDA available: No")
+            print("     Script will run on CPU (slow).")
+            print("     If you have an NVIDIA GPU, reinstall PyTorch with CUDA support.")
+        return
     try:
         import torch
         print(f"PyTorch Version: {torch.__version__}")
@@ -120,12 +337,37 @@ def check_cuda():
     except Exception as e:
         print(f"[ERROR] Error during GPU check: {e}")
 
+def write_capability_profile(profile=None):
+    """Rebuilds the profile unless `profile` (the cached one, still matching the environment) is given."""
+    print("\n--- 4. Writing Capability Profile ---")
+    try:
+        if profile:
+            print(f"[OK] Up to date: {PROFILE_FILE} (use --refresh to rebuild)")
+        else:
+            profile = refresh_capability_profile()
+            print(f"[OK] Saved: {PROFILE_FILE}")
+        print(f"     CPU: {profile['cpu']['cores']} cores, SIMD: {', '.join(profile['cpu']['simd']) or 'unknown'}")
+        if profile["ram_mb"]:
+            print(f"     RAM: {profile['ram_mb'] / 1024:.1f} GB")
+        print(f"     Cached models: {len(profile['models'])}")
+    except Exception as e:
+        print(f"[WARNING] Could not write capability profile: {e}")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the mindscribe setup")
+    parser.add_argument("--refresh", action="store_true", help="Rebuild the capability profile even if it is current")
+    args = parser.parse_args()
+    
     deps_ok = check_python_dependencies()
     ffmpeg_ok = check_ffmpeg()
     
+    # Reused unless the environment changed (e.g. packages were just installed)
+    profile = None if args.refresh else load_capability_profile()
+    
     if deps_ok:
-        check_cuda()
+        check_cuda(profile)
+    
+    write_capability_profile(profile)
     
     print("\nCheck finished.")
     if not ffmpeg_ok:
@@ -0,0 +1,316 @@
+"""
+Persistent inference worker process.
+
+Runs the WhisperX pipeline (pipeline.run_inference) outside the GUI process,
+so a native crash or memory blow-up in torch can't take the window down and
+the GIL-heavy work doesn't make the UI stutter. Audio is handed over through
+shared memory, progress/log lines and results are streamed back via a queue.
+"""
+import multiprocessing as mp
+import os
+import queue
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+import wave
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from model_store import job_offline, models_offline, set_offline
+from pipeline import SAMPLE_RATE, JobCancelled, check_cancelled, run_ffmpeg
+
+# Seconds a cancelled job gets to stop cooperatively before the worker is killed
+CANCEL_TIMEOUT = 10.0
+
+# Samples decoded per read when loading audio into shared memory
+LOAD_CHUNK = SAMPLE_RATE * 60
+
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+
+class SharedAudio:
+    """
+    A 16kHz mono float32 waveform decoded straight into a shared memory block.
+
+    The GUI process never holds its own copy: the file is read in chunks into
+    the block, and the worker maps the same block by name.
+    """
+
+    def __init__(self, samples):
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, samples * 4))
+        self.shape = (samples,)
+        self.dtype = np.dtype(np.float32)
+
+    @property
+    def duration(self):
+        return self.shape[0] / SAMPLE_RATE
+
+    @classmethod
+    def load(cls, path, cancel=None):
+        """Decode an audio file (same scaling as whisperx.load_audio)"""
+        try:
+            return cls._load_wav(path, cancel)
+        except (wave.Error, EOFError, ValueError):
+            pass  # Not 16kHz mono 16-bit PCM - let ffmpeg resample it first
+
+        fd, tmp = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            run_ffmpeg(['-i', str(path), '-ar', str(SAMPLE_RATE), '-ac', '1', '-c:a', 'pcm_s16le', '-y', tmp],
+                       cancel, output=tmp)
+            return cls._load_wav(tmp, cancel)
+        finally:
+            os.unlink(tmp)
+
+    @classmethod
+    def _load_wav(cls, path, cancel):
+        with wave.open(str(path), "rb") as f:
+            if (f.getframerate(), f.getnchannels(), f.getsampwidth(), f.getcomptype()) != (SAMPLE_RATE, 1, 2, "NONE"):
+                raise ValueError("Not 16kHz mono 16-bit PCM")
+            audio = cls(f.getnframes())
+            try:
+                view = audio.array()
+                position = 0
+                while position < len(view):
+                    check_cancelled(cancel)
+                    samples = np.frombuffer(f.readframes(LOAD_CHUNK), dtype=np.int16)
+                    if not samples.size:
+                        break  # Header claims more than the file holds (still being written)
+                    view[position:position + samples.size] = samples / 32768.0
+                    position += samples.size
+                del view
+                if position < audio.shape[0]:
+                    audio.shape = (position,)
+            except BaseException:
+                audio.close()
+                raise
+        return audio
+
+    def array(self):
+        """numpy view of the block (drop it before close())"""
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A view is still alive somewhere - freed with the process
+        self.shm.unlink()
+
+
+def _worker_main(commands, events, cancel):
+    """Command loop of the worker process"""
+    import pipeline
+
+    warm = {}  # Models kept loaded between jobs
+    started = time.perf_counter()
+    first_job = True
+
+    while True:
+        command = commands.get()
+        kind = command[0]
+
+        if kind == "stop":
+            break
+
+        if kind == "warmup":
+            settings = command[1]
+            try:
+                pipeline.load_asr_model(settings, pipeline.get_device(), warm)
+                events.put(("log", None, f"✓ Worker ready ({settings['model']} preloaded)", "info"))
+            except Exception as e:
+                events.put(("log", None, f"⚠ Worker warmup failed: {e}", "warning"))
+            continue
+
+        if kind == "job":
+            _, job_id, task, shm_name, shape, dtype, settings = command
+
+            def log(message, level="info"):
+                events.put(("log", job_id, message, level))
+
+            def progress(text):
+                events.put(("progress", job_id, text))
+
+            shm = shared_memory.SharedMemory(name=shm_name)
+            audio = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            job_start = time.perf_counter()
+            try:
+                if task == "rediarize":
+                    result = pipeline.rediarize(audio, settings, log, progress, warm, cancel)
+                else:
+                    result = pipeline.run_inference(audio, settings, log, progress, warm, cancel)
+                if first_job:
+                    # Includes the cold model loads - compare with and without a preloaded model store
+                    log(f"⏱ First job of this worker: {time.perf_counter() - job_start:.1f}s "
+                        f"({job_start - started:.1f}s after worker start)")
+                    first_job = False
+                events.put(("result", job_id, result))
+            except pipeline.JobCancelled:
+                events.put(("cancelled", job_id))
+            except Exception as e:
+                events.put(("error", job_id, str(e), traceback.format_exc()))
+            finally:
+                del audio
+                pipeline.release_memory()
+                try:
+                    shm.close()
+                except BufferError:
+                    pass  # A view is still alive somewhere - freed with the process
+
+
+class InferenceWorker:
+    """
+    Owns the worker process. The process is started once and keeps its models
+    loaded between jobs; after a crash it is restarted and preloads the model
+    of the last job again ("warm" restart).
+    """
+
+    def __init__(self, log=None):
+        self.log = log or (lambda message, level="info": None)
+        self.context = mp.get_context("spawn")
+        self.process = None
+        self.commands = None
+        self.events = None
+        self.cancel_event = None
+        self.last_settings = None
+        self.offline = None   # Offline mode the process was started with
+        self.job_lock = threading.Lock()  # One job at a time (shared event queue)
+
+    def start(self, warmup=None):
+        self.offline = models_offline()
+        self.commands = self.context.Queue()
+        self.events = self.context.Queue()
+        self.cancel_event = self.context.Event()
+        self.process = self.context.Process(
+            target=_worker_main,
+            args=(self.commands, self.events, self.cancel_event),
+            name="mindscribe-worker",
+            daemon=True
+        )
+        self.process.start()
+        if warmup:
+            self.commands.put(("warmup", warmup))
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def ensure_running(self):
+        if not self.is_alive():
+            self.start(warmup=self.last_settings)
+
+    def restart(self):
+        self.kill()
+        self.start(warmup=self.last_settings)
+
+    def kill(self):
+        if self.process is not None:
+            if self.process.is_alive():
+                self.process.kill()
+            self.process.join(timeout=5)
+            self.process = None
+
+    def stop(self, timeout=5):
+        """Ask the worker to exit, kill it if it doesn't"""
+        if self.is_alive():
+            self.commands.put(("stop",))
+            self.process.join(timeout=timeout)
+        self.kill()
+
+    def run(self, audio, settings, task="transcribe", on_log=None, on_progress=None, cancel=None, offline=None):
+        """
+        Run a job on the worker and block until its result arrives.
+
+        `audio` is a SharedAudio block (passed by name, no copy) or an array that
+        is copied into one (no pickling of the waveform either way).
+        Log/progress events are forwarded to the callbacks while waiting.
+        Setting `cancel` (a threading.Event) stops the job after the current
+        batch; if it doesn't stop within CANCEL_TIMEOUT the worker is restarted.
+        `offline` is the job's mode (see use_offline) - passes of one job (draft
+        and final) should share it, so the worker isn't restarted in between;
+        by default it's derived from `settings`.
+        Raises JobCancelled, or WorkerCrashed if the process dies during the job.
+        """
+        with self.job_lock:
+            return self._run(audio, settings, task, on_log, on_progress, cancel, offline)
+
+    def use_offline(self, offline):
+        """
+        Run the next job offline (all its models are in the store) or not. The
+        Hugging Face libraries read the switch on import, so a running worker
+        in the other mode is restarted.
+        """
+        if offline == self.offline:
+            return
+        set_offline(offline)
+        if self.is_alive():
+            self.log("📦 All models of this job are in the model store - restarting the worker offline" if offline
+                     else "📦 This job needs models outside the model store - restarting the worker online")
+            self.stop()
+
+    def _run(self, audio, settings, task, on_log, on_progress, cancel, offline):
+        self.use_offline(job_offline(settings) if offline is None else offline)
+        self.ensure_running()
+        if task == "transcribe" and not settings.get("draft"):
+            self.last_settings = settings
+        self.cancel_event.clear()
+        cancelled_at = None
+
+        owned = None
+        if not isinstance(audio, SharedAudio):
+            # Plain arrays are copied into a block of their own
+            audio = np.ascontiguousarray(audio, dtype=np.float32)
+            owned = SharedAudio(len(audio))
+            owned.array()[:] = audio
+            audio = owned
+        try:
+            job_id = uuid.uuid4().hex
+            self.commands.put(("job", job_id, task, audio.shm.name, audio.shape, audio.dtype.str, settings))
+
+            while True:
+                if cancel is not None and cancel.is_set():
+                    if cancelled_at is None:
+                        cancelled_at = time.monotonic()
+                        self.cancel_event.set()
+                    elif time.monotonic() - cancelled_at > CANCEL_TIMEOUT:
+                        self.log(f"⚠ Job did not stop within {CANCEL_TIMEOUT:.0f}s - restarting inference worker", "warning")
+                        self.restart()
+                        raise JobCancelled("Job cancelled")
+
+                try:
+                    event = self.events.get(timeout=0.5)
+                except queue.Empty:
+                    if not self.is_alive():
+                        exitcode = self.process.exitcode if self.process else None
+                        self.log(f"⚠ Inference worker crashed (exit code {exitcode}) - restarting", "warning")
+                        self.restart()
+                        raise WorkerCrashed(f"Inference worker crashed (exit code {exitcode}). It has been restarted.")
+                    continue
+
+                kind, event_job = event[0], event[1]
+
+                if kind == "log":
+                    (on_log or self.log)(event[2], event[3])
+                    continue
+
+                if event_job != job_id:
+                    continue  # Leftover of an aborted job
+
+                if kind == "progress":
+                    if on_progress:
+                        on_progress(event[2])
+                elif kind == "result":
+                    return event[2]
+                elif kind == "cancelled":
+                    raise JobCancelled("Job cancelled")
+                elif kind == "error":
+                    (on_log or self.log)(f"Worker traceback:\n{event[3]}", "error")
+                    raise RuntimeError(event[2])
+
+        finally:
+            if owned is not None:
+                owned.close()
@@ -0,0 +1,168 @@
+"""
+Shortest-job-first scheduling of queued jobs.
+
+Each job's runtime is predicted from the duration of its source and the
+real-time factor (processing seconds per audio second) measured on earlier
+jobs with the same model/compute type. Short jobs run first, so a batch of
+voice memos doesn't wait behind a 5-hour recording; waiting jobs age
+(their priority improves the longer they wait), so long jobs don't starve.
+"""
+import json
+import os
+import subprocess
+import threading
+import time
+
+from pipeline import CACHE_DIR
+
+# Measured real-time factors per model/compute type/task
+THROUGHPUT_FILE = CACHE_DIR / "throughput.json"
+
+# Real-time factor assumed before a configuration has any history
+DEFAULT_RTF = 0.5
+
+# Weight of the newest job in the running average of the real-time factor
+RTF_SMOOTHING = 0.3
+
+# Seconds of predicted runtime a queued job gains per second of waiting
+AGING_RATE = 0.5
+
+# Seconds a job waiting for its duration probe holds back the queue (then it's ranked as unknown)
+PROBE_WAIT = 10.0
+
+
+def probe_duration(source):
+    """Duration in seconds of a media file or URL (one ffprobe call), None if unknown"""
+    try:
+        result = subprocess.run([
+            'ffprobe',
+            '-v', 'error',
+            '-show_entries', 'format=duration',
+            '-of', 'default=noprint_wrappers=1:nokey=1',
+            str(source)
+        ], capture_output=True, text=True, timeout=30)
+        return float(result.stdout.strip())
+    except (OSError, subprocess.TimeoutExpired, ValueError):
+        return None
+
+
+def throughput_key(settings, task="transcribe"):
+    """Jobs with the same key share one real-time factor"""
+    parts = [task, settings.get("model"), settings.get("compute_type")]
+    if task == "transcribe":
+        parts.append("diarize" if settings.get("diarize") else "asr")
+        if settings.get("draft_model"):
+            parts.append(f"draft-{settings['draft_model']}")
+    return "/".join(str(part) for part in parts)
+
+
+class ThroughputHistory:
+    """Running averages of the real-time factor, persisted in _cache/throughput.json"""
+
+    _lock = threading.Lock()  # Predictions from the GUI thread, records from the job thread
+
+    def __init__(self, path=THROUGHPUT_FILE):
+        self.path = path
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def rtf(self, settings, task="transcribe"):
+        entry = self.entries.get(throughput_key(settings, task))
+        return entry["rtf"] if entry else DEFAULT_RTF
+
+    def predict(self, settings, duration, task="transcribe"):
+        """Predicted processing time in seconds (None if the duration is unknown)"""
+        if duration is None:
+            return None
+        with self._lock:
+            return duration * self.rtf(settings, task)
+
+    def record(self, settings, duration, elapsed, task="transcribe"):
+        """Fold a finished job into the history, returns its real-time factor"""
+        if not duration:
+            return None
+        rtf = elapsed / duration
+        key = throughput_key(settings, task)
+
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry:
+                entry["rtf"] = (1 - RTF_SMOOTHING) * entry["rtf"] + RTF_SMOOTHING * rtf
+                entry["jobs"] += 1
+            else:
+                self.entries[key] = {"rtf": rtf, "jobs": 1}
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp, self.path)
+        return rtf
+
+
+class JobScheduler:
+    """
+    Blocking job queue ordered by predicted runtime minus aging.
+
+    Jobs with an unknown runtime are ranked like the average known job.
+    Equal priorities run in submission order. A job can be put before its
+    runtime is known (`pending`) and given it later with update(); no job
+    is handed out while a pending one is waiting for its probe (at most
+    `probe_wait` seconds), so a batch is ranked as a whole.
+    """
+
+    def __init__(self, aging_rate=AGING_RATE, probe_wait=PROBE_WAIT):
+        self.aging_rate = aging_rate
+        self.probe_wait = probe_wait
+        # [predicted seconds or None, submitted monotonic time, sequence number, item, pending]
+        self._jobs = []
+        self._sequence = 0
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._jobs)
+
+    def put(self, item, predicted=None, pending=False):
+        """Queue a job, returns its ticket for update()"""
+        with self._condition:
+            ticket = self._sequence
+            self._jobs.append([predicted, time.monotonic(), ticket, item, pending])
+            self._sequence += 1
+            self._condition.notify()
+            return ticket
+
+    def update(self, ticket, predicted):
+        """Set the predicted runtime of a pending job (no-op if it already left the queue)"""
+        with self._condition:
+            for job in self._jobs:
+                if job[2] == ticket:
+                    job[0] = predicted
+                    job[4] = False
+                    self._condition.notify()
+                    return
+
+    def get(self):
+        """Remove and return the job with the best priority (waits for one)"""
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                probing = [job[1] + self.probe_wait - now for job in self._jobs if job[4]]
+                probing = [remaining for remaining in probing if remaining > 0]
+                if self._jobs and not probing:
+                    break
+                self._condition.wait(min(probing) if probing else None)
+
+            known = [job[0] for job in self._jobs if job[0] is not None]
+            fallback = sum(known) / len(known) if known else 0.0
+
+            def priority(job):
+                predicted, submitted, sequence, _, _ = job
+                waited = now - submitted
+                return (fallback if predicted is None else predicted) - self.aging_rate * waited, sequence
+
+            index = min(range(len(self._jobs)), key=lambda i: priority(self._jobs[i]))
+            return self._jobs.pop(index)[3]
@@ -0,0 +1,331 @@
+"""
+Live transcription from a continuous audio stream.
+
+Reads 16kHz mono PCM (s16le) from stdin, a FIFO or an ffmpeg capture pipe,
+shows partial text while someone is still speaking and appends finalized
+segments to the output files as soon as they are stable.
+"""
+import bisect
+import gc
+import json
+import math
+import os
+import queue
+import stat
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import torch
+import whisperx
+from whisperx.utils import format_timestamp
+
+from model_store import asr_model, store_has
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2  # s16le
+
+
+def console_log(message, level="info"):
+    """Print a log line with the same prefixes as the GUI log"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    prefix = {"error": "❌", "warning": "⚠️", "success": "✅"}.get(level, "ℹ️")
+    print(f"[{timestamp}] {prefix} {message}", file=sys.stderr, flush=True)
+
+
+def percentile(values, pct):
+    """Percentile of a list of floats (nearest rank), None for empty lists"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def open_pcm_source(source, capture_format=None, realtime=False):
+    """
+    Open a PCM stream for live transcription.
+
+    '-' reads raw 16kHz mono s16le from stdin, a FIFO is read as raw PCM too.
+    Anything else (file, URL, capture device) is decoded by ffmpeg into a pipe.
+    Returns (stream, process) - process is None if no ffmpeg was started.
+    """
+    if source == "-":
+        return sys.stdin.buffer, None
+
+    if os.path.exists(source) and stat.S_ISFIFO(os.stat(source).st_mode):
+        return open(source, "rb"), None
+
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    if realtime:
+        cmd.append("-re")  # Feed recordings at real-time pace
+    if capture_format:
+        cmd += ["-f", capture_format]
+    cmd += [
+        "-i", source,
+        "-vn",
+        "-ar", str(SAMPLE_RATE),
+        "-ac", "1",
+        "-f", "s16le",
+        "pipe:1",
+    ]
+
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stdin=subprocess.DEVNULL)
+    except FileNotFoundError:
+        raise RuntimeError("FFmpeg not installed")
+
+    return process.stdout, process
+
+
+class LiveOutputWriter:
+    """Appends finalized segments to the selected output files"""
+
+    def __init__(self, output_dir, output_name, formats):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.output_name = output_name
+        self.formats = formats
+        self.segments = []
+        self.cue_index = 0
+        self.files = {}
+
+        for fmt in formats:
+            if fmt == "json":
+                continue  # Written once when the stream ends
+            handle = open(self.output_dir / f"{output_name}.{fmt}", "w", encoding="utf-8")
+            if fmt == "vtt":
+                handle.write("WEBVTT\n\n")
+            elif fmt == "tsv":
+                handle.write("start\tend\ttext\n")
+            handle.flush()
+            self.files[fmt] = handle
+
+    def append(self, segment):
+        self.segments.append(segment)
+        self.cue_index += 1
+        text = segment["text"].strip()
+        start, end = segment["start"], segment["end"]
+
+        for fmt, handle in self.files.items():
+            if fmt == "txt":
+                handle.write(f"{text}\n")
+            elif fmt == "srt":
+                handle.write(
+                    f"{self.cue_index}\n"
+                    f"{format_timestamp(start, always_include_hours=True, decimal_marker=',')} --> "
+                    f"{format_timestamp(end, always_include_hours=True, decimal_marker=',')}\n"
+                    f"{text}\n\n"
+                )
+            elif fmt == "vtt":
+                handle.write(f"{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n\n")
+            elif fmt == "tsv":
+                handle.write(f"{round(1000 * start)}\t{round(1000 * end)}\t{text}\n")
+            handle.flush()
+
+    def close(self, language=None):
+        for handle in self.files.values():
+            handle.close()
+        self.files.clear()
+
+        if "json" in self.formats:
+            with open(self.output_dir / f"{self.output_name}.json", "w", encoding="utf-8") as f:
+                json.dump({"segments": self.segments, "language": language}, f, ensure_ascii=False, indent=2)
+
+
+class LiveTranscriber:
+    """
+    Incremental transcription of a growing audio buffer.
+
+    Every `step` seconds the pending buffer is transcribed again. Segments that
+    end more than `stability_margin` seconds before the buffer end are final,
+    everything after that is shown as partial text. Finalized audio is dropped
+    from the buffer, so each pass stays bounded by `max_buffer` seconds.
+    """
+
+    def __init__(self, settings, log=console_log, step=1.0, stability_margin=1.5, max_buffer=20.0):
+        self.settings = settings
+        self.log = log
+        self.step = step
+        self.stability_margin = stability_margin
+        self.max_buffer = max_buffer
+        self.language = settings.get("language") or None
+
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_start = 0.0   # Stream time (s) of buffer[0]
+        self.received = 0         # Samples received in total
+        self.arrivals = []        # (stream end time, wall clock) per chunk
+
+        self.final_latencies = []
+        self.partial_latencies = []
+        self.last_partial = ""
+
+    def _arrival_time(self, stream_time):
+        """Wall-clock time when the sample at `stream_time` was received"""
+        index = bisect.bisect_left(self.arrivals, (stream_time, 0.0))
+        index = min(index, len(self.arrivals) - 1)
+        return self.arrivals[index][1]
+
+    def _reader(self, stream, chunks, chunk_bytes):
+        """Read raw PCM in fixed-size chunks (runs in a background thread)"""
+        try:
+            remainder = b""
+            while True:
+                data = stream.read(chunk_bytes)
+                if not data:
+                    break
+                data = remainder + data
+                usable = len(data) - len(data) % BYTES_PER_SAMPLE
+                remainder = data[usable:]
+                if usable:
+                    chunks.put((time.monotonic(), data[:usable]))
+        finally:
+            chunks.put(None)  # End of stream
+
+    def run(self, stream, writer):
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.log(f"Loading model: {self.settings['model']}")
+        model = whisperx.load_model(
+            self.settings["model"],
+            device,
+            compute_type=self.settings["compute_type"],
+            language=self.language,
+            local_files_only=store_has(asr_model(self.settings["model"], self.settings["compute_type"]))
+        )
+        self.log(f"✓ Model loaded on {device}")
+        self.log("🎙️ Listening... (Ctrl+C to stop)")
+
+        chunks = queue.Queue()
+        chunk_bytes = int(0.25 * SAMPLE_RATE) * BYTES_PER_SAMPLE
+        reader = threading.Thread(target=self._reader, args=(stream, chunks, chunk_bytes), daemon=True)
+        reader.start()
+
+        eof = False
+        pending = 0
+        try:
+            while not eof:
+                # Collect audio until one step is available (or the stream ends)
+                while pending < self.step * SAMPLE_RATE:
+                    item = chunks.get()
+                    if item is None:
+                        eof = True
+                        break
+                    arrived, data = item
+                    samples = np.frombuffer(data, np.int16).astype(np.float32) / 32768.0
+                    self.buffer = np.concatenate([self.buffer, samples])
+                    self.received += len(samples)
+                    pending += len(samples)
+                    self.arrivals.append((self.received / SAMPLE_RATE, arrived))
+
+                if len(self.buffer):
+                    self._process(model, writer, final=eof)
+                pending = 0
+
+        except KeyboardInterrupt:
+            self.log("Stopping - finalizing remaining audio...")
+            if len(self.buffer):
+                self._process(model, writer, final=True)
+
+        finally:
+            writer.close(self.language)
+            del model
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+        self.report()
+
+    def _process(self, model, writer, final=False):
+        result = model.transcribe(
+            self.buffer,
+            batch_size=self.settings["batch_size"],
+            language=self.language
+        )
+        if not self.language and result.get("language"):
+            self.language = result["language"]
+            self.log(f"  Language: {self.language}")
+
+        segments = result.get("segments", [])
+        buffer_duration = len(self.buffer) / SAMPLE_RATE
+        stable_until = buffer_duration - self.stability_margin
+
+        count = len(segments)
+        if not final:
+            count = 0
+            while count < len(segments) and segments[count]["end"] <= stable_until:
+                count += 1
+            # Bound latency: force out everything but the last segment
+            if count == 0 and buffer_duration >= self.max_buffer and len(segments) > 1:
+                count = len(segments) - 1
+
+        now = time.monotonic()
+        for segment in segments[:count]:
+            segment = {
+                "start": round(self.buffer_start + segment["start"], 3),
+                "end": round(self.buffer_start + segment["end"], 3),
+                "text": segment["text"].strip(),
+            }
+            writer.append(segment)
+            latency = now - self._arrival_time(segment["end"])
+            self.final_latencies.append(latency)
+            print(f"[{format_timestamp(segment['start'])}] {segment['text']}", flush=True)
+
+        # Drop finalized audio from the buffer
+        if final:
+            cut = len(self.buffer)
+        elif count:
+            cut = int(segments[count - 1]["end"] * SAMPLE_RATE)
+        elif not segments and buffer_duration >= self.max_buffer:
+            # Nothing but silence - keep only the tail in case speech starts there
+            cut = len(self.buffer) - int(self.stability_margin * SAMPLE_RATE)
+        else:
+            cut = 0
+
+        if cut:
+            self.buffer = self.buffer[cut:]
+            self.buffer_start += cut / SAMPLE_RATE
+            # Arrival times are only needed for audio that is still buffered
+            keep = bisect.bisect_left(self.arrivals, (self.buffer_start, 0.0))
+            self.arrivals = self.arrivals[max(0, keep - 1):]
+
+        partial = " ".join(s["text"].strip() for s in segments[count:])
+        if partial and partial != self.last_partial:
+            self.partial_latencies.append(now - self.arrivals[-1][1])
+            print(f"  … {partial}", file=sys.stderr, flush=True)
+        self.last_partial = partial
+
+    def report(self):
+        """Log latency percentiles for partial and finalized output"""
+        self.log("=" * 60)
+        self.log(f"✓ Live transcription finished ({self.received / SAMPLE_RATE:.1f}s audio)")
+        for name, values in (("Partial", self.partial_latencies), ("Final", self.final_latencies)):
+            if not values:
+                continue
+            self.log(
+                f"  {name} latency: p50={percentile(values, 50):.2f}s "
+                f"p90={percentile(values, 90):.2f}s p99={percentile(values, 99):.2f}s "
+                f"(n={len(values)})"
+            )
+        self.log("=" * 60)
+
+
+def run_live(source, settings, output_name=None, capture_format=None, realtime=False, log=console_log):
+    """Entry point for `mindscribe.py --live`"""
+    if not output_name:
+        output_name = f"live_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    formats = settings.get("output_formats") or ["txt"]
+    writer = LiveOutputWriter(settings["output_dir"], output_name, formats)
+    log(f"Writing to: {Path(settings['output_dir']) / output_name}.{{{','.join(formats)}}}")
+
+    stream, process = open_pcm_source(source, capture_format, realtime)
+    try:
+        LiveTranscriber(settings, log=log).run(stream, writer)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
@@ -1,52 +1,114 @@
-import tkinter as tk
-from tkinter import ttk, scrolledtext, filedialog, messagebox
 from pathlib import Path
 import threading
+import queue
 import sys
-import whisperx
-import torch
-import gc
-import requests
-import yt_dlp
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import subprocess
 import os
+import argparse
+import time
+from inference_worker import InferenceWorker, SharedAudio
+from pipeline import IncrementalState, JobCancelled, relabel_speakers, run_ffmpeg, shift_timestamps
+from check_setup import load_capability_profile, refresh_capability_profile
+from job_scheduler import JobScheduler, ThroughputHistory, probe_duration
+from model_store import ModelStore, active_store, asr_model, job_offline
+from speaker_library import SpeakerLibrary
 
-# Ensure TkinterDnD is available and import it
-try:
-    from tkinterdnd2 import DND_FILES, TkinterDnD
-except ImportError:
-    messagebox.showerror("Import Error", "TkinterDnD2 not found. Please install it using 'pip install tkinterdnd2'.")
-    sys.exit(1)
-
-# Ensure yt_dlp is available and import it
-try:
-    import yt_dlp
-except ImportError:
-    messagebox.showerror("Import Error", "yt-dlp not found. Please install it using 'pip install yt-dlp'.")
-    sys.exit(1)
-
-# Ensure whisperx is available and import it (only for type hinting and potential future direct use)
-# Actual WhisperX execution is via subprocess for better isolation and resource management.
-try:
-    import whisperx
-    # Check for HuggingFace token proactively
-    HF_TOKEN = os.environ.get("HF_TOKEN")
-except ImportError:
-    messagebox.showwarning("Import Warning", "whisperx not found. While not strictly required for this GUI to *run* (as it uses subprocess), direct import might fail. Ensure it's installed via 'pip install -U whisperx'.")
-    HF_TOKEN = os.environ.get("HF_TOKEN")
-except Exception as e:
-    messagebox.showwarning("HuggingFace Token Check", f"Could not check HuggingFace token during whisperx import: {e}. Diarization might fail without it.")
-    HF_TOKEN = os.environ.get("HF_TOKEN")
-
-# Safe Import für Drag & Drop (verhindert Absturz, falls nicht installiert)
-try:
-    from tkinterdnd2 import DND_FILES, TkinterDnD
-    DND_AVAIL = True
-except ImportError:
-    DND_AVAIL = False
-    print("Warning: tkinterdnd2 not found. Drag & Drop will be disabled.")
+# The inference worker is started with multiprocessing "spawn", which imports this
+# file again as __mp_main__. The worker only needs pipeline - skip the GUI toolkit,
+# downloaders and whisperx there (and never show import error dialogs from it).
+if __name__ != "__mp_main__":
+    import tkinter as tk
+    from tkinter import ttk, scrolledtext, filedialog, messagebox
+    import requests
+    from source_cache import SourceCache
+    from watch_folder import FolderWatcher, load_folder_profile
+
+    # Ensure TkinterDnD is available and import it
+    try:
+        from tkinterdnd2 import DND_FILES, TkinterDnD
+    except ImportError:
+        messagebox.showerror("Import Error", "TkinterDnD2 not found. Please install it using 'pip install tkinterdnd2'.")
+        sys.exit(1)
+
+    # Ensure yt_dlp is available and import it
+    try:
+        import yt_dlp
+    except ImportError:
+        messagebox.showerror("Import Error", "yt-dlp not found. Please install it using 'pip install yt-dlp'.")
+        sys.exit(1)
+
+    # Ensure whisperx is available and import it (the GUI process only uses its output writers)
+    # Actual WhisperX inference runs in a separate worker process for better isolation and resource management.
+    try:
+        import whisperx
+        # Check for HuggingFace token proactively
+        HF_TOKEN = os.environ.get("HF_TOKEN")
+    except ImportError:
+        messagebox.showwarning("Import Warning", "whisperx not found. While not strictly required for this GUI to *run* (as it uses subprocess), direct import might fail. Ensure it's installed via 'pip install -U whisperx'.")
+        HF_TOKEN = os.environ.get("HF_TOKEN")
+    except Exception as e:
+        messagebox.showwarning("HuggingFace Token Check", f"Could not check HuggingFace token during whisperx import: {e}. Diarization might fail without it.")
+        HF_TOKEN = os.environ.get("HF_TOKEN")
+
+    # Safe Import für Drag & Drop (verhindert Absturz, falls nicht installiert)
+    try:
+        from tkinterdnd2 import DND_FILES, TkinterDnD
+        DND_AVAIL = True
+    except ImportError:
+        DND_AVAIL = False
+        print("Warning: tkinterdnd2 not found. Drag & Drop will be disabled.")
+
+# Containers that carry video next to the audio track(s)
+VIDEO_EXTENSIONS = {'.mp4', '.mkv', '.mov', '.avi', '.webm', '.m4v', '.ts', '.mts', '.flv', '.wmv'}
+
+# ISO 639-2 codes of container language tags (B and T variants) -> ISO 639-1 (as used by Whisper)
+ISO_639_2_TO_1 = {
+    'ara': 'ar', 'bul': 'bg', 'cat': 'ca', 'ces': 'cs', 'cze': 'cs', 'chi': 'zh', 'zho': 'zh',
+    'dan': 'da', 'deu': 'de', 'ger': 'de', 'ell': 'el', 'gre': 'el', 'eng': 'en', 'est': 'et',
+    'eus': 'eu', 'baq': 'eu', 'fas': 'fa', 'per': 'fa', 'fin': 'fi', 'fra': 'fr', 'fre': 'fr',
+    'glg': 'gl', 'heb': 'he', 'hin': 'hi', 'hrv': 'hr', 'hun': 'hu', 'ind': 'id', 'ita': 'it',
+    'jpn': 'ja', 'kat': 'ka', 'geo': 'ka', 'kor': 'ko', 'lav': 'lv', 'lit': 'lt', 'mal': 'ml',
+    'nld': 'nl', 'dut': 'nl', 'nno': 'nn', 'nor': 'no', 'nob': 'no', 'pol': 'pl', 'por': 'pt',
+    'ron': 'ro', 'rum': 'ro', 'rus': 'ru', 'slk': 'sk', 'slo': 'sk', 'slv': 'sl', 'spa': 'es',
+    'srp': 'sr', 'swe': 'sv', 'tel': 'te', 'tgl': 'tl', 'tha': 'th', 'tur': 'tr', 'ukr': 'uk',
+    'urd': 'ur', 'vie': 'vi',
+}
+
+def normalize_language_code(code):
+    """'ger', 'deu', 'de', 'DE' -> 'de' (unknown codes are only lowercased)"""
+    code = (code or "").strip().lower()
+    return ISO_639_2_TO_1.get(code, code)
+
+def parse_timestamp(text):
+    """Parse '90', '1:30' or '01:01:30.5' into seconds (None for empty input)"""
+    text = (text or "").strip()
+    if not text:
+        return None
+    
+    seconds = 0.0
+    for part in text.split(":"):
+        seconds = seconds * 60 + float(part)
+    if seconds < 0:
+        raise ValueError(f"Negative time: {text}")
+    return seconds
+
+def format_window(window):
+    start, end = window
+    end_text = str(timedelta(seconds=round(end))) if end is not None else "end"
+    return f"{timedelta(seconds=round(start or 0))} - {end_text}"
+
+def get_window(settings):
+    """(start, end) time window of a job, or None for the whole file"""
+    start = settings.get("start_time")
+    end = settings.get("end_time")
+    if not start and end is None:
+        return None
+    return (start or 0.0, end)
+
+# Settings file (shared by GUI and headless modes)
+SETTINGS_FILE = Path(__file__).parent / "whisperx_settings.json"
 
 class MindscribeGUI:
     def __init__(self, root):
@@ -55,16 +117,57 @@ class MindscribeGUI:
         self.root.geometry("700x800")
         
         # Settings file
-        self.settings_file = Path(__file__).parent / "whisperx_settings.json"
+        self.settings_file = SETTINGS_FILE
         
         # Track temporary files
         self.temp_files = []
         
+        # Set by the Cancel button, checked between download chunks and inference batches
+        self.cancel_event = threading.Event()
+        
+        # Jobs run one after another (button clicks, dropped files, watched folders),
+        # shortest predicted runtime first
+        self.job_queue = JobScheduler()
+        self.throughput = ThroughputHistory()
+        self.job_running = False
+        self.watcher = None
+        
+        # Duration probes of queued jobs, one at a time in submission order
+        self.probe_queue = queue.Queue()
+        threading.Thread(target=self._probe_runner, daemon=True).start()
+        
+        # Speakers of the last finished job (for enrolling them by name)
+        self.last_job = None
+        threading.Thread(target=self._job_runner, daemon=True).start()
+        
+        # Persistent inference worker (models stay loaded between jobs)
+        self.worker = InferenceWorker(log=self.log)
+        self.worker.start()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         self.create_widgets()
         self.load_settings()
         
-        # Check FFmpeg
-        if not self.check_ffmpeg():
+        # Offline model store (checked and activated in main() before the worker was started)
+        self.model_store = active_store()
+        if self.model_store:
+            self.log(f"📦 Offline model store: {self.model_store.summary()} - "
+                     f"jobs whose models are all in it run without network lookups")
+            if self.preload_models_var.get():
+                threading.Thread(target=self._warm_model_store, daemon=True).start()
+        elif ModelStore().exists:
+            self.log("⚠ Model store incomplete - not used (run 'python model_store.py verify')", "warning")
+        
+        # Check FFmpeg (from the cached capability profile if the environment is unchanged)
+        self.capabilities = load_capability_profile()
+        if self.capabilities:
+            ffmpeg_ok = bool(self.capabilities["ffmpeg"]["path"])
+        else:
+            ffmpeg_ok = self.check_ffmpeg()
+            # Re-probe in the background, so the next start is fast again
+            threading.Thread(target=self._refresh_capabilities, daemon=True).start()
+        
+        if not ffmpeg_ok:
             messagebox.showwarning(
                 "FFmpeg Warning",
                 "FFmpeg not found in PATH!\n\n"
@@ -72,6 +175,25 @@ class MindscribeGUI:
                 "Please install FFmpeg if needed."
             )
     
+    def on_close(self):
+        """Stop the folder watcher and the inference worker before closing the window"""
+        if self.watcher:
+            self.watcher.stop()
+        self.worker.stop()
+        self.root.destroy()
+    
+    def _refresh_capabilities(self):
+        try:
+            self.capabilities = refresh_capability_profile()
+        except Exception as e:
+            self.root.after(0, lambda: self.log(f"⚠ Could not update capability profile: {e}", "warning"))
+    
+    def _warm_model_store(self):
+        """Read the model store into the page cache"""
+        size, seconds = self.model_store.warm()
+        self.root.after(0, lambda: self.log(
+            f"🔥 Model store preloaded: {size / 1024**3:.2f} GB in {seconds:.1f}s (first model loads come from memory)"))
+    
     def check_ffmpeg(self):
         """Check if FFmpeg is available"""
         try:
@@ -166,6 +288,10 @@ class MindscribeGUI:
         self.diarize_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(params_frame, text="Enable Diarization", variable=self.diarize_var).grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=5)
         
+        # Run diarization alongside transcription (faster, but needs more RAM/VRAM)
+        self.parallel_diarize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(params_frame, text="Diarize during transcription", variable=self.parallel_diarize_var).grid(row=2, column=2, columnspan=2, sticky=tk.W, pady=5)
+        
         # Speakers
         ttk.Label(params_frame, text="Min Speakers:").grid(row=3, column=0, sticky=tk.W)
         self.min_speakers_var = tk.StringVar(value="2")
@@ -217,6 +343,67 @@ class MindscribeGUI:
             self.format_vars[fmt] = var
             ttk.Checkbutton(formats_frame, text=fmt.upper(), variable=var).grid(row=0, column=i, padx=5)
         
+        # Audio track for video files with several tracks (e.g. multi-language)
+        ttk.Label(params_frame, text="Audio Track:").grid(row=8, column=0, sticky=tk.W, pady=5)
+        self.audio_track_var = tk.StringVar(value="auto")
+        self.audio_track_combo = ttk.Combobox(params_frame, textvariable=self.audio_track_var,
+                                              values=["auto"], width=40)
+        self.audio_track_combo.grid(row=8, column=1, columnspan=3, sticky=tk.W, padx=5)
+        self._probed_source = None
+        
+        # Time window (only fetch/decode this part of the recording)
+        ttk.Label(params_frame, text="Start (hh:mm:ss):").grid(row=9, column=0, sticky=tk.W, pady=5)
+        self.start_time_var = tk.StringVar(value="")
+        ttk.Entry(params_frame, textvariable=self.start_time_var, width=10).grid(row=9, column=1, sticky=tk.W, padx=5)
+        
+        ttk.Label(params_frame, text="End (hh:mm:ss):").grid(row=9, column=2, sticky=tk.W, padx=(20,0))
+        self.end_time_var = tk.StringVar(value="")
+        ttk.Entry(params_frame, textvariable=self.end_time_var, width=10).grid(row=9, column=3, sticky=tk.W, padx=5)
+        
+        self.keep_timeline_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(params_frame, text="Timestamps relative to original recording", variable=self.keep_timeline_var).grid(row=10, column=0, columnspan=2, sticky=tk.W)
+        
+        # Growing recordings: only process the new tail on reruns
+        self.incremental_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(params_frame, text="Only transcribe new audio (growing files)", variable=self.incremental_var).grid(row=10, column=2, columnspan=2, sticky=tk.W)
+        
+        # Segments per alignment model call (1 = one segment at a time)
+        ttk.Label(params_frame, text="Align Batch Size:").grid(row=11, column=0, sticky=tk.W, pady=5)
+        self.align_batch_var = tk.StringVar(value="16")
+        ttk.Entry(params_frame, textvariable=self.align_batch_var, width=10).grid(row=11, column=1, sticky=tk.W, padx=5)
+        
+        # Longer recordings are diarized in overlapping chunks (0 = single pass)
+        ttk.Label(params_frame, text="Diarize Chunks (min):").grid(row=11, column=2, sticky=tk.W, padx=(20,0))
+        self.diarize_chunk_var = tk.StringVar(value="30")
+        ttk.Entry(params_frame, textvariable=self.diarize_chunk_var, width=10).grid(row=11, column=3, sticky=tk.W, padx=5)
+        
+        # Downloaded URL/YouTube sources are kept for repeat jobs (0 = no cache)
+        ttk.Label(params_frame, text="Source Cache (MB):").grid(row=12, column=0, sticky=tk.W, pady=5)
+        self.source_cache_var = tk.StringVar(value="5000")
+        ttk.Entry(params_frame, textvariable=self.source_cache_var, width=10).grid(row=12, column=1, sticky=tk.W, padx=5)
+        
+        # Small model for a quick first draft (replaced by the main model's result)
+        ttk.Label(params_frame, text="Draft Model:").grid(row=12, column=2, sticky=tk.W, padx=(20,0))
+        self.draft_model_var = tk.StringVar(value="none")
+        ttk.Combobox(params_frame, textvariable=self.draft_model_var,
+                     values=["none", "tiny", "base", "small"], width=8).grid(row=12, column=3, sticky=tk.W, padx=5)
+        
+        # Align/diarize without long silences (timestamps are mapped back)
+        self.strip_silence_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(params_frame, text="Skip silences when aligning/diarizing", variable=self.strip_silence_var).grid(row=13, column=0, columnspan=2, sticky=tk.W)
+        
+        # Read the offline model store into the OS page cache at start (fast first job)
+        self.preload_models_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(params_frame, text="Preload model store at start", variable=self.preload_models_var).grid(row=13, column=2, columnspan=2, sticky=tk.W)
+        
+        # Low-Memory Mode (release each model right after its stage)
+        self.low_memory_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(params_frame, text="Low-Memory Mode", variable=self.low_memory_var).grid(row=7, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        ttk.Label(params_frame, text="Memory Limit (MB):").grid(row=7, column=2, sticky=tk.W, padx=(20,0))
+        self.memory_limit_var = tk.StringVar(value="0")
+        ttk.Entry(params_frame, textvariable=self.memory_limit_var, width=10).grid(row=7, column=3, sticky=tk.W, padx=5)
+        
         # === Progress ===
         self.progress_var = tk.StringVar(value="Ready")
         ttk.Label(main_frame, textvariable=self.progress_var).grid(row=row, column=0, sticky=tk.W, pady=5)
@@ -239,6 +426,12 @@ class MindscribeGUI:
         button_frame.grid(row=row, column=0, sticky=(tk.W, tk.E), pady=10)
         
         ttk.Button(button_frame, text="Transcribe", command=self.start_transcription).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Re-Diarize", command=self.start_rediarization).pack(side=tk.LEFT, padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_job, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+        self.watch_button = ttk.Button(button_frame, text="Watch Folder...", command=self.toggle_watch)
+        self.watch_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Speakers...", command=self.open_speaker_dialog).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Clear Log", command=self.clear_log).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Open Output Folder", command=self.open_output_folder).pack(side=tk.LEFT, padx=5)
         
@@ -264,21 +457,21 @@ class MindscribeGUI:
     
     def on_drop(self, event, widget):
         """Handle drag & drop"""
-        path = event.data.strip('{}')
-        
-        # Handle multiple files (take first)
-        if '\n' in path:
-            path = path.split('\n')[0]
-        
-        # Clean path
-        path = path.strip()
+        # Tcl list: paths with spaces come in {braces}
+        paths = [path.strip() for path in self.root.tk.splitlist(event.data) if path.strip()]
+        if not paths:
+            return
         
         widget.delete(0, tk.END)
-        widget.insert(0, path)
+        widget.insert(0, paths[0])
         
         # Trigger URL detection if it's the file entry
         if widget == self.file_entry:
             self.detect_url_type(None)
+            
+            # Several files: transcribe all of them, one after another
+            if len(paths) > 1:
+                self.queue_files(paths, quiet=True)
     
     def open_output_folder(self):
         """Open output directory in file explorer"""
@@ -321,9 +514,24 @@ class MindscribeGUI:
             self.url_type_label.config(text="🌐 URL", foreground="blue")
         elif Path(text).exists():
             self.url_type_label.config(text="📁 Local File", foreground="green")
+            if Path(text).suffix.lower() in VIDEO_EXTENSIONS and text != self._probed_source:
+                self._probed_source = text
+                threading.Thread(target=self._probe_tracks_worker, args=(text,), daemon=True).start()
         else:
             self.url_type_label.config(text="⚠ Invalid", foreground="orange")
     
+    def _probe_tracks_worker(self, source):
+        """Fill the audio track list for video files (background thread)"""
+        try:
+            streams = self.probe_audio_streams(source)
+        except Exception:
+            return
+        
+        values = ["auto"] + [self.describe_audio_track(stream) for stream in streams]
+        self.root.after(0, lambda: self.audio_track_combo.config(values=values))
+        if len(streams) > 1:
+            self.root.after(0, lambda: self.log(f"🎬 Video has {len(streams)} audio tracks - select one under 'Audio Track'"))
+    
     def is_youtube_url(self, url):
         youtube_domains = ['youtube.com', 'youtu.be', 'youtube-nocookie.com']
         return any(domain in url.lower() for domain in youtube_domains)
@@ -428,11 +636,22 @@ class MindscribeGUI:
                 self.language_var.set(settings.get("language", "de"))
                 self.compute_var.set(settings.get("compute_type", "int8"))
                 self.batch_var.set(settings.get("batch_size", "8"))
+                self.align_batch_var.set(settings.get("align_batch_size", "16"))
+                self.diarize_chunk_var.set(settings.get("diarize_chunk_minutes", "30"))
+                self.source_cache_var.set(settings.get("source_cache_mb", "5000"))
+                self.draft_model_var.set(settings.get("draft_model", "none"))
                 self.diarize_var.set(settings.get("diarize", True))
+                self.parallel_diarize_var.set(settings.get("parallel_diarization", False))
                 self.min_speakers_var.set(settings.get("min_speakers", "2"))
                 self.max_speakers_var.set(settings.get("max_speakers", "2"))
                 self.token_var.set(settings.get("hf_token", ""))
                 self.output_dir_var.set(settings.get("output_dir", "./_output"))
+                self.low_memory_var.set(settings.get("low_memory", False))
+                self.memory_limit_var.set(settings.get("memory_limit_mb", "0"))
+                self.keep_timeline_var.set(settings.get("keep_timeline", True))
+                self.incremental_var.set(settings.get("incremental", False))
+                self.strip_silence_var.set(settings.get("strip_silence", True))
+                self.preload_models_var.set(settings.get("preload_models", False))
                 
                 for fmt, enabled in settings.get("formats", {"txt": True}).items():
                     if fmt in self.format_vars:
@@ -449,11 +668,22 @@ class MindscribeGUI:
             "language": self.language_var.get(),
             "compute_type": self.compute_var.get(),
             "batch_size": self.batch_var.get(),
+            "align_batch_size": self.align_batch_var.get(),
+            "diarize_chunk_minutes": self.diarize_chunk_var.get(),
+            "source_cache_mb": self.source_cache_var.get(),
+            "draft_model": self.draft_model_var.get(),
             "diarize": self.diarize_var.get(),
+            "parallel_diarization": self.parallel_diarize_var.get(),
             "min_speakers": self.min_speakers_var.get(),
             "max_speakers": self.max_speakers_var.get(),
             "hf_token": self.token_var.get(),
             "output_dir": self.output_dir_var.get(),
+            "low_memory": self.low_memory_var.get(),
+            "memory_limit_mb": self.memory_limit_var.get(),
+            "keep_timeline": self.keep_timeline_var.get(),
+            "incremental": self.incremental_var.get(),
+            "strip_silence": self.strip_silence_var.get(),
+            "preload_models": self.preload_models_var.get(),
             "formats": {fmt: var.get() for fmt, var in self.format_vars.items()}
         }
         
@@ -463,62 +693,413 @@ class MindscribeGUI:
         except Exception as e:
             self.log(f"⚠ Could not save settings: {e}", "warning")
     
-    def start_transcription(self):
-        # Validate inputs
-        if not self.file_entry.get().strip():
-            messagebox.showerror("Error", "Please select a file or enter a URL")
-            return
-        
-        if not self.token_var.get().strip() and self.diarize_var.get():
-            messagebox.showerror("Error", "HuggingFace token required for diarization")
-            return
-        
-        # Get selected formats
-        formats = [fmt for fmt, var in self.format_vars.items() if var.get()]
-        if not formats:
-            messagebox.showerror("Error", "Please select at least one output format")
-            return
-        
-        # Save settings
-        self.save_settings()
+    def validate_time_window(self):
+        try:
+            start = parse_timestamp(self.start_time_var.get())
+            end = parse_timestamp(self.end_time_var.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid start/end time.\nUse seconds, mm:ss or hh:mm:ss")
+            return False
         
-        # Prepare settings
-        settings = {
+        if end is not None and end <= (start or 0):
+            messagebox.showerror("Error", "End time must be after start time")
+            return False
+        return True
+    
+    def get_job_settings(self, formats):
+        """Collect the current GUI values into a job settings dict"""
+        return {
             "file": self.file_entry.get().strip(),
             "output_filename": self.filename_entry.get().strip(),
             "model": self.model_var.get(),
             "language": self.language_var.get(),
             "compute_type": self.compute_var.get(),
             "batch_size": int(self.batch_var.get()),
+            "align_batch_size": int(self.align_batch_var.get() or 1),
+            "diarize_chunk_minutes": float(self.diarize_chunk_var.get() or 0),
             "diarize": self.diarize_var.get(),
+            "parallel_diarization": self.parallel_diarize_var.get(),
             "min_speakers": int(self.min_speakers_var.get()) if self.diarize_var.get() else None,
             "max_speakers": int(self.max_speakers_var.get()) if self.diarize_var.get() else None,
             "hf_token": self.token_var.get().strip(),
             "output_dir": self.output_dir_var.get(),
-            "output_formats": formats
+            "output_formats": formats,
+            "low_memory": self.low_memory_var.get(),
+            "memory_limit_mb": int(self.memory_limit_var.get() or 0),
+            "source_cache_mb": float(self.source_cache_var.get() or 0),
+            "audio_track": self.audio_track_var.get().strip() or "auto",
+            "start_time": parse_timestamp(self.start_time_var.get()),
+            "end_time": parse_timestamp(self.end_time_var.get()),
+            "keep_timeline": self.keep_timeline_var.get(),
+            "incremental": self.incremental_var.get(),
+            "strip_silence": self.strip_silence_var.get(),
+            "draft_model": "" if self.draft_model_var.get() in ("", "none") else self.draft_model_var.get()
         }
+    
+    def check_job_inputs(self):
+        """Validate the parameters shared by all jobs, returns the selected formats (None if invalid)"""
+        # Get selected formats
+        formats = [fmt for fmt, var in self.format_vars.items() if var.get()]
+        if not formats:
+            messagebox.showerror("Error", "Please select at least one output format")
+            return None
         
-        # Run in thread
-        thread = threading.Thread(target=self.run_transcription, args=(settings,))
-        thread.daemon = True
-        thread.start()
+        if not self.validate_time_window():
+            return None
+        
+        if not self.token_var.get().strip() and self.diarize_var.get() and not job_offline(self.get_job_settings(formats)):
+            messagebox.showerror("Error", "HuggingFace token required for diarization\n"
+                                          "(unless all models of the job are in the model store)")
+            return None
+        
+        return formats
+    
+    def start_transcription(self):
+        # Validate inputs
+        if not self.file_entry.get().strip():
+            messagebox.showerror("Error", "Please select a file or enter a URL")
+            return
+        
+        formats = self.check_job_inputs()
+        if not formats:
+            return
+        
+        # Save settings
+        self.save_settings()
+        
+        # Prepare settings and queue the job
+        self.enqueue_job(self.run_transcription, self.get_job_settings(formats))
+    
+    def enqueue_job(self, run, settings, task="transcribe"):
+        """Run a job in the background job thread (ordered by its predicted runtime)"""
+        settings = dict(settings, predicted_seconds=None)
+        waiting = len(self.job_queue) + (1 if self.job_running else 0)
+        # Queued in submission order; the scheduler holds it back until its duration is probed
+        ticket = self.job_queue.put((run, settings, task), pending=True)
+        # Probing the duration may need the network (URLs) - keep it off the GUI thread
+        self.probe_queue.put((ticket, settings, task, waiting))
+    
+    def _probe_runner(self):
+        """Background thread: predicts the runtime of queued jobs, one at a time"""
+        while True:
+            ticket, settings, task, waiting = self.probe_queue.get()
+            predicted = None
+            try:
+                duration = self.probe_source_duration(settings)
+                predicted = self.throughput.predict(settings, duration, task)
+            except Exception as e:
+                self.log(f"⚠ Could not predict runtime of {settings['file']}: {e}", "warning")
+            settings["predicted_seconds"] = predicted
+            self.job_queue.update(ticket, predicted)
+            
+            if waiting:
+                estimate = f", ~{timedelta(seconds=round(predicted))}" if predicted is not None else ""
+                self.log(f"📥 Queued: {Path(settings['file']).name} ({waiting} job(s) waiting{estimate})")
     
-    def convert_to_wav(self, input_file, output_file):
-        """Convert any audio format to WAV using ffmpeg"""
-        self.log(f"Converting to WAV: {input_file.name}")
+    def probe_source_duration(self, settings):
+        """Seconds of audio a job will process (None if unknown)"""
+        source = settings["file"]
+        window = get_window(settings)
+        if window and window[1] is not None:
+            return window[1] - window[0]
+        
+        cache = SourceCache(max_mb=settings.get("source_cache_mb", 0))
+        duration = None
+        try:
+            if self.is_youtube_url(source):
+                duration = cache.duration(source)
+                if duration is None:
+                    with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
+                        duration = ydl.extract_info(source, download=False).get("duration")
+            elif source.startswith(('http://', 'https://')):
+                duration = probe_duration(cache.lookup(source) or source)
+            else:
+                duration = probe_duration(source)
+        except Exception as e:
+            self.log(f"⚠ Could not probe duration of {source}: {e}", "warning")
         
+        if duration is not None and window:
+            duration = max(0.0, duration - window[0])
+        return duration
+    
+    def record_throughput(self, settings, duration, elapsed, task="transcribe"):
+        """Log predicted vs. actual runtime and update the real-time factor history"""
         try:
-            result = subprocess.run([
-                'ffmpeg',
+            rtf = self.throughput.record(settings, duration, elapsed, task)
+        except OSError as e:
+            self.log(f"⚠ Could not save throughput history: {e}", "warning")
+            return
+        if rtf is None:
+            return
+        
+        predicted = settings.get("predicted_seconds")
+        if predicted is not None:
+            self.log(f"⏱ Predicted {predicted:.0f}s, took {elapsed:.0f}s (real-time factor {rtf:.2f})")
+        else:
+            self.log(f"⏱ Took {elapsed:.0f}s (real-time factor {rtf:.2f})")
+    
+    def _job_runner(self):
+        """Background thread: runs queued jobs one at a time"""
+        while True:
+            run, settings, task = self.job_queue.get()
+            self.job_running = True
+            self.cancel_event.clear()
+            self.root.after(0, lambda: self.cancel_button.config(state=tk.NORMAL))
+            try:
+                run(settings)
+            except Exception as e:
+                self.log(f"✗ Job failed: {e}", "error")
+            finally:
+                self.job_running = False
+    
+    def job_settings_problem(self, settings):
+        """What makes merged job settings unusable (None if they're fine) - no dialogs, for unattended jobs"""
+        if settings.get("diarize") and not settings.get("hf_token") and not job_offline(settings):
+            return "HuggingFace token required for diarization"
+        formats = settings.get("output_formats") or []
+        if not formats:
+            return "no output format selected"
+        unknown = [fmt for fmt in formats if fmt not in self.format_vars]
+        if unknown:
+            return f"unknown output format(s): {', '.join(map(str, unknown))}"
+        if settings.get("diarize") and (settings.get("min_speakers") or 1) > (settings.get("max_speakers") or 1):
+            return "min speakers is larger than max speakers"
+        return None
+    
+    def queue_files(self, paths, profile=None, quiet=False):
+        """Queue a transcription per file with the current settings (+ folder profile overrides)"""
+        formats = [fmt for fmt, var in self.format_vars.items() if var.get()]
+        try:
+            base = self.get_job_settings(formats)
+        except ValueError as e:
+            self.log(f"⚠ Not queued - invalid settings: {e}", "warning")
+            return
+        
+        for path in paths:
+            settings = dict(base, file=str(path), output_filename=Path(path).stem,
+                            start_time=None, end_time=None, incremental=False, quiet=quiet)
+            settings.update(profile or {})
+            
+            problem = self.job_settings_problem(settings)
+            if problem:
+                self.log(f"⚠ Skipping {Path(path).name}: {problem}", "warning")
+                continue
+            
+            if self.outputs_exist(settings):
+                self.log(f"⏭ Skipping {Path(path).name} (outputs already exist)")
+                continue
+            
+            self.enqueue_job(self.run_transcription, settings)
+    
+    def outputs_exist(self, settings):
+        """Final outputs of a job exist (drafts of an unfinished refine don't count)"""
+        output_dir = Path(settings["output_dir"])
+        name = self.make_output_name(settings["output_filename"], Path(settings["file"]).stem)
+        if self.draft_marker(output_dir, name).exists():
+            return False
+        return all((output_dir / f"{name}.{fmt}").exists() for fmt in self.export_formats(settings["output_formats"]))
+    
+    def toggle_watch(self):
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+            self.watch_button.config(text="Watch Folder...")
+            self.log("Stopped watching")
+            return
+        
+        folder = filedialog.askdirectory(title="Select Folder to Watch")
+        if folder:
+            self.start_watching([folder])
+    
+    def start_watching(self, folders):
+        """Transcribe every complete media file that is (or appears) in `folders`"""
+        if not self.check_job_inputs():
+            return
+        self.save_settings()
+        
+        def on_ready(path):
+            # Called from the watcher thread - queue in the Tk thread (reads the GUI settings)
+            self.root.after(0, lambda: self.queue_watched_file(path))
+        
+        self.watcher = FolderWatcher(folders, on_ready, log=self.log).start()
+        self.watch_button.config(text="Stop Watching")
+    
+    def queue_watched_file(self, path):
+        try:
+            profile = load_folder_profile(path.parent)
+        except (OSError, ValueError) as e:
+            self.log(f"⚠ Invalid folder profile in {path.parent}: {e}", "warning")
+            return
+        self.log(f"📂 New file: {path.name}")
+        self.queue_files([path], profile=profile, quiet=True)
+    
+    def start_rediarization(self):
+        """Re-run speaker clustering with new min/max speakers (no ASR)"""
+        if not self.file_entry.get().strip():
+            messagebox.showerror("Error", "Please select a file or enter a URL")
+            return
+        
+        formats = [fmt for fmt, var in self.format_vars.items() if var.get()]
+        if not formats:
+            messagebox.showerror("Error", "Please select at least one output format")
+            return
+        
+        if not self.validate_time_window():
+            return
+        
+        if not self.token_var.get().strip() and not job_offline(dict(self.get_job_settings(formats), diarize=True)):
+            messagebox.showerror("Error", "HuggingFace token required for diarization\n"
+                                          "(unless all models of the job are in the model store)")
+            return
+        
+        self.diarize_var.set(True)
+        self.save_settings()
+        self.enqueue_job(self.run_rediarization, self.get_job_settings(formats), task="rediarize")
+    
+    def cancel_job(self):
+        """Stop the running job after the current download chunk / inference batch"""
+        if self.cancel_event.is_set():
+            return
+        self.cancel_event.set()
+        self.progress_var.set("Cancelling...")
+        self.log("⏹ Cancelling - stopping after the current batch...", "warning")
+    
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled("Job cancelled")
+    
+    def _ytdl_cancel_hook(self, status):
+        # yt-dlp progress hook: abort the download between fragments
+        self.check_cancelled()
+    
+    def on_job_cancelled(self, audio_path=None):
+        """Reset the UI and delete everything the cancelled job left in the temp folder"""
+        self.progress.stop()
+        self.progress_var.set("Cancelled")
+        
+        self.track_temp_audio(audio_path)
+        self.cleanup_temp_files()
+        
+        self.log("⏹ Job cancelled", "warning")
+    
+    def track_temp_audio(self, audio_path):
+        """Add a job's audio to the temp files if it lives in the temp folder (downloads)"""
+        if audio_path and self.get_temp_dir() in audio_path.parents and audio_path not in self.temp_files:
+            self.temp_files.append(audio_path)
+    
+    def probe_audio_streams(self, input_file):
+        """List the audio tracks of a media file (one ffprobe call)"""
+        result = subprocess.run([
+            'ffprobe',
+            '-v', 'error',
+            '-select_streams', 'a',
+            '-show_entries', 'stream=index,codec_name,channels:stream_tags=language,title:stream_disposition=default',
+            '-of', 'json',
+            str(input_file)
+        ], capture_output=True, text=True, check=True)
+        
+        streams = json.loads(result.stdout or "{}").get("streams", [])
+        return [{
+            "track": i,  # Position among the audio streams (ffmpeg "0:a:N")
+            "codec": stream.get("codec_name", "?"),
+            "channels": stream.get("channels"),
+            "language": stream.get("tags", {}).get("language", ""),
+            "title": stream.get("tags", {}).get("title", ""),
+            "default": bool(stream.get("disposition", {}).get("default")),
+        } for i, stream in enumerate(streams)]
+    
+    def describe_audio_track(self, stream):
+        label = f"{stream['track']}: {stream['language'] or 'und'} ({stream['codec']}, {stream['channels']}ch)"
+        if stream["title"]:
+            label += f" - {stream['title']}"
+        return label
+    
+    def select_audio_track(self, streams, audio_track):
+        """Pick a track by 'auto', track number ('1' or '1: eng ...') or language code ('eng', 'de')"""
+        selection = str(audio_track or "auto").split(":")[0].strip().lower()
+        
+        if selection.isdigit():
+            track = int(selection)
+            if track < len(streams):
+                return streams[track]
+            self.log(f"⚠ Audio track {track} not found, using default track", "warning")
+        elif selection != "auto":
+            # Exact code match - a prefix like 'e' must not pick 'eng' over 'est'
+            language = normalize_language_code(selection)
+            for stream in streams:
+                if normalize_language_code(stream["language"]) == language:
+                    return stream
+            self.log(f"⚠ No audio track with language '{selection}', using default track", "warning")
+        
+        return next((stream for stream in streams if stream["default"]), streams[0])
+    
+    def convert_to_wav(self, input_file, output_file, audio_track="auto", window=None):
+        """Convert any audio format to WAV using ffmpeg (input may also be a URL)"""
+        input_name = Path(str(input_file).split('?')[0]).name
+        self.log(f"Converting to WAV: {input_name}")
+        
+        seek_args = []
+        input_args = []
+        map_args = []
+        
+        if window:
+            # Input seeking: ffmpeg jumps to the start instead of decoding everything before it
+            start, end = window
+            if start:
+                seek_args += ['-ss', f'{start:.3f}']
+            if end is not None:
+                seek_args += ['-t', f'{end - start:.3f}']
+            self.log(f"  Time window: {format_window(window)}")
+        
+        if Path(input_name).suffix.lower() in VIDEO_EXTENSIONS:
+            # Video fast path: probe once, map only the selected audio track and let the
+            # demuxer drop video/subtitle/data packets, so no video is read or decoded
+            try:
+                streams = self.probe_audio_streams(input_file)
+            except (subprocess.CalledProcessError, FileNotFoundError, ValueError) as e:
+                streams = None
+                self.log(f"⚠ Could not probe audio tracks ({e}), converting all streams", "warning")
+            
+            if streams is not None:
+                if not streams:
+                    raise RuntimeError(f"No audio track found in {input_name}")
+                
+                stream = self.select_audio_track(streams, audio_track)
+                if len(streams) > 1:
+                    self.log(f"  Audio tracks: {', '.join(self.describe_audio_track(s) for s in streams)}")
+                self.log(f"  Using audio track {self.describe_audio_track(stream)}")
+                
+                input_args = ['-discard:v', 'all', '-discard:s', 'all', '-discard:d', 'all']
+                map_args = ['-map', f'0:a:{stream["track"]}', '-vn', '-sn', '-dn']
+        
+        def convert(input_args):
+            # Killed on cancel - long videos/streams can take minutes to decode
+            run_ffmpeg([
+                *seek_args,
+                *input_args,
                 '-i', str(input_file),
+                *map_args,
                 '-ar', '16000',  # 16kHz sample rate
                 '-ac', '1',      # Mono
                 '-c:a', 'pcm_s16le',
                 '-y',
                 str(output_file)
-            ], capture_output=True, text=True, check=True)
+            ], cancel=self.cancel_event, output=output_file)
+        
+        start = datetime.now()
+        
+        try:
+            try:
+                convert(input_args)
+            except subprocess.CalledProcessError:
+                if not input_args:
+                    raise
+                # Older ffmpeg builds without per-stream -discard
+                self.log("⚠ Demux fast path failed, retrying with full demux", "warning")
+                convert([])
             
-            self.log(f"✓ Converted to WAV (16kHz mono)")
+            elapsed = (datetime.now() - start).total_seconds()
+            self.log(f"✓ Converted to WAV (16kHz mono) in {elapsed:.1f}s")
             
         except subprocess.CalledProcessError as e:
             self.log(f"✗ FFmpeg error: {e.stderr}", "error")
@@ -544,21 +1125,25 @@ class MindscribeGUI:
         
         return temp_path
 
-    def get_audio_file(self, file_path):
-        """Handle local files, URLs, and YouTube links"""
+    def get_audio_file(self, file_path, audio_track="auto", window=None, cache_mb=0):
+        """
+        Handle local files, URLs, and YouTube links.
+        window=(start, end) in seconds only fetches/decodes that part (end may be None).
+        cache_mb is the job's source cache size (runs on the job thread - no Tk variables here).
+        """
         
         # Local file
         if Path(file_path).exists():
             local_path = Path(file_path)
             
-            # Convert non-WAV formats
-            if local_path.suffix.lower() != '.wav':
+            # Convert non-WAV formats (and cut time windows, also from WAV)
+            if local_path.suffix.lower() != '.wav' or window:
                 self.log(f"Converting local file to WAV: {local_path.name}")
                 
                 temp_dir = self.get_temp_dir()
                 wav_path = temp_dir / f"{local_path.stem}_converted.wav"
                 
-                self.convert_to_wav(local_path, wav_path)
+                self.convert_to_wav(local_path, wav_path, audio_track, window)
                 
                 # ✅ Track temp file for cleanup
                 self.temp_files.append(wav_path)
@@ -572,6 +1157,17 @@ class MindscribeGUI:
             temp_dir = self.get_temp_dir()
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
+            # Cached sources: only the WAV for this job is temporary
+            cached = self.get_cached_source(file_path, window, cache_mb)
+            if cached:
+                if self.is_youtube_url(file_path):
+                    wav_file = temp_dir / f"yt_download_{timestamp}.wav"
+                else:
+                    wav_file = temp_dir / f"{Path(file_path.split('/')[-1].split('?')[0]).stem}_{timestamp}.wav"
+                self.convert_to_wav(cached, wav_file, audio_track, window)
+                self.temp_files.append(wav_file)
+                return str(wav_file)
+            
             # YouTube
             if self.is_youtube_url(file_path):
                 self.log(f"Downloading YouTube video: {file_path}")
@@ -590,10 +1186,25 @@ class MindscribeGUI:
                     'outtmpl': str(temp_output) + '.%(ext)s',
                     'quiet': True,
                     'no_warnings': True,
+                    'progress_hooks': [self._ytdl_cancel_hook],
                 }
                 
+                if window:
+                    # Only download the requested section
+                    ydl_opts['download_ranges'] = yt_dlp.utils.download_range_func(
+                        None, [(window[0], window[1] if window[1] is not None else float('inf'))]
+                    )
+                    ydl_opts['force_keyframes_at_cuts'] = True
+                    self.log(f"  Time window: {format_window(window)}")
+                
                 with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(file_path, download=True)
+                    try:
+                        info = ydl.extract_info(file_path, download=True)
+                    except Exception:
+                        if self.cancel_event.is_set():
+                            # Partial downloads (.part, fragments) of this job
+                            self.temp_files.extend(temp_dir.glob(f"yt_download_{timestamp}*"))
+                        raise
                     
                     # ✅ Find the actual downloaded file
                     downloaded_file = temp_output.with_suffix('.wav')
@@ -611,13 +1222,21 @@ class MindscribeGUI:
             
             # Regular URL
             else:
-                self.log(f"Downloading from URL: {file_path}")
-                
-                filename = file_path.split('/')[-1]
+                filename = file_path.split('/')[-1].split('?')[0]
                 base_name = Path(filename).stem
                 
+                if window and self.supports_range_requests(file_path):
+                    # Let ffmpeg seek in the remote file - only the needed byte ranges are fetched
+                    self.log(f"Reading {format_window(window)} from URL via HTTP range requests: {file_path}")
+                    wav_file = temp_dir / f"{base_name}_{timestamp}.wav"
+                    self.convert_to_wav(file_path, wav_file, audio_track, window)
+                    return str(wav_file)
+                
+                self.log(f"Downloading from URL: {file_path}")
+                
                 # Download to temp
-                temp_file = temp_dir / f"{base_name}_{timestamp}_temp"
+                temp_file = temp_dir / f"{base_name}_{timestamp}_temp{Path(filename).suffix}"
+                self.temp_files.append(temp_file)
                 
                 response = requests.get(file_path, stream=True)
                 response.raise_for_status()
@@ -627,6 +1246,7 @@ class MindscribeGUI:
                 
                 with open(temp_file, 'wb') as f:
                     for chunk in response.iter_content(chunk_size=8192):
+                        self.check_cancelled()
                         f.write(chunk)
                         downloaded += len(chunk)
                         if total_size:
@@ -637,7 +1257,8 @@ class MindscribeGUI:
                 
                 # Convert to WAV
                 wav_file = temp_dir / f"{base_name}_{timestamp}.wav"
-                self.convert_to_wav(temp_file, wav_file)
+                # Keep the container extension, so video downloads take the demux fast path
+                self.convert_to_wav(temp_file, wav_file, audio_track, window)
                 
                 # ✅ Delete raw temp, keep WAV temporarily
                 try:
@@ -649,6 +1270,47 @@ class MindscribeGUI:
     
         raise ValueError(f"Invalid file path: {file_path}")
 
+    def get_cached_source(self, url, window=None, cache_mb=0):
+        """
+        Local copy of a URL/YouTube source from the source cache (downloaded if needed).
+        Returns None if the cache is disabled or a time window is fetched more cheaply
+        without it (range requests / YouTube sections of an uncached source).
+        """
+        cache = SourceCache(max_mb=cache_mb, log=self.log)
+        if not cache.enabled:
+            return None
+        
+        cached = cache.lookup(url)
+        if window and not cached:
+            if self.is_youtube_url(url) or self.supports_range_requests(url):
+                return None
+        
+        if self.is_youtube_url(url):
+            if not cached:
+                self.log(f"Downloading YouTube audio into source cache: {url}")
+            path = cache.fetch_youtube(url, should_cancel=self.check_cancelled)
+        else:
+            if not cached:
+                self.log(f"Downloading into source cache: {url}")
+            path, kept = cache.fetch_url(
+                url,
+                progress=lambda percent: self.progress_var.set(f"Downloading: {percent:.1f}%"),
+                should_cancel=self.check_cancelled
+            )
+            if not kept:
+                self.temp_files.append(path)
+        
+        self.log(f"✓ Source: {path.name} ({path.stat().st_size / (1024*1024):.1f} MB)")
+        return path
+
+    def supports_range_requests(self, url):
+        """Check if the server allows byte-range requests (needed for remote seeking)"""
+        try:
+            response = requests.head(url, allow_redirects=True, timeout=10)
+            return response.ok and response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+        except requests.RequestException:
+            return False
+
     def cleanup_temp_files(self):
         """Delete temporary WAV files"""
         for temp_file in self.temp_files:
@@ -691,7 +1353,148 @@ class MindscribeGUI:
         else:
             self.log(f"📦 Kept source: {source_path.name}")
     
+    def make_output_name(self, output_filename, fallback):
+        """Clean the user's output filename (or use the fallback name)"""
+        if output_filename:
+            return "".join(c for c in output_filename if c.isalnum() or c in (' ', '-', '_', '.')).strip()
+        return fallback
+
+    def draft_marker(self, output_dir, output_name):
+        """Exists while the outputs of `output_name` are only a draft (removed by the final export)"""
+        return output_dir / f"{output_name}.draft"
+
+    def export_formats(self, formats):
+        return ["txt", "srt", "vtt", "tsv", "json"] if "all" in formats else list(formats)
+
+    def export_result(self, result, output_dir, output_name, formats):
+        """
+        Write the transcript in all selected formats, returns the exported files.
+        Files are written to a staging folder and moved into place, so existing
+        outputs (e.g. a draft) are replaced atomically.
+        """
+        self.log(f"Exporting to: {output_dir}")
+        
+        from whisperx.utils import get_writer
+        
+        formats = self.export_formats(formats)
+        
+        staging_dir = output_dir / "_export_tmp"
+        staging_dir.mkdir(parents=True, exist_ok=True)
+        exported_files = []
+        
+        for fmt in formats:
+            output_file = output_dir / f"{output_name}.{fmt}"
+            
+            try:
+                writer = get_writer(fmt, str(staging_dir))
+                writer(result, output_file.name, {
+                    "max_line_width": None,
+                    "max_line_count": None,
+                    "highlight_words": False
+                })
+                os.replace(staging_dir / output_file.name, output_file)
+                exported_files.append(output_file)
+                self.log(f"✓ Exported: {output_file.name}")
+                
+            except Exception as e:
+                self.log(f"⚠ Failed to export {fmt}: {e}", "warning")
+                import traceback
+                self.log(f"  Details: {traceback.format_exc()}", "warning")
+        
+        try:
+            staging_dir.rmdir()
+        except OSError:
+            pass  # Leftovers of a failed writer
+        
+        return exported_files
+
+    def apply_speaker_library(self, result, speaker_embeddings):
+        """Replace anonymous labels with the names of enrolled speakers, returns the renamed embeddings"""
+        try:
+            library = SpeakerLibrary.load()
+        except Exception as e:
+            self.log(f"⚠ Could not load speaker library: {e}", "warning")
+            return speaker_embeddings
+        
+        matches = library.match(speaker_embeddings)
+        if not matches:
+            return speaker_embeddings
+        
+        mapping = {label: name for label, (name, _) in matches.items()}
+        relabel_speakers(result, mapping)
+        for label, (name, score) in matches.items():
+            self.log(f"🗣️ {label} → {name} ({score:.2f})")
+        return {mapping.get(label, label): embedding for label, embedding in speaker_embeddings.items()}
+    
+    def remember_job(self, result, speaker_embeddings, output_dir, output_name, formats):
+        """Keep the last result, so its speakers can be named (and the outputs rewritten) afterwards"""
+        if speaker_embeddings:
+            self.last_job = {
+                "result": result,
+                "speaker_embeddings": speaker_embeddings,
+                "output_dir": output_dir,
+                "output_name": output_name,
+                "formats": formats,
+            }
+    
+    def open_speaker_dialog(self):
+        """Name the speakers of the last job and enroll their voices in the speaker library"""
+        if not self.last_job:
+            messagebox.showinfo("Speakers", "No speakers yet.\nRun a transcription with diarization first.")
+            return
+        
+        job = self.last_job
+        library = SpeakerLibrary.load()
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Speakers")
+        dialog.transient(self.root)
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text=f"{job['output_name']} - enrolled speakers: {len(library)}").grid(
+            row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+        
+        name_vars = {}
+        for row, label in enumerate(sorted(job["speaker_embeddings"]), start=1):
+            ttk.Label(frame, text=f"{label}:").grid(row=row, column=0, sticky=tk.W)
+            name_vars[label] = tk.StringVar(value="" if label.startswith("SPEAKER_") else label)
+            ttk.Entry(frame, textvariable=name_vars[label], width=30).grid(row=row, column=1, sticky=tk.W, padx=5, pady=2)
+        
+        def save():
+            mapping = {label: var.get().strip() for label, var in name_vars.items() if var.get().strip()}
+            # Recognized speakers are prefilled with their name - enrolling them again on
+            # every save would pull their voice towards this one recording
+            renamed = {label: name for label, name in mapping.items() if name != label}
+            try:
+                for label, name in renamed.items():
+                    library.enroll(name, job["speaker_embeddings"][label])
+                if renamed:
+                    library.save()
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not save speaker library:\n{e}", parent=dialog)
+                return
+            dialog.destroy()
+            
+            self.log(f"✓ Enrolled {len(renamed)} speaker(s) ({len(library)} in library)")
+            if renamed:
+                relabel_speakers(job["result"], renamed)
+                job["speaker_embeddings"] = {renamed.get(label, label): embedding
+                                             for label, embedding in job["speaker_embeddings"].items()}
+                self.export_result(job["result"], job["output_dir"], job["output_name"], job["formats"])
+        
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=len(name_vars) + 1, column=0, columnspan=2, sticky=tk.E, pady=(10, 0))
+        ttk.Button(buttons, text="Save", command=save).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="Cancel", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+    
     def run_transcription(self, settings):
+        audio = None
+        audio_path = None
+        job_start = time.perf_counter()
+        time_to_draft = None
+        draft_marker = None
+
         try:
             self.progress.start()
             self.temp_files.clear()  # Reset temp tracking
@@ -703,14 +1506,36 @@ class MindscribeGUI:
             self.log("=" * 60)
 
             original_input = settings["file"]
-            audio_file = self.get_audio_file(original_input)
+            window = get_window(settings)
+
+            # Growing recordings: only transcribe what was added since the last run
+            incremental = None
+            if settings.get("incremental") and Path(original_input).is_file() and not window:
+                state_name = self.make_output_name(settings["output_filename"], Path(original_input).stem)
+                incremental = IncrementalState(Path(settings["output_dir"]) / f".{state_name}.mindscribe.json")
+                status = incremental.check(original_input, settings)
+
+                if status == "unchanged":
+                    self.progress.stop()
+                    self.progress_var.set("Complete!")
+                    self.log("✓ Source unchanged since last run - nothing to do", "success")
+                    return
+                if status == "append":
+                    window = (incremental.resume_at, None)
+                    self.log(f"🔁 Known recording has grown - continuing at {timedelta(seconds=round(incremental.resume_at))}")
+                # What the audio below is decoded from - anything appended later is picked up next run
+                source_snapshot = IncrementalState.snapshot(original_input)
+
+            audio_file = self.get_audio_file(original_input, settings.get("audio_track", "auto"), window,
+                                             settings.get("source_cache_mb", 0))
             audio_path = Path(audio_file)
 
-            # Check if this was a download (URL or YouTube)
+            # Check if this was a download (URL or YouTube) - WAVs made from the
+            # source cache are temp files, the original stays in the cache
             is_downloaded = (
                 original_input.startswith(('http://', 'https://')) or 
                 self.is_youtube_url(original_input)
-            )
+            ) and audio_path not in self.temp_files
 
             self.log(f"Processing: {audio_path.name}")
 
@@ -722,8 +1547,13 @@ class MindscribeGUI:
 
                 new_path = audio_path.parent / f"{new_name}.wav"
 
-                # Handle existing file
-                if new_path.exists():
+                # Handle existing file - quiet jobs (watch folder, queue) never ask, they keep it
+                if new_path.exists() and settings.get("quiet"):
+                    counter = 1
+                    while new_path.exists():
+                        new_path = audio_path.parent / f"{new_name}_{counter}.wav"
+                        counter += 1
+                elif new_path.exists():
                     response = messagebox.askyesno(
                         "File exists",
                         f"File already exists in temp:\n{new_path.name}\n\nOverwrite?"
@@ -738,151 +1568,113 @@ class MindscribeGUI:
 
                 try:
                     audio_path.rename(new_path)
+                    # Temp tracking follows the rename, so error/cancel cleanup finds the file
+                    if audio_path in self.temp_files:
+                        self.temp_files[self.temp_files.index(audio_path)] = new_path
                     audio_path = new_path
                     audio_file = str(audio_path)
                     self.log(f"✓ Renamed temp file to: {audio_path.name}")
                 except Exception as e:
                     self.log(f"⚠ Rename failed, using original name: {e}", "warning")
 
-            # Load model
-            self.progress_var.set("Loading model...")
-            self.log(f"Loading model: {settings['model']}")
-
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            compute_type = settings["compute_type"]
-
-            model = whisperx.load_model(
-                settings["model"],
-                device,
-                compute_type=compute_type
-            )
-
-            self.log(f"✓ Model loaded on {device}")
+            # Determine output filename
+            output_name = self.make_output_name(settings["output_filename"], audio_path.stem)
 
-            # Load audio
+            # Load audio (handed to the worker process through shared memory)
             self.progress_var.set("Loading audio...")
             self.log(f"Loading audio: {audio_path.name}")
 
-            audio = whisperx.load_audio(audio_file)
-            self.log(f"✓ Audio loaded ({len(audio)/16000:.1f}s)")
+            # Decoded straight into shared memory - the GUI process keeps no copy of its own
+            audio = SharedAudio.load(audio_file, cancel=self.cancel_event)
+            audio_duration = audio.duration
+            self.log(f"✓ Audio loaded ({audio_duration:.1f}s)")
+            self.check_cancelled()
 
-            # Transcribe
-            self.progress_var.set("Transcribing...")
-            self.log("Transcribing...")
+            output_dir = Path(settings["output_dir"])
+            output_dir.mkdir(parents=True, exist_ok=True)
 
-            language = settings["language"] if settings["language"] else None
+            # Quick draft with a small model, exported right away and replaced by the final result
+            # (not for appended tails - the outputs hold the whole recording)
+            # Decided once from the final pass's settings: both passes run in the same worker mode
+            offline = job_offline(settings)
 
-            result = model.transcribe(
+            draft_model = settings.get("draft_model")
+            if draft_model and draft_model != settings["model"] and not (incremental and incremental.resume_at is not None):
+                self.progress_var.set("Drafting...")
+                self.log(f"📝 Draft pass with '{draft_model}'...")
+                draft = self.worker.run(
+                    audio,
+                    dict(settings, model=draft_model, diarize=False, draft=True, output_name=output_name),
+                    on_log=self.log,
+                    on_progress=self.progress_var.set,
+                    cancel=self.cancel_event,
+                    offline=offline
+                )
+                if window and window[0] and settings.get("keep_timeline"):
+                    shift_timestamps(draft, window[0])
+                draft_marker = self.draft_marker(output_dir, output_name)
+                draft_marker.write_text(f"Draft by '{draft_model}' - refining with '{settings['model']}'\n",
+                                        encoding="utf-8")
+                self.export_result(draft, output_dir, output_name, settings["output_formats"])
+                draft = None
+                
+                time_to_draft = time.perf_counter() - job_start
+                self.log(f"⏱ Draft ready after {time_to_draft:.1f}s - refining with '{settings['model']}'...")
+
+            # Transcribe, align and diarize in the inference worker
+            result = self.worker.run(
                 audio,
-                batch_size=settings["batch_size"],
-                language=language
+                dict(settings, output_name=output_name),
+                on_log=self.log,
+                on_progress=self.progress_var.set,
+                cancel=self.cancel_event,
+                offline=offline
             )
+            audio.close()
+            audio = None
 
-            self.log(f"✓ Transcription complete")
-            self.log(f"  Language: {result.get('language', 'unknown')}")
-            self.log(f"  Segments: {len(result.get('segments', []))}")
-
-            # Alignment
-            self.progress_var.set("Aligning...")
-            self.log("Aligning timestamps...")
+            # Speaker embeddings are only used for matching, not exported
+            speaker_embeddings = result.pop("speaker_embeddings", None)
 
-            model_a, metadata = whisperx.load_align_model(
-                language_code=result["language"],
-                device=device
-            )
-
-            result = whisperx.align(
-                result["segments"],
-                model_a,
-                metadata,
-                audio,
-                device,
-                return_char_alignments=False
-            )
+            if incremental and incremental.resume_at is not None:
+                # Tail -> original timeline, then merge into the previous transcript
+                shift_timestamps(result, incremental.resume_at)
+                new_segments = len(result.get("segments", []))
+                result, speaker_embeddings = incremental.merge(result, speaker_embeddings)
+                self.log(f"✓ Merged {new_segments} new segments ({len(result['segments'])} total)")
+            elif window and window[0] and settings.get("keep_timeline"):
+                shift_timestamps(result, window[0])
+                self.log(f"  Timestamps offset by {window[0]:.1f}s (original timeline)")
 
-            self.log(f"✓ Alignment complete")
+            if speaker_embeddings:
+                speaker_embeddings = self.apply_speaker_library(result, speaker_embeddings)
 
-            # Diarization
-            if settings["diarize"] and settings["hf_token"]:
-                self.progress_var.set("Diarizing speakers...")
-                min_spk = settings.get("min_speakers", 1)
-                max_spk = settings.get("max_speakers", 2)
-                self.log(f"Diarizing speakers ({min_spk}-{max_spk})...")
-                
+            if incremental:
                 try:
-                    from whisperx.diarize import DiarizationPipeline
-                    
-                    diarize_model = DiarizationPipeline(
-                        use_auth_token=settings["hf_token"],
-                        device=device
-                    )
-                    
-                    # Pass audio waveform, not path
-                    diarize_segments = diarize_model(
-                        audio,
-                        min_speakers=min_spk,
-                        max_speakers=max_spk
-                    )
-                    
-                    result = whisperx.assign_word_speakers(diarize_segments, result)
-                    self.log("✓ Diarization complete")
-                    
+                    incremental.save(original_input, result, speaker_embeddings,
+                                     (window[0] if window else 0.0) + audio_duration, settings,
+                                     snapshot=source_snapshot)
                 except Exception as e:
-                    self.log(f"⚠ Diarization failed: {e}", "warning")
-                    self.log("Continuing without speaker labels...")
+                    self.log(f"⚠ Could not save incremental state: {e}", "warning")
 
             # === EXPORT ===
             self.progress_var.set("Exporting results...")
             
-            output_dir = Path(settings["output_dir"])
-            output_dir.mkdir(parents=True, exist_ok=True)
-
-            # Determine output filename
-            if settings["output_filename"]:
-                output_name = settings["output_filename"]
-                output_name = "".join(c for c in output_name if c.isalnum() or c in (' ', '-', '_', '.')).strip()
+            exported_files = self.export_result(result, output_dir, output_name, settings["output_formats"])
+            if draft_marker and len(exported_files) == len(self.export_formats(settings["output_formats"])):
+                # Every draft file was replaced
+                draft_marker.unlink(missing_ok=True)
+                draft_marker = None
+            elif draft_marker:
+                self.log(f"⚠ Some outputs are still the draft ({draft_marker.name} marks them)", "warning")
+            self.remember_job(result, speaker_embeddings, output_dir, output_name, settings["output_formats"])
+            
+            time_to_final = time.perf_counter() - job_start
+            if time_to_draft is not None:
+                self.log(f"⏱ Time to draft: {time_to_draft:.1f}s, time to final: {time_to_final:.1f}s")
             else:
-                output_name = audio_path.stem
-
-            self.log(f"Exporting to: {output_dir}")
-            
-            from whisperx.utils import get_writer
-            
-            exported_files = []
-            
-            for fmt in settings["output_formats"]:
-                if fmt == "all":
-                    for sub_fmt in ["txt", "srt", "vtt", "tsv", "json"]:
-                        output_file = output_dir / f"{output_name}.{sub_fmt}"
-                        try:
-                            writer = get_writer(sub_fmt, str(output_dir))
-                            writer(result, str(output_file.stem), {
-                                "max_line_width": None,
-                                "max_line_count": None,
-                                "highlight_words": False
-                            })
-                            exported_files.append(output_file)
-                            self.log(f"✓ Exported: {output_file.name}")
-                        except Exception as e:
-                            self.log(f"⚠ Failed to export {sub_fmt}: {e}", "warning")
-                    continue
-                
-                output_file = output_dir / f"{output_name}.{fmt}"
-                
-                try:
-                    writer = get_writer(fmt, str(output_dir))
-                    writer(result, str(output_file.stem), {
-                        "max_line_width": None,
-                        "max_line_count": None,
-                        "highlight_words": False
-                    })
-                    exported_files.append(output_file)
-                    self.log(f"✓ Exported: {output_file.name}")
-                    
-                except Exception as e:
-                    self.log(f"⚠ Failed to export {fmt}: {e}", "warning")
-                    import traceback
-                    self.log(f"  Details: {traceback.format_exc()}", "warning")
+                self.log(f"⏱ Time to final: {time_to_final:.1f}s")
+            self.record_throughput(settings, audio_duration, time_to_final)
 
             # Cleanup
             self.progress.stop()
@@ -915,24 +1707,23 @@ class MindscribeGUI:
             self.log(f"  Output: {output_dir}")
             self.log("="*60)
             
-            self.root.after(0, lambda: messagebox.showinfo(
-                "Success",
-                f"Transcription complete!\n\n"
-                f"Output: {output_dir}\n"
-                f"Files: {len(exported_files)}"
-            ))
-
-            # Cleanup memory
-            del model
-            if settings["diarize"]:
-                try:
-                    del diarize_model
-                except:
-                    pass
-            gc.collect()
-            torch.cuda.empty_cache()
+            if not settings.get("quiet"):
+                self.root.after(0, lambda: messagebox.showinfo(
+                    "Success",
+                    f"Transcription complete!\n\n"
+                    f"Output: {output_dir}\n"
+                    f"Files: {len(exported_files)}"
+                ))
 
         except Exception as e:
+            if draft_marker and draft_marker.exists():
+                self.log(f"⚠ Outputs are still the draft ({draft_marker.name} marks them) - "
+                         f"the file will be transcribed again", "warning")
+
+            if isinstance(e, JobCancelled) or self.cancel_event.is_set():
+                self.on_job_cancelled(audio_path)
+                return
+
             self.progress.stop()
             self.progress_var.set("Error!")
             self.log(f"✗ Error: {str(e)}", "error")
@@ -940,27 +1731,201 @@ class MindscribeGUI:
             import traceback
             self.log(f"Traceback:\n{traceback.format_exc()}", "error")
 
+            if not settings.get("quiet"):
+                self.root.after(0, lambda: messagebox.showerror(
+                    "Error", 
+                    f"Transcription failed:\n\n{str(e)}"
+                ))
+
+            self.track_temp_audio(audio_path)
+            self.cleanup_temp_files()
+
+        finally:
+            # Release the audio buffer on success, errors and cancellation
+            if audio is not None:
+                audio.close()
+                audio = None
+            self.root.after(0, lambda: self.cancel_button.config(state=tk.DISABLED))
+
+    def run_rediarization(self, settings):
+        """Relabel the cached transcript of this audio with new speaker bounds"""
+        audio = None
+        job_start = time.perf_counter()
+        
+        try:
+            self.progress.start()
+            self.temp_files.clear()
+            
+            self.progress_var.set("Preparing audio file...")
+            self.log("=" * 60)
+            self.log("Starting re-diarization...")
+            self.log("=" * 60)
+            
+            window = get_window(settings)
+            audio_path = Path(self.get_audio_file(settings["file"], settings.get("audio_track", "auto"), window,
+                                                  settings.get("source_cache_mb", 0)))
+            
+            # Downloads are only needed for this run
+            self.track_temp_audio(audio_path)
+            
+            audio = SharedAudio.load(audio_path, cancel=self.cancel_event)
+            audio_duration = audio.duration
+            self.check_cancelled()
+            
+            result, meta = self.worker.run(
+                audio,
+                settings,
+                task="rediarize",
+                on_log=self.log,
+                on_progress=self.progress_var.set,
+                cancel=self.cancel_event
+            )
+            audio.close()
+            audio = None
+            speaker_embeddings = result.pop("speaker_embeddings", None)
+            
+            if window and window[0] and settings.get("keep_timeline"):
+                shift_timestamps(result, window[0])
+            
+            if speaker_embeddings:
+                speaker_embeddings = self.apply_speaker_library(result, speaker_embeddings)
+            
+            # === EXPORT ===
+            self.progress_var.set("Exporting results...")
+            
+            output_dir = Path(settings["output_dir"])
+            output_dir.mkdir(parents=True, exist_ok=True)
+            output_name = self.make_output_name(settings["output_filename"], meta.get("output_name") or audio_path.stem)
+            
+            exported_files = self.export_result(result, output_dir, output_name, settings["output_formats"])
+            self.remember_job(result, speaker_embeddings, output_dir, output_name, settings["output_formats"])
+            self.record_throughput(settings, audio_duration, time.perf_counter() - job_start, task="rediarize")
+            
+            self.progress.stop()
+            self.progress_var.set("Complete!")
+            self.log("✓ Speaker labels updated!")
+            
+            self.root.after(0, lambda: messagebox.showinfo(
+                "Success",
+                f"Re-diarization complete!\n\n"
+                f"Output: {output_dir}\n"
+                f"Files: {len(exported_files)}"
+            ))
+        
+        except Exception as e:
+            if isinstance(e, JobCancelled) or self.cancel_event.is_set():
+                self.progress.stop()
+                self.progress_var.set("Cancelled")
+                self.log("⏹ Job cancelled", "warning")
+                return
+            
+            self.progress.stop()
+            self.progress_var.set("Error!")
+            self.log(f"✗ Error: {str(e)}", "error")
+            
             self.root.after(0, lambda: messagebox.showerror(
-                "Error", 
-                f"Transcription failed:\n\n{str(e)}"
+                "Error",
+                f"Re-diarization failed:\n\n{str(e)}"
             ))
+        
+        finally:
+            if audio is not None:
+                audio.close()
+                audio = None
+            self.root.after(0, self.cleanup_temp_files)
+            self.root.after(0, lambda: self.cancel_button.config(state=tk.DISABLED))
 
-            self.cleanup_temp_files()
+def load_headless_settings(args):
+    """Build job settings for headless modes from the saved GUI settings + CLI overrides"""
+    saved = {}
+    if SETTINGS_FILE.exists():
+        try:
+            with open(SETTINGS_FILE, 'r') as f:
+                saved = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load settings: {e}")
+
+    formats = [fmt for fmt, enabled in saved.get("formats", {"txt": True}).items() if enabled]
+
+    return {
+        "model": args.model or saved.get("model", "large-v2"),
+        "language": args.language if args.language is not None else saved.get("language", "de"),
+        "compute_type": saved.get("compute_type", "int8"),
+        "batch_size": int(saved.get("batch_size", "8")),
+        "output_dir": args.output_dir or saved.get("output_dir", "./_output"),
+        "output_formats": formats or ["txt"],
+        "preload_models": saved.get("preload_models", False)
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="mindscribe - Audio Transcription GUI based on WhisperX")
+    parser.add_argument("source", nargs="?", help="File or URL to prefill in the GUI")
+    parser.add_argument("--live", metavar="SOURCE",
+                        help="Live transcription without GUI: '-' for raw 16kHz mono s16le PCM on stdin, "
+                             "a FIFO with raw PCM, or any ffmpeg input (file, URL, capture device)")
+    parser.add_argument("--capture-format", metavar="FMT",
+                        help="ffmpeg input format for capture devices (e.g. dshow, pulse, avfoundation)")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Read file inputs at real-time pace (e.g. to measure live latency)")
+    parser.add_argument("--output-name", help="Output filename (without extension) for headless modes")
+    parser.add_argument("--output-dir", help="Override the output directory from the saved settings")
+    parser.add_argument("--model", help="Override the model from the saved settings")
+    parser.add_argument("--language", help="Override the language from the saved settings ('' = auto)")
+    parser.add_argument("--watch", metavar="DIR", action="append",
+                        help="Watch a folder and transcribe new recordings (can be given several times)")
+    return parser.parse_args(argv)
 
 def main():
-    if DND_AVAIL and len(sys.argv) > 1:
-        root = TkinterDnD.Tk()
-    elif DND_AVAIL:
+    args = parse_args()
+
+    # Models from the offline store, if one was populated and is complete (before any model is loaded)
+    store = ModelStore()
+    if store.exists:
+        try:
+            problems = store.verify(checksums=False)
+        except Exception as e:
+            problems = [str(e)]
+        if problems:
+            print(f"Warning: Model store incomplete ({len(problems)} problem(s), e.g. {problems[0]}) - not used, "
+                  f"run 'python model_store.py verify'")
+            store = None
+        else:
+            # The GUI's worker is switched offline per job (only if all of the job's models are in the store)
+            store.activate()
+
+    if args.live:
+        settings = load_headless_settings(args)
+        if store:
+            # Live transcription only loads the ASR model, in this process
+            model = asr_model(settings["model"], settings["compute_type"])
+            store.activate(offline=store.has(model))
+            if settings["preload_models"] and store.has(model):
+                size, seconds = store.warm([model])
+                print(f"Model store preloaded: {size / 1024**3:.2f} GB in {seconds:.1f}s")
+        from live_transcription import run_live
+        run_live(
+            args.live,
+            settings,
+            output_name=args.output_name,
+            capture_format=args.capture_format,
+            realtime=args.realtime
+        )
+        return
+
+    if DND_AVAIL:
         root = TkinterDnD.Tk()
     else:
         root = tk.Tk()
 
     app = MindscribeGUI(root)
     
-    if len(sys.argv) > 1:
-        app.file_entry.insert(0, sys.argv[1])
+    if args.source:
+        app.file_entry.insert(0, args.source)
         app.detect_url_type(None)
     
+    if args.watch:
+        app.start_watching(args.watch)
+    
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,341 @@
+"""
+Local model store for offline use.
+
+Keeps every model file the pipeline needs (faster-whisper, wav2vec2
+alignment, pyannote diarization) in one folder next to the app, with a
+manifest of sizes and SHA-256 checksums. Once the manifest exists the
+store is used instead of the Hugging Face/torch caches and no network
+lookups are made - no HuggingFace token needed for diarization either.
+The folder can be filled on a connected machine and copied to an
+air-gapped one. A job only runs fully offline if all of its models are in
+the store; other models are still fetched (into the store folder).
+
+    python model_store.py populate --model large-v2 --language de --hf-token hf_...
+    python model_store.py verify
+    python model_store.py warm
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+MODEL_STORE_DIR = Path(__file__).parent / "_models"
+MANIFEST_NAME = "manifest.json"
+
+# Set by ModelStore.activate - tells spawned worker processes which store is in use
+STORE_ENV = "MINDSCRIBE_MODEL_STORE"
+OFFLINE_ENV = ("HF_HUB_OFFLINE", "TRANSFORMERS_OFFLINE")
+
+DIARIZATION_MODEL = "diarization"
+
+# Files hashed at the same time (hashlib releases the GIL on large reads)
+HASH_WORKERS = 4
+READ_CHUNK = 8 * 1024 * 1024
+
+
+def _store_environment(root):
+    """Cache locations of all model loaders, redirected into the store"""
+    return {
+        "HF_HUB_CACHE": str(root / "hub"),       # faster-whisper, wav2vec2 (transformers), pyannote 3.1+
+        "TORCH_HOME": str(root / "torch"),       # torchaudio alignment bundles, silero VAD
+        "PYANNOTE_CACHE": str(root / "pyannote"),
+    }
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    buffer = bytearray(READ_CHUNK)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+    return digest.hexdigest()
+
+
+def _format_size(size):
+    return f"{size / 1024**3:.2f} GB" if size >= 1024**3 else f"{size / 1024**2:.0f} MB"
+
+
+def asr_model(model, compute_type):
+    return f"asr:{model}/{compute_type}"
+
+
+def align_model(language):
+    return f"align:{language}"
+
+
+def job_models(settings):
+    """
+    Store entries a job needs, or None if that isn't known up front
+    (an auto-detected language picks its alignment model at runtime).
+    """
+    models = [asr_model(settings["model"], settings["compute_type"])]
+    if settings.get("draft_model"):
+        models.append(asr_model(settings["draft_model"], settings["compute_type"]))
+    if not settings.get("language"):
+        return None
+    models.append(align_model(settings["language"]))
+    if settings.get("diarize"):
+        models.append(DIARIZATION_MODEL)
+    return models
+
+
+def active_store():
+    """The store activated for this process (inherited by spawned workers), or None"""
+    root = os.environ.get(STORE_ENV)
+    return ModelStore(root) if root else None
+
+
+def store_has(model):
+    """Whether the active store holds a model (then it's loaded without network lookups)"""
+    store = active_store()
+    return bool(store) and store.has(model)
+
+
+def job_offline(settings):
+    """Whether a job runs fully offline: a store is active and holds every model it needs"""
+    store = active_store()
+    return bool(store) and store.has_all(job_models(settings))
+
+
+def models_offline():
+    """The Hugging Face libraries of this process (and workers started now) only use local files"""
+    return os.environ.get("HF_HUB_OFFLINE") == "1"
+
+
+def set_offline(offline):
+    """Switch the Hugging Face libraries to cache-only (takes effect in processes started afterwards)"""
+    for name in OFFLINE_ENV:
+        if offline:
+            os.environ[name] = "1"
+        else:
+            os.environ.pop(name, None)
+
+
+class ModelStore:
+    """The store folder and its manifest ({relative path: size/sha256} + populated models)"""
+
+    def __init__(self, root=MODEL_STORE_DIR):
+        self.root = Path(root)
+        self.manifest_file = self.root / MANIFEST_NAME
+
+    @property
+    def exists(self):
+        return self.manifest_file.exists()
+
+    def load_manifest(self):
+        with open(self.manifest_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def has(self, model):
+        """Whether a model ('asr:large-v2/int8', 'align:de', 'diarization') was populated"""
+        return self.exists and model in self.load_manifest().get("models", [])
+
+    def has_all(self, models):
+        """Whether every model was populated (False for an unknown set - None)"""
+        if models is None or not self.exists:
+            return False
+        populated = set(self.load_manifest().get("models", []))
+        return all(model in populated for model in models)
+
+    def _model_files(self):
+        """Regular files in the store (HF cache symlinks point at blobs that are listed themselves)"""
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = Path(directory) / name
+                if path == self.manifest_file or path.is_symlink():
+                    continue
+                yield path
+
+    def _relative_files(self):
+        return {path.relative_to(self.root).as_posix() for path in self._model_files()}
+
+    def activate(self, offline=False):
+        """
+        Point all model loaders at the store (before any model library is imported -
+        spawned worker processes inherit the environment). Only go `offline` if
+        every model the process will load is in the store (see job_offline).
+        """
+        os.environ.update(_store_environment(self.root))
+        os.environ[STORE_ENV] = str(self.root)
+        set_offline(offline)
+
+    def populate(self, settings, hf_token=None, log=print):
+        """Download the models of `settings` into the store (through the normal loaders) and update the manifest"""
+        import pipeline
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.activate()
+        manifest = self.load_manifest() if self.exists else {"models": []}
+        models = set(manifest.get("models", []))
+        model_files = manifest.get("model_files", {})
+
+        def fetch(model, load):
+            # Files the loader added belong to this model (for warming single models)
+            before = self._relative_files()
+            load()
+            added = self._relative_files() - before
+            models.add(model)
+            model_files[model] = sorted(added | set(model_files.get(model, [])))
+
+        log(f"Fetching ASR model {settings['model']} ({settings['compute_type']})...")
+        fetch(asr_model(settings["model"], settings["compute_type"]), lambda: pipeline.load_asr_model(settings, "cpu"))
+
+        if settings.get("language"):
+            log(f"Fetching alignment model ({settings['language']})...")
+            fetch(align_model(settings["language"]), lambda: pipeline.load_align_model(settings["language"], "cpu"))
+
+        if hf_token:
+            log("Fetching diarization pipeline...")
+            fetch(DIARIZATION_MODEL, lambda: pipeline.load_diarization_pipeline(hf_token, "cpu"))
+
+        self.write_manifest(sorted(models), log=log, model_files=model_files)
+
+    def write_manifest(self, models, log=print, model_files=None):
+        """Hash every file in the store (`model_files`: {model: [relative paths]} for warm())"""
+        start = time.perf_counter()
+        paths = list(self._model_files())
+        with ThreadPoolExecutor(HASH_WORKERS) as pool:
+            hashes = list(pool.map(_hash_file, paths))
+
+        files = {
+            path.relative_to(self.root).as_posix(): {"size": path.stat().st_size, "sha256": digest}
+            for path, digest in zip(paths, hashes)
+        }
+        manifest = {
+            "version": 1,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "models": models,
+            "model_files": model_files or {},
+            "files": files,
+        }
+        tmp = self.manifest_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_file)
+
+        total = sum(entry["size"] for entry in files.values())
+        log(f"✓ Manifest written: {len(files)} files, {_format_size(total)} ({time.perf_counter() - start:.1f}s)")
+
+    def verify(self, checksums=True):
+        """
+        Compare the store with its manifest. Returns a list of problems (empty = ok).
+
+        Without `checksums` only presence and sizes are checked (instant).
+        """
+        files = self.load_manifest().get("files", {})
+        problems = []
+        to_hash = []
+
+        for name, entry in files.items():
+            path = self.root / name
+            try:
+                size = path.stat().st_size
+            except OSError:
+                problems.append(f"missing: {name}")
+                continue
+            if size != entry["size"]:
+                problems.append(f"size mismatch: {name}")
+            elif checksums:
+                to_hash.append((name, path))
+
+        with ThreadPoolExecutor(HASH_WORKERS) as pool:
+            for (name, _), digest in zip(to_hash, pool.map(_hash_file, [path for _, path in to_hash])):
+                if digest != files[name]["sha256"]:
+                    problems.append(f"checksum mismatch: {name}")
+
+        # Broken HF cache links (snapshot -> blob) make a model unloadable as well
+        for directory, _, names in os.walk(self.root):
+            for link in names:
+                path = Path(directory) / link
+                if path.is_symlink() and not path.exists():
+                    problems.append(f"broken link: {path.relative_to(self.root).as_posix()}")
+        return problems
+
+    def warm(self, models=None):
+        """
+        Read model files once, so the first load comes from the OS page cache. Returns (bytes, seconds).
+
+        With `models` only their files are read (nothing for models stored
+        before per-model files were recorded - run 'populate' again for them).
+        """
+        start = time.perf_counter()
+        total = 0
+        buffer = bytearray(READ_CHUNK)
+        if models is None:
+            paths = self._model_files()
+        else:
+            model_files = self.load_manifest().get("model_files", {})
+            paths = [self.root / name for model in models for name in model_files.get(model, [])]
+        for path in paths:
+            try:
+                with open(path, "rb", buffering=0) as f:
+                    while True:
+                        size = f.readinto(buffer)
+                        if not size:
+                            break
+                        total += size
+            except OSError:
+                continue
+        return total, time.perf_counter() - start
+
+    def summary(self):
+        files = self.load_manifest().get("files", {})
+        total = sum(entry["size"] for entry in files.values())
+        return f"{len(files)} files, {_format_size(total)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the offline model store")
+    parser.add_argument("--store", default=str(MODEL_STORE_DIR), help="Store folder (default: _models)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    populate = subparsers.add_parser("populate", help="Download models into the store and write the manifest")
+    populate.add_argument("--model", default="large-v2")
+    populate.add_argument("--compute-type", default="int8")
+    populate.add_argument("--language", default="de", help="Alignment model language ('' = none)")
+    populate.add_argument("--hf-token", help="HuggingFace token (fetches the diarization pipeline)")
+
+    verify = subparsers.add_parser("verify", help="Check the store against its manifest")
+    verify.add_argument("--quick", action="store_true", help="Only check presence and sizes")
+
+    subparsers.add_parser("warm", help="Read the store into the OS page cache")
+    subparsers.add_parser("rehash", help="Rewrite the manifest from the files in the store")
+
+    args = parser.parse_args()
+    store = ModelStore(args.store)
+
+    if args.command == "populate":
+        store.populate(
+            {"model": args.model, "compute_type": args.compute_type, "language": args.language},
+            hf_token=args.hf_token
+        )
+        return
+
+    if not store.exists:
+        parser.exit(1, f"No model store at {store.root} - run 'populate' first\n")
+
+    if args.command == "verify":
+        problems = store.verify(checksums=not args.quick)
+        for problem in problems:
+            print(f"✗ {problem}")
+        if problems:
+            parser.exit(1, f"{len(problems)} problem(s) found\n")
+        print(f"✓ Model store ok ({store.summary()})")
+    elif args.command == "warm":
+        size, seconds = store.warm()
+        print(f"✓ Read {_format_size(size)} in {seconds:.1f}s")
+    elif args.command == "rehash":
+        manifest = store.load_manifest()
+        store.write_manifest(manifest.get("models", []), model_files=manifest.get("model_files"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1495 @@
+"""
+Processing helpers for the WhisperX pipeline.
+
+Nothing in here touches tkinter, so the same code can be used by the GUI,
+the headless modes and background workers.
+"""
+import gc
+import hashlib
+import inspect
+import json
+import math
+import os
+import subprocess
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from model_store import align_model, asr_model, job_offline, store_has
+
+# Optional: psutil gives RSS on every platform, /proc is used as fallback on Linux
+try:
+    import psutil
+    PSUTIL_AVAIL = True
+except ImportError:
+    PSUTIL_AVAIL = False
+
+# Caches (diarization embeddings etc.) live next to the app
+CACHE_DIR = Path(__file__).parent / "_cache"
+
+# Minimum cosine similarity for two speaker embeddings to count as the same voice
+SPEAKER_MATCH_THRESHOLD = 0.5
+
+# Batch size cap for low-memory mode (ASR activations grow with the batch)
+LOW_MEMORY_BATCH_SIZE = 4
+
+# Segments per alignment model call (1 = whisperx's one-segment-at-a-time path).
+# Only used for models that can mask padding (see alignment_batch_size)
+ALIGN_BATCH_SIZE = 16
+
+# Waveforms handed around here are 16kHz mono; wav2vec2 needs at least 400 samples per input
+SAMPLE_RATE = 16000
+ALIGN_MIN_SAMPLES = 400
+
+# Recordings longer than this are diarized in overlapping chunks (0 = always single pass)
+DIARIZE_CHUNK_MINUTES = 30
+DIARIZE_CHUNK_OVERLAP = 30.0   # Seconds shared by neighbouring chunks
+
+# Silences at least this long are cut out before alignment and diarization
+SILENCE_MIN_SECONDS = 2.0
+SILENCE_PADDING = 0.25         # Seconds kept on both sides of each cut
+SILENCE_FRAME_SECONDS = 0.03   # Energy is measured per frame
+SILENCE_MARGIN_DB = 15.0       # Silence = this far above the noise floor / below loud speech
+SILENCE_MAX_DB = -40.0         # Frames louder than this (dBFS) always count as speech
+SILENCE_DIGITAL_DB = -90.0     # Frames below this are digital silence (ignored for the noise floor)
+
+
+class BackgroundTask:
+    """Run a function in a daemon thread and keep its result, error and duration"""
+
+    def __init__(self, name, func, *args, **kwargs):
+        self.name = name
+        self.result = None
+        self.error = None
+        self.duration = 0.0   # Time the task itself took
+        self.waited = 0.0     # Time the caller had to block in wait()
+        self.used = False     # Result was actually taken (not discarded)
+        self.thread = threading.Thread(
+            target=self._run, args=(func, args, kwargs), name=f"mindscribe-{name}", daemon=True
+        )
+        self.thread.start()
+
+    def _run(self, func, args, kwargs):
+        start = time.perf_counter()
+        try:
+            self.result = func(*args, **kwargs)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.duration = time.perf_counter() - start
+
+    def wait(self):
+        """Block until the task is done and return its result (re-raises errors)"""
+        start = time.perf_counter()
+        self.thread.join()
+        self.waited += time.perf_counter() - start
+        if self.error is not None:
+            raise self.error
+        self.used = True
+        return self.result
+
+    @property
+    def saved(self):
+        """Seconds of the task that overlapped with other work"""
+        return max(0.0, self.duration - self.waited)
+
+
+def load_diarization_pipeline(hf_token, device):
+    """Load the pyannote diarization pipeline through whisperx (no token needed offline)"""
+    from whisperx.diarize import DiarizationPipeline
+
+    return DiarizationPipeline(use_auth_token=hf_token or None, device=device)
+
+
+def _supports_embeddings(diarize_model):
+    """Whether the DiarizationPipeline can return speaker embeddings (older whisperx can't)"""
+    try:
+        return "return_embeddings" in inspect.signature(diarize_model.__call__).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _call_diarization(diarize_model, audio, min_speakers, max_speakers):
+    # Pass audio waveform, not path
+    if not _supports_embeddings(diarize_model):
+        return diarize_model(audio, min_speakers=min_speakers, max_speakers=max_speakers), None
+    return diarize_model(
+        audio,
+        min_speakers=min_speakers,
+        max_speakers=max_speakers,
+        return_embeddings=True
+    )
+
+
+def run_diarization(diarize_model, audio, min_speakers, max_speakers, cache=None, cancel=None,
+                    chunk_minutes=0, log=None):
+    """
+    Diarize a waveform with a loaded DiarizationPipeline (optionally through a DiarizationCache).
+
+    Audio longer than `chunk_minutes` is diarized in overlapping chunks
+    (see diarize_chunked, cached per chunk).
+    Returns (diarize_segments, speaker_embeddings) - the embeddings are one
+    vector per speaker label (None if the installed whisperx can't return them).
+    """
+    if chunk_minutes and len(audio) > chunk_minutes * 60 * SAMPLE_RATE:
+        return diarize_chunked(diarize_model, audio, min_speakers, max_speakers,
+                               chunk_minutes * 60, cache=cache, cancel=cancel, log=log)
+
+    restores = []
+    if cache:
+        restores.append(cache.attach(diarize_model))
+    if cancel is not None:
+        restores.append(attach_diarization_cancel_check(diarize_model, cancel))
+    try:
+        return _call_diarization(diarize_model, audio, min_speakers, max_speakers)
+    finally:
+        for restore in reversed(restores):
+            restore()
+
+
+def diarization_chunks(total, chunk, overlap):
+    """(start, end) sample ranges of equally long chunks covering `total` samples"""
+    if total <= chunk:
+        return [(0, total)]
+    count = math.ceil((total - overlap) / (chunk - overlap))
+    step = (total - overlap) / count
+    return [(int(i * step), min(total, int((i + 1) * step + overlap))) for i in range(count)]
+
+
+def _link_chunks(chunk_embeddings, threshold):
+    """Match each chunk's speakers to the global speakers so far, returns (mappings, sums, chunks)"""
+    sums = {}      # Global id -> sum of normalized member embeddings
+    chunks = {}    # Global id -> indices of the chunks it occurs in
+    mappings = []
+
+    for index, embeddings in enumerate(chunk_embeddings):
+        mapping = match_speakers(embeddings, sums, threshold)
+        for label, embedding in embeddings.items():
+            embedding = np.asarray(embedding, dtype=np.float32)
+            embedding = embedding / max(np.linalg.norm(embedding), 1e-8)
+            if label not in mapping:
+                mapping[label] = len(sums)
+                sums[mapping[label]] = np.zeros_like(embedding)
+                chunks[mapping[label]] = set()
+            sums[mapping[label]] = sums[mapping[label]] + embedding
+            chunks[mapping[label]].add(index)
+        mappings.append(mapping)
+    return mappings, sums, chunks
+
+
+def link_chunk_speakers(chunk_embeddings, min_speakers=None, max_speakers=None, threshold=SPEAKER_MATCH_THRESHOLD):
+    """
+    Give the speakers of independently diarized chunks global labels.
+
+    `chunk_embeddings` holds one {label: embedding} dict per chunk. Each
+    chunk's speakers are matched to the mean voice of the global speakers
+    found so far. If that leaves fewer than `min_speakers`, the linking is
+    repeated with a stricter threshold (the least similar links are split
+    first). If it leaves more than `max_speakers`, the most similar global
+    speakers that never occur in the same chunk are merged.
+
+    Returns ([{chunk label: global label} per chunk], {global label: embedding}).
+    """
+    mappings, sums, chunks = _link_chunks(chunk_embeddings, threshold)
+    while min_speakers and len(sums) < min_speakers and threshold < 1.0:
+        threshold = min(1.0, threshold + 0.05)
+        mappings, sums, chunks = _link_chunks(chunk_embeddings, threshold)
+
+    merged = {}    # Merged id -> id it was merged into
+    while max_speakers and len(sums) > max_speakers:
+        ids = list(sums)
+        similarity = cosine_similarity_matrix([sums[g] for g in ids], [sums[g] for g in ids])
+        for i, a in enumerate(ids):
+            for j, b in enumerate(ids):
+                if i == j or chunks[a] & chunks[b]:
+                    similarity[i, j] = -np.inf  # Same chunk: the diarization said they differ
+        if not np.isfinite(similarity).any():
+            break
+        i, j = np.unravel_index(np.argmax(similarity), similarity.shape)
+        keep, drop = ids[min(i, j)], ids[max(i, j)]
+        sums[keep] = sums[keep] + sums.pop(drop)
+        chunks[keep] |= chunks.pop(drop)
+        merged[drop] = keep
+
+    def resolve(g):
+        while g in merged:
+            g = merged[g]
+        return g
+
+    # SPEAKER_00, SPEAKER_01, ... in order of first appearance
+    names = {g: f"SPEAKER_{n:02d}" for n, g in enumerate(sorted(sums))}
+    mappings = [{label: names[resolve(g)] for label, g in mapping.items()} for mapping in mappings]
+    embeddings = {names[g]: (total / max(np.linalg.norm(total), 1e-8)).tolist() for g, total in sums.items()}
+    return mappings, embeddings
+
+
+def diarize_chunked(diarize_model, audio, min_speakers, max_speakers, chunk_seconds,
+                    overlap=DIARIZE_CHUNK_OVERLAP, cache=None, cancel=None, log=None):
+    """
+    Diarize long audio in overlapping chunks, so memory stays bounded by the chunk length.
+
+    Chunks are diarized one after another (the pipeline instance and its
+    patched methods aren't thread-safe), their speakers are linked by
+    embedding similarity and each overlap is split at its midpoint between
+    the two neighbouring chunks. With a `cache`, segmentation/embeddings
+    are cached per chunk (keyed by the chunk's samples) next to it.
+    """
+    import pandas as pd
+
+    log = log or (lambda message, level="info": None)
+    bounds = diarization_chunks(len(audio), int(chunk_seconds * SAMPLE_RATE), int(overlap * SAMPLE_RATE))
+    log(f"  Long audio: diarizing {len(bounds)} chunks of up to {chunk_seconds / 60:.0f} min")
+
+    results = []
+    cached = 0
+    for start, end in bounds:
+        check_cancelled(cancel)
+        chunk = audio[start:end]
+        restores = []
+        if cache:
+            chunk_cache = DiarizationCache(audio_fingerprint(chunk), root=cache.path.parent)
+            cached += chunk_cache.has_embeddings()
+            restores.append(chunk_cache.attach(diarize_model))
+        if cancel is not None:
+            restores.append(attach_diarization_cancel_check(diarize_model, cancel))
+        try:
+            # A chunk may hold fewer speakers than the whole recording - only the upper bound
+            # applies here, min_speakers is applied when linking
+            results.append(_call_diarization(diarize_model, chunk, None, max_speakers))
+        finally:
+            for restore in reversed(restores):
+                restore()
+
+    if cache:
+        log(f"  Cached chunk embeddings used for {cached} of {len(bounds)} chunks")
+
+    if any(embeddings is None for _, embeddings in results):
+        # Older whisperx without speaker embeddings - chunks can't be linked
+        log("⚠ Speaker embeddings unavailable - diarizing in a single pass", "warning")
+        return run_diarization(diarize_model, audio, min_speakers, max_speakers, cache=cache, cancel=cancel)
+
+    mappings, speaker_embeddings = link_chunk_speakers(
+        [embeddings for _, embeddings in results], min_speakers=min_speakers, max_speakers=max_speakers
+    )
+    log(f"  Linked {sum(len(m) for m in mappings)} chunk speakers to {len(speaker_embeddings)} speakers")
+
+    rows = []
+    for index, ((start, end), (segments, _)) in enumerate(zip(bounds, results)):
+        offset = start / SAMPLE_RATE
+        lower = (bounds[index - 1][1] + start) / 2 / SAMPLE_RATE if index > 0 else 0.0
+        upper = (bounds[index + 1][0] + end) / 2 / SAMPLE_RATE if index + 1 < len(bounds) else math.inf
+
+        for seg_start, seg_end, speaker in zip(segments["start"], segments["end"], segments["speaker"]):
+            seg_start = max(seg_start + offset, lower)
+            seg_end = min(seg_end + offset, upper)
+            if seg_end > seg_start:
+                rows.append({"start": seg_start, "end": seg_end, "speaker": mappings[index][speaker]})
+
+    return pd.DataFrame(rows, columns=["start", "end", "speaker"]), speaker_embeddings
+
+
+def audio_fingerprint(audio):
+    """Content hash of a decoded waveform (independent of file name and format)"""
+    return hashlib.sha1(memoryview(np.ascontiguousarray(audio))).hexdigest()
+
+
+def strip_speakers(result):
+    """Remove speaker labels, so a transcript can be assigned again"""
+    for segment in result.get("segments", []):
+        segment.pop("speaker", None)
+        for word in segment.get("words", []):
+            word.pop("speaker", None)
+    return result
+
+
+def _json_default(value):
+    # numpy scalars in whisperx results
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class DiarizationCache:
+    """
+    Per-audio cache of the expensive diarization steps.
+
+    Stores pyannote's segmentation and speaker embeddings plus the aligned
+    transcript. Changing min/max speakers then only re-runs the clustering,
+    and the transcript is relabelled without touching ASR.
+    """
+
+    VERSION = 1
+
+    def __init__(self, audio_key, root=None):
+        self.path = Path(root or CACHE_DIR / "diarization") / audio_key
+        self.embeddings_file = self.path / "embeddings.npz"
+        self.transcript_file = self.path / "transcript.json"
+
+    def has_embeddings(self):
+        return self.embeddings_file.exists()
+
+    def has_transcript(self):
+        return self.transcript_file.exists()
+
+    def save_transcript(self, result, **meta):
+        """Save the aligned transcript (before speaker assignment) and job metadata"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": self.VERSION,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "meta": meta,
+            "result": result,
+        }
+        tmp = self.transcript_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=_json_default)
+        os.replace(tmp, self.transcript_file)
+
+    def load_transcript(self):
+        """Returns (result, meta)"""
+        with open(self.transcript_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data["result"], data.get("meta", {})
+
+    def _load_embeddings(self):
+        from pyannote.core import SlidingWindow, SlidingWindowFeature
+
+        with np.load(self.embeddings_file) as data:
+            start, duration, step = data["window"]
+            segmentations = SlidingWindowFeature(
+                data["segmentations"],
+                SlidingWindow(start=float(start), duration=float(duration), step=float(step))
+            )
+            return segmentations, data["embeddings"]
+
+    def _save_embeddings(self, segmentations, embeddings):
+        self.path.mkdir(parents=True, exist_ok=True)
+        window = segmentations.sliding_window
+        tmp = self.path / "embeddings.tmp.npz"
+        np.savez_compressed(
+            tmp,
+            segmentations=segmentations.data,
+            window=np.array([window.start, window.duration, window.step]),
+            embeddings=embeddings
+        )
+        os.replace(tmp, self.embeddings_file)
+
+    def attach(self, diarize_model):
+        """
+        Route the pyannote pipeline's segmentation/embedding steps through the cache.
+
+        Returns a function that restores the original pipeline methods.
+        """
+        pipeline = diarize_model.model
+        original_segmentations = pipeline.get_segmentations
+        original_embeddings = pipeline.get_embeddings
+
+        cached = None
+        if self.has_embeddings():
+            try:
+                cached = self._load_embeddings()
+            except Exception:
+                cached = None  # Corrupt/incompatible cache - recompute
+
+        captured = {}
+
+        def get_segmentations(file, *args, **kwargs):
+            if cached is not None:
+                return cached[0]
+            captured["segmentations"] = original_segmentations(file, *args, **kwargs)
+            return captured["segmentations"]
+
+        def get_embeddings(file, *args, **kwargs):
+            if cached is not None:
+                return cached[1]
+            embeddings = original_embeddings(file, *args, **kwargs)
+            if "segmentations" in captured:
+                try:
+                    self._save_embeddings(captured["segmentations"], embeddings)
+                except Exception:
+                    pass  # Caching is best effort
+            return embeddings
+
+        pipeline.get_segmentations = get_segmentations
+        pipeline.get_embeddings = get_embeddings
+
+        def restore():
+            pipeline.get_segmentations = original_segmentations
+            pipeline.get_embeddings = original_embeddings
+
+        return restore
+
+
+def format_prefetch_report(tasks):
+    """One log line summarizing how much load time was hidden behind other work"""
+    # Discarded prefetches (e.g. align model for a different language) saved nothing
+    finished = [task for task in tasks if task.used]
+    if not finished:
+        return None
+
+    total = sum(task.saved for task in finished)
+    details = ", ".join(f"{task.name} {task.saved:.1f}s" for task in finished)
+    return f"⏱ Prefetch saved {total:.1f}s ({details})"
+
+
+def get_rss_mb():
+    """Resident memory of this process in MB, None if it can't be determined"""
+    if PSUTIL_AVAIL:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def release_memory():
+    """Give freed model memory back (Python heap + CUDA cache)"""
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+
+class MemoryLimitExceeded(MemoryError):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobStop:
+    """
+    A job's cancel event combined with its memory monitor and end of the job.
+
+    Counts as set when the job is cancelled, went over its memory limit
+    (check_cancelled then raises MemoryLimitExceeded) or has `ended` - its
+    background stages stop at their next check, also if the job failed.
+    """
+
+    def __init__(self, cancel, memory, ended=None):
+        self.cancel = cancel
+        self.memory = memory
+        self.ended = ended or threading.Event()
+
+    def is_set(self):
+        return ((self.cancel is not None and self.cancel.is_set())
+                or self.memory.exceeded is not None
+                or self.ended.is_set())
+
+
+def check_cancelled(cancel):
+    """Raise JobCancelled if the job's cancel event (threading/multiprocessing Event or JobStop) is set"""
+    if cancel is not None and cancel.is_set():
+        memory = getattr(cancel, "memory", None)
+        if memory is not None:
+            memory.check()
+        raise JobCancelled("Job cancelled")
+
+
+def run_ffmpeg(args, cancel=None, output=None, poll_interval=0.2):
+    """
+    Run `ffmpeg <args>`, stopping it as soon as `cancel` is set.
+
+    A cancelled (or otherwise interrupted) run deletes the partial `output` file
+    and raises JobCancelled; a failed one raises CalledProcessError with ffmpeg's stderr.
+    """
+    process = subprocess.Popen(['ffmpeg', '-nostdin', *args], stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors="replace")
+    try:
+        while True:
+            try:
+                # Keeps draining stderr, so a chatty ffmpeg never blocks on a full pipe
+                _, stderr = process.communicate(timeout=poll_interval)
+                break
+            except subprocess.TimeoutExpired:
+                check_cancelled(cancel)
+    except BaseException:
+        process.terminate()
+        try:
+            process.communicate(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+        if output is not None:
+            Path(output).unlink(missing_ok=True)
+        raise
+
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, process.args, stderr=stderr)
+
+
+def attach_cancel_check(model, cancel, method="forward"):
+    """
+    Check `cancel` before every call of `model.<method>` (called once per batch).
+
+    Only this instance is patched, so warm models stay usable after a cancelled
+    job. Returns a function that restores the original method.
+    """
+    if cancel is None or not hasattr(model, method):
+        return lambda: None
+
+    had_own = method in vars(model)
+    original = getattr(model, method)
+
+    def checked(*args, **kwargs):
+        check_cancelled(cancel)
+        return original(*args, **kwargs)
+
+    setattr(model, method, checked)
+
+    def restore():
+        if had_own:
+            setattr(model, method, original)
+        else:
+            delattr(model, method)
+
+    return restore
+
+
+def attach_diarization_cancel_check(diarize_model, cancel):
+    """
+    Check `cancel` in pyannote's progress hook (called per segmentation/embedding batch).
+
+    Returns a function that restores the original pipeline methods.
+    """
+    pipeline = diarize_model.model
+    originals = {name: getattr(pipeline, name) for name in ("get_segmentations", "get_embeddings")}
+
+    def with_cancel_hook(original):
+        def checked(file, *args, **kwargs):
+            check_cancelled(cancel)
+            hook = kwargs.get("hook")
+
+            def cancel_hook(*hook_args, **hook_kwargs):
+                check_cancelled(cancel)
+                if hook is not None:
+                    return hook(*hook_args, **hook_kwargs)
+
+            kwargs["hook"] = cancel_hook
+            return original(file, *args, **kwargs)
+        return checked
+
+    for name, original in originals.items():
+        setattr(pipeline, name, with_cancel_hook(original))
+
+    def restore():
+        for name, original in originals.items():
+            setattr(pipeline, name, original)
+
+    return restore
+
+
+class MemoryMonitor:
+    """
+    Samples the process RSS in a background thread and records the peak per stage.
+
+    With a limit set, the first sample over it trips the monitor: the job's
+    cancel checks (see JobStop) raise MemoryLimitExceeded at the next batch,
+    so the job stops instead of pushing the host into swap.
+    """
+
+    def __init__(self, limit_mb=None, interval=0.1):
+        self.limit_mb = limit_mb or None
+        self.interval = interval
+        self.peaks = {}          # Stage name -> peak RSS (MB)
+        self.current = None
+        self.exceeded = None     # (stage, rss) of the first violation
+        self._stop = threading.Event()
+        self._thread = None
+        self.available = get_rss_mb() is not None
+
+    def start(self):
+        if self.available:
+            self._thread = threading.Thread(target=self._sample, name="mindscribe-memory", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, check=False):
+        """Stop sampling; with `check` the last sample counts against the limit as well"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._record()
+        if check:
+            self.check()
+
+    def stage(self, name):
+        """Start a new stage (raises if the previous one broke the limit)"""
+        self._record()
+        self.check()
+        self.current = name
+        self._record()
+
+    def check(self):
+        if self.exceeded:
+            stage, rss = self.exceeded
+            raise MemoryLimitExceeded(
+                f"Memory limit of {self.limit_mb:.0f} MB exceeded during '{stage}' "
+                f"(peak {rss:.0f} MB). Try a smaller model, int8 or a smaller batch size."
+            )
+
+    def _record(self):
+        if not self.available or self.current is None:
+            return
+        rss = get_rss_mb()
+        if rss is None:
+            return
+        if rss > self.peaks.get(self.current, 0.0):
+            self.peaks[self.current] = rss
+        if self.limit_mb and rss > self.limit_mb and not self.exceeded:
+            self.exceeded = (self.current, rss)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._record()
+
+    def report(self):
+        """One log line with the peak RSS of every stage"""
+        if not self.peaks:
+            return None
+        details = ", ".join(f"{stage} {peak:.0f} MB" for stage, peak in self.peaks.items())
+        return f"📈 Peak memory per stage: {details}"
+
+
+def get_device():
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _warm_model(warm, slot, key, loader):
+    """Reuse the model in `warm[slot]` if it was loaded for `key`, else load (and keep) it"""
+    if warm is not None:
+        entry = warm.get(slot)
+        if entry and entry[0] == key:
+            return entry[1]
+        if entry:
+            warm.pop(slot, None)
+            release_memory()
+
+    model = loader()
+    if warm is not None:
+        warm[slot] = (key, model)
+    return model
+
+
+def load_asr_model(settings, device, warm=None):
+    import whisperx
+
+    # Draft passes use their own slot, so the main model stays loaded
+    slot = "draft" if settings.get("draft") else "asr"
+    key = (settings["model"], settings["compute_type"], device)
+    return _warm_model(warm, slot, key, lambda: whisperx.load_model(
+        settings["model"],
+        device,
+        compute_type=settings["compute_type"],
+        local_files_only=store_has(asr_model(settings["model"], settings["compute_type"]))
+    ))
+
+
+def load_align_model(language, device, warm=None):
+    import whisperx
+
+    kwargs = {}
+    # Older whisperx can't skip the hub lookup per model
+    if store_has(align_model(language)) and "model_cache_only" in inspect.signature(whisperx.load_align_model).parameters:
+        kwargs["model_cache_only"] = True
+    return _warm_model(warm, "align", (language, device), lambda: whisperx.load_align_model(
+        language_code=language,
+        device=device,
+        **kwargs
+    ))
+
+
+def load_diarize_model(hf_token, device, warm=None):
+    return _warm_model(warm, "diarize", (hf_token, device),
+                       lambda: load_diarization_pipeline(hf_token, device))
+
+
+def alignment_batch_size(model_a, metadata, batch_size):
+    """
+    Batch size alignment can actually use with this model.
+
+    Only Hugging Face wav2vec2 models with layer-norm feature extraction take
+    an attention mask, so padding doesn't change their output. Group-norm
+    models (e.g. torchaudio's WAV2VEC2_ASR_BASE_960H, whisperx's English
+    default) normalize over the padding as well - they run one segment at a time.
+    """
+    if batch_size <= 1 or metadata.get("type") != "huggingface":
+        return 1
+    if getattr(getattr(model_a, "config", None), "feat_extract_norm", None) != "layer":
+        return 1
+    return batch_size
+
+
+class PrecomputedEmissions:
+    """
+    Stand-in for a Hugging Face alignment model inside whisperx.align.
+
+    whisperx calls the model once per segment. The emissions are computed
+    beforehand in masked, padded batches (segments sorted by length, so
+    there is little padding) and looked up by the segment's waveform here.
+    Anything not precomputed goes to the real model.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.emissions = {}
+        self.hits = 0
+
+    @staticmethod
+    def key(waveform):
+        data = np.ascontiguousarray(waveform, dtype=np.float32)
+        return (data.size, hashlib.sha1(memoryview(data)).hexdigest())
+
+    def __call__(self, waveform, *args, **kwargs):
+        emission = None
+        if not args and kwargs.get("lengths") is None:
+            emission = self.emissions.pop(self.key(waveform.detach().cpu().numpy()), None)
+        if emission is None:
+            return self.model(waveform, *args, **kwargs)
+
+        self.hits += 1
+        return SimpleNamespace(logits=emission.unsqueeze(0))
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def precompute(self, waveforms, batch_size, device):
+        """Run the model on `waveforms` (1-D float32 arrays) in length-sorted padded batches"""
+        import torch
+
+        waveforms = sorted(waveforms, key=len)
+        for i in range(0, len(waveforms), batch_size):
+            chunk = waveforms[i:i + batch_size]
+            lengths = torch.tensor([len(w) for w in chunk])
+            batch = torch.zeros(len(chunk), int(lengths.max()))
+            for row, waveform in enumerate(chunk):
+                batch[row, :len(waveform)] = torch.from_numpy(waveform)
+
+            attention_mask = (torch.arange(batch.shape[1])[None, :] < lengths[:, None]).long()
+            with torch.inference_mode():
+                emissions = self.model(batch.to(device), attention_mask=attention_mask.to(device)).logits
+            frames = self.model._get_feat_extract_output_lengths(lengths)
+
+            emissions = emissions.cpu()
+            for row, waveform in enumerate(chunk):
+                self.emissions[self.key(waveform)] = emissions[row, :int(frames[row])].clone()
+
+
+def align_segments(segments, model_a, metadata, audio, device, batch_size=ALIGN_BATCH_SIZE):
+    """
+    whisperx.align with the alignment model run on batches of segments.
+
+    Padding is masked, so word timestamps match the per-segment path up to
+    float rounding (tests/test_alignment.py). Models that can't mask padding
+    and batch_size <= 1 use whisperx.align as is.
+    """
+    import whisperx
+
+    if alignment_batch_size(model_a, metadata, batch_size) <= 1:
+        return whisperx.align(segments, model_a, metadata, audio, device, return_char_alignments=False)
+
+    dictionary = metadata.get("dictionary", {})
+    waveforms = []
+    for segment in segments:
+        f1 = int(segment["start"] * SAMPLE_RATE)
+        f2 = int(segment["end"] * SAMPLE_RATE)
+        # Segments whisperx won't send to the model (too short / nothing alignable)
+        if f2 - f1 < ALIGN_MIN_SAMPLES or not any(c in dictionary for c in segment["text"].lower()):
+            continue
+        waveforms.append(np.ascontiguousarray(audio[f1:f2], dtype=np.float32))
+
+    model = PrecomputedEmissions(model_a)
+    model.precompute(waveforms, batch_size, device)
+    del waveforms
+
+    return whisperx.align(segments, model, metadata, audio, device, return_char_alignments=False)
+
+
+class OffsetMap:
+    """
+    Speech regions kept from a waveform, and the mapping between original
+    and compacted (silence removed) timestamps.
+
+    `regions` are sorted, non-overlapping (start, end) sample ranges.
+    """
+
+    def __init__(self, regions, total_samples):
+        self.regions = np.asarray(regions, dtype=np.int64).reshape(-1, 2)
+        self.total_samples = total_samples
+        self.lengths = self.regions[:, 1] - self.regions[:, 0]
+        self.original_starts = self.regions[:, 0]
+        self.compact_starts = np.concatenate([[0], np.cumsum(self.lengths)[:-1]])
+
+    @property
+    def kept_seconds(self):
+        return int(self.lengths.sum()) / SAMPLE_RATE
+
+    @property
+    def removed_seconds(self):
+        return self.total_samples / SAMPLE_RATE - self.kept_seconds
+
+    def compact(self, audio):
+        """Speech-only copy of the waveform"""
+        return np.concatenate([audio[start:end] for start, end in self.regions])
+
+    def to_compact(self, times):
+        """Original -> compacted seconds (times inside a cut land on the cut)"""
+        samples = np.asarray(times, dtype=np.float64) * SAMPLE_RATE
+        index = np.clip(np.searchsorted(self.original_starts, samples, side="right") - 1, 0, len(self.regions) - 1)
+        within = np.clip(samples - self.original_starts[index], 0, self.lengths[index])
+        return (self.compact_starts[index] + within) / SAMPLE_RATE
+
+    def to_original(self, times, end=False):
+        """
+        Compacted -> original seconds. A time exactly on a cut belongs to the
+        region after it, unless it's an `end` (then it closes the region before).
+        """
+        samples = np.asarray(times, dtype=np.float64) * SAMPLE_RATE
+        side = "left" if end else "right"
+        index = np.clip(np.searchsorted(self.compact_starts, samples, side=side) - 1, 0, len(self.regions) - 1)
+        return (self.original_starts[index] + samples - self.compact_starts[index]) / SAMPLE_RATE
+
+    def compact_segments(self, segments):
+        """Copies of transcript segments with compacted start/end"""
+        return [
+            dict(segment, start=float(self.to_compact(segment["start"])), end=float(self.to_compact(segment["end"])))
+            for segment in segments
+        ]
+
+    def restore_result(self, result):
+        """Map all segment/word timestamps of a result back to the original timeline (in place)"""
+        restored = set()  # word_segments usually holds the same dicts as segment["words"]
+
+        def restore(item):
+            if id(item) in restored:
+                return
+            restored.add(id(item))
+            if item.get("start") is not None:
+                item["start"] = round(float(self.to_original(item["start"])), 3)
+            if item.get("end") is not None:
+                item["end"] = round(float(self.to_original(item["end"], end=True)), 3)
+
+        for segment in result.get("segments", []):
+            restore(segment)
+            for word in segment.get("words", []):
+                restore(word)
+        for word in result.get("word_segments", []):
+            restore(word)
+        return result
+
+    def restore_diarization(self, diarize_segments):
+        """Diarization DataFrame with start/end on the original timeline"""
+        return diarize_segments.assign(
+            start=self.to_original(diarize_segments["start"].to_numpy()),
+            end=self.to_original(diarize_segments["end"].to_numpy(), end=True)
+        )
+
+    def report(self):
+        total = self.total_samples / SAMPLE_RATE
+        return (f"✂️ Silence stripped: {_format_seconds(self.removed_seconds)} of {_format_seconds(total)} "
+                f"({self.removed_seconds / total:.0%}) - alignment and diarization process "
+                f"{_format_seconds(self.kept_seconds)}")
+
+
+def _format_seconds(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+def detect_speech(audio, min_silence=SILENCE_MIN_SECONDS, padding=SILENCE_PADDING):
+    """
+    Energy-based pre-pass: an OffsetMap of the waveform without silences of
+    at least `min_silence` seconds, or None if there are none.
+
+    The threshold adapts to the recording (noise floor and loud speech), so
+    quiet recordings and continuous speech aren't cut up.
+    """
+    frame = int(SILENCE_FRAME_SECONDS * SAMPLE_RATE)
+    frames = len(audio) // frame
+    if frames < 2:
+        return None
+
+    blocks = np.asarray(audio[:frames * frame], dtype=np.float32).reshape(frames, frame)
+    energy = np.einsum("ij,ij->i", blocks, blocks) / frame   # Mean square without a squared copy
+    energy_db = 10 * np.log10(energy + 1e-10)
+
+    # Digital zeros (muted inputs, padding) would drag the noise floor far below the room noise
+    audible = energy_db[energy_db > SILENCE_DIGITAL_DB]
+    floor, loud = np.percentile(audible if audible.size else energy_db, [10, 90])
+    threshold = min(floor + SILENCE_MARGIN_DB, loud - SILENCE_MARGIN_DB, SILENCE_MAX_DB)
+    silent = np.concatenate([[False], energy_db <= threshold, [False]])
+
+    # Runs of silent frames: [starts, ends)
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+
+    pad = int(padding * SAMPLE_RATE)
+    min_frames = (min_silence + 2 * padding) / SILENCE_FRAME_SECONDS
+    regions = []
+    position = 0
+    for start, end in zip(starts, ends):
+        if end - start < min_frames:
+            continue
+        cut_start = start * frame + pad
+        cut_end = (len(audio) if end == frames else end * frame) - pad
+        if cut_start > position:
+            regions.append((position, cut_start))
+        position = cut_end
+
+    if not regions and position == 0:
+        return None
+    if position < len(audio):
+        regions.append((position, len(audio)))
+    if not regions:
+        return None  # Nothing but silence
+    return OffsetMap(regions, len(audio))
+
+
+def run_inference(audio, settings, log, progress, warm=None, cancel=None):
+    """
+    Transcribe, align and (optionally) diarize a 16kHz waveform.
+
+    `log(message, level)` and `progress(text)` report back to the caller.
+    Models in `warm` are reused between jobs; in low-memory mode nothing is
+    kept and every stage model is released as soon as the stage is done.
+    Setting the `cancel` event stops the job after the current batch
+    (raises JobCancelled). With settings["draft"] only the transcription
+    runs (segment timestamps, no alignment/diarization). With
+    settings["strip_silence"] alignment and diarization run on the audio
+    without long silences; their timestamps are mapped back.
+    """
+    import whisperx
+
+    low_memory = settings.get("low_memory", False)
+    draft = settings.get("draft", False)
+    memory = MemoryMonitor(settings.get("memory_limit_mb") if low_memory else None).start()
+    # Every cancel check (per batch) also stops the job once the memory limit is crossed,
+    # and stops background stages once the job is over
+    cancel = JobStop(cancel, memory)
+    models = {}     # Models of this job (released early in low-memory mode)
+    prefetch = []
+
+    if low_memory:
+        if warm:
+            warm.clear()
+            release_memory()
+        warm = None
+
+    try:
+        if low_memory:
+            limit = settings.get("memory_limit_mb")
+            log(f"🪶 Low-memory mode (limit: {f'{limit} MB' if limit else 'none'})")
+            if not memory.available:
+                log("⚠ Memory usage can't be measured (install psutil)", "warning")
+
+        # Load model
+        memory.stage("load model")
+        progress("Loading model...")
+        log(f"Loading model: {settings['model']}")
+
+        device = get_device()
+        start = time.perf_counter()
+        models["asr"] = load_asr_model(settings, device, warm)
+
+        log(f"✓ Model loaded on {device} ({time.perf_counter() - start:.1f}s)")
+        check_cancelled(cancel)
+
+        language = settings["language"] if settings["language"] else None
+
+        if not language:
+            # Early detection, so the dependent models can load during transcription
+            progress("Detecting language...")
+            language = models["asr"].detect_language(audio)
+            log(f"✓ Detected language: {language}")
+
+        # Without a token the pipeline only loads offline from the store (same check as the GUI)
+        diarize_enabled = settings["diarize"] and (settings["hf_token"] or job_offline(settings))
+        min_spk = settings.get("min_speakers", 1)
+        max_spk = settings.get("max_speakers", 2)
+
+        # Alignment and diarization only need the speech - cut out long silences
+        offsets = detect_speech(audio) if settings.get("strip_silence") and not draft else None
+        stage_audio = offsets.compact(audio) if offsets else audio
+        if offsets:
+            log(offsets.report())
+
+        # Segmentation/embeddings + transcript are cached per (stage) audio for fast re-diarization
+        diarize_cache = DiarizationCache(audio_fingerprint(stage_audio)) if diarize_enabled else None
+        parallel_diarization = settings.get("parallel_diarization") and not low_memory
+
+        # Long recordings are diarized in overlapping chunks (bounded memory)
+        chunking = {
+            "chunk_minutes": settings.get("diarize_chunk_minutes", DIARIZE_CHUNK_MINUTES),
+            "log": log,
+        }
+
+        # Prefetch alignment model and diarization pipeline while ASR runs
+        # (not in low-memory mode - there only one stage is loaded at a time)
+        align_task = None
+        diarize_task = None
+
+        if not low_memory and not draft:
+            align_task = BackgroundTask("align model", load_align_model, language, device, warm)
+            prefetch.append(align_task)
+
+            if diarize_enabled:
+                if parallel_diarization:
+                    # Diarization only needs the audio - run it alongside transcription
+                    diarize_task = BackgroundTask(
+                        "diarization",
+                        lambda: run_diarization(
+                            load_diarize_model(settings["hf_token"], device, warm),
+                            stage_audio, min_spk, max_spk, cache=diarize_cache, cancel=cancel, **chunking
+                        )
+                    )
+                else:
+                    diarize_task = BackgroundTask("diarization pipeline", load_diarize_model,
+                                                  settings["hf_token"], device, warm)
+                prefetch.append(diarize_task)
+
+        batch_size = settings["batch_size"]
+        if low_memory and batch_size > LOW_MEMORY_BATCH_SIZE:
+            batch_size = LOW_MEMORY_BATCH_SIZE
+            log(f"  Batch size reduced to {batch_size}")
+
+        # Transcribe
+        check_cancelled(cancel)
+        memory.stage("transcribe")
+        progress("Transcribing...")
+        log("Transcribing...")
+
+        restore = attach_cancel_check(models["asr"], cancel)
+        try:
+            result = models["asr"].transcribe(
+                audio,
+                batch_size=batch_size,
+                language=language
+            )
+        finally:
+            restore()
+
+        log(f"✓ Transcription complete")
+        log(f"  Language: {result.get('language', 'unknown')}")
+        log(f"  Segments: {len(result.get('segments', []))}")
+
+        if draft:
+            memory.stage("done")
+            memory.stop(check=True)
+            return result
+
+        if low_memory:
+            del models["asr"]
+            release_memory()
+
+        # Alignment
+        check_cancelled(cancel)
+        memory.stage("align")
+        progress("Aligning...")
+        log("Aligning timestamps...")
+
+        if align_task and result.get("language", language) == language:
+            models["align"] = align_task.wait()
+        else:
+            models["align"] = load_align_model(result["language"], device, warm)
+
+        align_batch_size = settings.get("align_batch_size", ALIGN_BATCH_SIZE)
+        if low_memory:
+            align_batch_size = min(align_batch_size, LOW_MEMORY_BATCH_SIZE)
+        align_batch_size = alignment_batch_size(*models["align"], align_batch_size)
+
+        segment_count = len(result["segments"])
+        start = time.perf_counter()
+        restore = attach_cancel_check(models["align"][0], cancel)
+        try:
+            result = align_segments(
+                offsets.compact_segments(result["segments"]) if offsets else result["segments"],
+                *models["align"],
+                stage_audio,
+                device,
+                batch_size=align_batch_size
+            )
+        finally:
+            restore()
+        elapsed = time.perf_counter() - start
+        if offsets:
+            offsets.restore_result(result)
+
+        log(f"✓ Alignment complete")
+        log(f"  {segment_count} segments in {elapsed:.1f}s "
+            f"({segment_count / max(elapsed, 1e-6):.1f} segments/s, batch size {align_batch_size})")
+
+        if diarize_cache:
+            try:
+                diarize_cache.save_transcript(
+                    result,
+                    source=settings.get("file"),
+                    output_name=settings.get("output_name")
+                )
+            except Exception as e:
+                log(f"⚠ Could not cache transcript: {e}", "warning")
+
+        if low_memory:
+            del models["align"]
+            release_memory()
+
+        # Diarization
+        if diarize_enabled:
+            check_cancelled(cancel)
+            memory.stage("diarize")
+            progress("Diarizing speakers...")
+            log(f"Diarizing speakers ({min_spk}-{max_spk})...")
+
+            try:
+                if parallel_diarization:
+                    diarize_segments, speaker_embeddings = diarize_task.wait()
+                else:
+                    if diarize_task:
+                        models["diarize"] = diarize_task.wait()
+                    else:
+                        models["diarize"] = load_diarize_model(settings["hf_token"], device, warm)
+                    diarize_segments, speaker_embeddings = run_diarization(
+                        models["diarize"], stage_audio, min_spk, max_spk, cache=diarize_cache, cancel=cancel, **chunking
+                    )
+
+                if offsets:
+                    diarize_segments = offsets.restore_diarization(diarize_segments)
+                result = whisperx.assign_word_speakers(diarize_segments, result)
+                if speaker_embeddings:
+                    # Kept with the result for speaker matching (removed before export)
+                    result["speaker_embeddings"] = speaker_embeddings
+                log("✓ Diarization complete")
+
+            except (MemoryError, JobCancelled):
+                raise
+            except Exception as e:
+                log(f"⚠ Diarization failed: {e}", "warning")
+                log("Continuing without speaker labels...")
+
+        report = format_prefetch_report(prefetch)
+        if report:
+            log(report)
+
+        memory.stage("done")
+        memory.stop(check=True)
+        return result
+
+    finally:
+        # Background stages (e.g. parallel diarization after an ASR error) stop at their next
+        # cancel check - wait for them, so the next job doesn't share a warm model with them
+        cancel.ended.set()
+        for task in prefetch:
+            task.thread.join()
+
+        # Release models on success and on errors (warm ones stay in `warm`)
+        prefetch.clear()
+        models.clear()
+        release_memory()
+
+        memory.stop()
+        report = memory.report()
+        if report:
+            log(report)
+
+
+def rediarize(audio, settings, log, progress, warm=None, cancel=None):
+    """
+    Relabel the cached transcript of `audio` with new speaker bounds (no ASR).
+
+    Returns (result, meta) - meta holds what the original job stored with it.
+    """
+    import whisperx
+
+    # The original job diarized the audio without silences if it stripped them
+    offsets = detect_speech(audio) if settings.get("strip_silence") else None
+    stage_audio = offsets.compact(audio) if offsets else audio
+    cache = DiarizationCache(audio_fingerprint(stage_audio))
+
+    if not cache.has_transcript() and offsets:
+        # Transcribed without silence stripping
+        offsets = None
+        stage_audio = audio
+        cache = DiarizationCache(audio_fingerprint(audio))
+
+    if not cache.has_transcript():
+        raise RuntimeError("No cached transcript for this audio.\nPlease run a full transcription with diarization first.")
+
+    result, meta = cache.load_transcript()
+    strip_speakers(result)
+    log(f"✓ Cached transcript found ({len(result.get('segments', []))} segments)")
+    if offsets:
+        log(offsets.report())
+
+    chunk_minutes = settings.get("diarize_chunk_minutes", DIARIZE_CHUNK_MINUTES)
+    if chunk_minutes and len(stage_audio) > chunk_minutes * 60 * SAMPLE_RATE:
+        log("Long audio: speaker embeddings are cached per chunk")
+    elif cache.has_embeddings():
+        log("✓ Using cached speaker embeddings")
+    else:
+        log("No cached embeddings yet - computing them once...")
+
+    min_spk = settings.get("min_speakers", 1)
+    max_spk = settings.get("max_speakers", 2)
+    progress("Diarizing speakers...")
+    log(f"Diarizing speakers ({min_spk}-{max_spk})...")
+
+    start = time.perf_counter()
+    diarize_model = load_diarize_model(settings["hf_token"], get_device(), warm)
+    try:
+        diarize_segments, speaker_embeddings = run_diarization(
+            diarize_model, stage_audio, min_spk, max_spk, cache=cache, cancel=cancel,
+            chunk_minutes=chunk_minutes, log=log
+        )
+    finally:
+        diarize_model = None
+        release_memory()
+
+    if offsets:
+        diarize_segments = offsets.restore_diarization(diarize_segments)
+    result = whisperx.assign_word_speakers(diarize_segments, result)
+    if speaker_embeddings:
+        result["speaker_embeddings"] = speaker_embeddings
+    log(f"✓ Re-diarization complete ({time.perf_counter() - start:.1f}s)")
+
+    return result, meta
+
+
+def shift_timestamps(result, offset):
+    """Move all segment/word timestamps by `offset` seconds (in place)"""
+    shifted = set()  # word_segments usually holds the same dicts as segment["words"]
+
+    def shift(item):
+        if id(item) in shifted:
+            return
+        shifted.add(id(item))
+        for key in ("start", "end"):
+            if item.get(key) is not None:
+                item[key] = round(item[key] + offset, 3)
+
+    for segment in result.get("segments", []):
+        shift(segment)
+        for word in segment.get("words", []):
+            shift(word)
+    for word in result.get("word_segments", []):
+        shift(word)
+    return result
+
+
+def cosine_similarity_matrix(a, b):
+    """Pairwise cosine similarity of the rows of `a` (n x d) and `b` (m x d)"""
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-8)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-8)
+    return a @ b.T
+
+
+def match_speakers(new_embeddings, known_embeddings, threshold=SPEAKER_MATCH_THRESHOLD):
+    """
+    Map new speaker labels to known ones by voice similarity.
+
+    Both arguments are {label: embedding}. Pairs are assigned one-to-one,
+    most similar first; labels without a match above `threshold` are left out.
+    """
+    if not new_embeddings or not known_embeddings:
+        return {}
+
+    new_labels = list(new_embeddings)
+    known_labels = list(known_embeddings)
+    similarity = cosine_similarity_matrix(
+        [new_embeddings[label] for label in new_labels],
+        [known_embeddings[label] for label in known_labels]
+    )
+
+    mapping = {}
+    used = set()
+    for flat in np.argsort(similarity, axis=None)[::-1]:
+        i, j = np.unravel_index(flat, similarity.shape)
+        if similarity[i, j] < threshold:
+            break
+        if new_labels[i] in mapping or known_labels[j] in used:
+            continue
+        mapping[new_labels[i]] = known_labels[j]
+        used.add(known_labels[j])
+    return mapping
+
+
+def relabel_speakers(result, mapping):
+    """Rename speaker labels in segments and words (in place)"""
+    for segment in result.get("segments", []):
+        if segment.get("speaker") in mapping:
+            segment["speaker"] = mapping[segment["speaker"]]
+        for word in segment.get("words", []):
+            if word.get("speaker") in mapping:
+                word["speaker"] = mapping[word["speaker"]]
+    return result
+
+
+class IncrementalState:
+    """
+    Remembers what was already transcribed from a (growing) local recording.
+
+    The state file next to the outputs stores the source size, a hash of its
+    content, the merged transcript and the speaker embeddings. If the source
+    has only grown since then (same prefix), the next run transcribes just the
+    tail from the last stable segment boundary and merges it.
+    """
+
+    VERSION = 1
+    # Container headers (e.g. WAV/RIFF sizes) are rewritten while recording
+    HEADER_SKIP = 64 * 1024
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.data = None
+        self.resume_at = None
+
+    @classmethod
+    def hash_prefix(cls, source, size):
+        digest = hashlib.sha1()
+        with open(source, "rb") as f:
+            f.seek(min(cls.HEADER_SKIP, size))
+            remaining = size - f.tell()
+            while remaining > 0:
+                chunk = f.read(min(1024 * 1024, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    def snapshot(cls, source):
+        """(size, prefix hash) of the source - taken before it is converted, so growth during the job isn't lost"""
+        size = Path(source).stat().st_size
+        return size, cls.hash_prefix(source, size)
+
+    @staticmethod
+    def signature(settings):
+        """Settings that must be unchanged for results to be merged"""
+        return {
+            "model": settings.get("model"),
+            "language": settings.get("language"),
+            "diarize": bool(settings.get("diarize")),
+            "audio_track": settings.get("audio_track", "auto"),
+        }
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != self.VERSION:
+            return False
+        self.data = data
+        return True
+
+    def check(self, source, settings):
+        """
+        Compare the source with the saved state.
+
+        Returns "new" (process everything), "unchanged" (nothing to do) or
+        "append" (self.resume_at is set to the stable boundary).
+        """
+        self.resume_at = None
+        if not self.load():
+            return "new"
+
+        source = Path(source)
+        size = source.stat().st_size
+        data = self.data
+
+        if data.get("source") != str(source.resolve()) or data.get("signature") != self.signature(settings):
+            return "new"
+        if size < data["size"] or self.hash_prefix(source, data["size"]) != data["prefix_hash"]:
+            return "new"
+        if size == data["size"]:
+            return "unchanged"
+
+        self.resume_at = data["stable_end"]
+        return "append"
+
+    def merge(self, tail_result, tail_embeddings):
+        """
+        Merge the transcript of the new tail (already on the original timeline)
+        into the saved one. Tail speakers are mapped to known ones by voice.
+        Returns (result, speaker_embeddings).
+        """
+        old = self.data["result"]
+        known = {label: np.asarray(vector) for label, vector in (self.data.get("speaker_embeddings") or {}).items()}
+        tail_embeddings = tail_embeddings or {}
+
+        mapping = match_speakers(tail_embeddings, known)
+
+        # Unmatched tail speakers get fresh labels after the known ones
+        next_index = len(known)
+        for label in sorted(tail_embeddings):
+            if label not in mapping:
+                while f"SPEAKER_{next_index:02d}" in known:
+                    next_index += 1
+                mapping[label] = f"SPEAKER_{next_index:02d}"
+                next_index += 1
+
+        # Without embeddings keep the tail labels unchanged (nothing to compare)
+        relabel_speakers(tail_result, mapping)
+
+        merged = dict(old)
+        merged["segments"] = [
+            segment for segment in old.get("segments", []) if segment["start"] < self.resume_at
+        ] + tail_result.get("segments", [])
+        merged["word_segments"] = [
+            word for segment in merged["segments"] for word in segment.get("words", [])
+        ]
+
+        embeddings = {label: vector.tolist() for label, vector in known.items()}
+        for tail_label, label in mapping.items():
+            embeddings.setdefault(label, list(tail_embeddings[tail_label]))
+
+        return merged, embeddings
+
+    def save(self, source, result, speaker_embeddings, processed_until, settings, snapshot=None):
+        """
+        Store the merged transcript; the last segment may be incomplete and is redone next time.
+
+        `snapshot` is the source's (size, prefix hash) from before the audio
+        was read (see snapshot()), taken now if not given.
+        """
+        source = Path(source)
+        size, prefix_hash = snapshot or self.snapshot(source)
+        segments = result.get("segments", [])
+
+        if segments:
+            stable_end = segments[-1]["start"]
+        else:
+            stable_end = max(0.0, processed_until - 5.0)
+
+        data = {
+            "version": self.VERSION,
+            "source": str(source.resolve()),
+            "size": size,
+            "prefix_hash": prefix_hash,
+            "signature": self.signature(settings),
+            "processed_until": processed_until,
+            "stable_end": stable_end,
+            "speaker_embeddings": speaker_embeddings or {},
+            "result": result,
+        }
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=_json_default)
+        os.replace(tmp, self.path)
+        self.data = data
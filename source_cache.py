@@ -0,0 +1,311 @@
+"""
+Download cache for URL and YouTube sources.
+
+Fetched media is kept under _cache/sources, keyed by URL (or YouTube video
+ID), together with the ETag/Last-Modified/Cache-Control values of the
+response. Repeat jobs use the cached copy without any network access while
+it is fresh, and revalidate it with a conditional GET (304 = keep) after
+that. The cache is capped in size and evicts the least recently used files.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+import requests
+
+from pipeline import CACHE_DIR
+
+# Default size cap of the source cache
+SOURCE_CACHE_MAX_MB = 5000
+
+# Freshness for responses without Cache-Control/Expires and without Last-Modified
+DEFAULT_MAX_AGE = 24 * 3600
+
+YOUTUBE_ID_PATTERN = re.compile(
+    r"(?:youtu\.be/|youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/|v/))([A-Za-z0-9_-]{11})"
+)
+
+
+def youtube_video_id(url):
+    """Video ID of a YouTube URL (without network access), None if it can't be parsed"""
+    match = YOUTUBE_ID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def parse_cache_control(value):
+    """'max-age=60, no-cache' -> {'max-age': '60', 'no-cache': ''}"""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"')
+    return directives
+
+
+def _parse_http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_lifetime(headers, now=None):
+    """
+    Seconds a response may be used without revalidation (RFC 9111 style).
+
+    Returns None if the response must not be stored at all.
+    """
+    now = now or time.time()
+    directives = parse_cache_control(headers.get("Cache-Control"))
+
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+    if directives.get("max-age", "").isdigit():
+        return int(directives["max-age"])
+
+    expires = _parse_http_date(headers.get("Expires"))
+    if expires is not None:
+        return max(0, int(expires - (_parse_http_date(headers.get("Date")) or now)))
+
+    last_modified = _parse_http_date(headers.get("Last-Modified"))
+    if last_modified is not None:
+        # Heuristic: 10% of the time since the last change
+        return max(0, int((now - last_modified) / 10))
+
+    return DEFAULT_MAX_AGE
+
+
+class SourceCache:
+    """
+    LRU cache of downloaded source media.
+
+    index.json maps each key to its file, validators and usage times. Files
+    are written atomically, so an interrupted download never shows up as a
+    cache entry.
+    """
+
+    VERSION = 1
+    _lock = threading.Lock()  # Index updates from GUI and background threads
+
+    def __init__(self, root=None, max_mb=SOURCE_CACHE_MAX_MB, log=None):
+        self.root = Path(root or CACHE_DIR / "sources")
+        self.index_file = self.root / "index.json"
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.log = log or (lambda message, level="info": None)
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @staticmethod
+    def url_key(url):
+        return hashlib.sha1(url.split("#")[0].encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def youtube_key(video_id):
+        return f"youtube-{video_id}"
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != self.VERSION:
+            return {}
+        return data.get("entries", {})
+
+    def _save_index(self, entries):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "entries": entries}, f, indent=2)
+        os.replace(tmp, self.index_file)
+
+    def _entry(self, key):
+        """Index entry of `key` if its file still exists"""
+        with self._lock:
+            entry = self._load_index().get(key)
+        if entry and (self.root / entry["file"]).exists():
+            return entry
+        return None
+
+    def _store(self, key, entry):
+        """Add/update an entry, mark it as used and evict old entries over the size cap"""
+        with self._lock:
+            entries = self._load_index()
+            entry["last_used"] = time.time()
+            entries[key] = entry
+
+            total = sum(e.get("size", 0) for e in entries.values())
+            for old_key, old in sorted(entries.items(), key=lambda item: item[1].get("last_used", 0)):
+                if total <= self.max_bytes:
+                    break
+                if old_key == key:
+                    continue
+                try:
+                    (self.root / old["file"]).unlink()
+                except FileNotFoundError:
+                    pass
+                total -= old.get("size", 0)
+                del entries[old_key]
+                self.log(f"🗑️ Evicted cached source: {old.get('name', old['file'])}")
+
+            self._save_index(entries)
+
+    def lookup(self, url):
+        """Cached file of a URL/YouTube source, or None (no network access)"""
+        if not self.enabled:
+            return None
+        video_id = youtube_video_id(url)
+        entry = self._entry(self.youtube_key(video_id) if video_id else self.url_key(url))
+        return self.root / entry["file"] if entry else None
+
+    def duration(self, url):
+        """Duration of a cached YouTube source from its yt-dlp metadata, or None"""
+        video_id = youtube_video_id(url)
+        entry = self._entry(self.youtube_key(video_id)) if video_id and self.enabled else None
+        return entry.get("duration") if entry else None
+
+    def fetch_url(self, url, progress=None, should_cancel=None):
+        """
+        Return (path, cached) for a local copy of `url`, downloading or
+        revalidating it if needed. `cached` is False if the server forbids
+        storing the response - the caller then owns (and deletes) the file.
+
+        `progress(percent)` is called while downloading, `should_cancel()` is
+        checked between chunks. Falls back to a stale copy if the server
+        can't be reached.
+        """
+        key = self.url_key(url)
+        entry = self._entry(key)
+        now = time.time()
+
+        if entry and now < entry["fetched"] + entry["max_age"]:
+            self.log(f"✓ Using cached source (fresh for {int(entry['fetched'] + entry['max_age'] - now)}s)")
+            self._store(key, entry)
+            return self.root / entry["file"], True
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = requests.get(url, stream=True, headers=headers, timeout=30)
+        except requests.RequestException as e:
+            if entry:
+                self.log(f"⚠ Could not revalidate cached source ({e}), using cached copy", "warning")
+                self._store(key, entry)
+                return self.root / entry["file"], True
+            raise
+
+        with response:
+            if response.status_code == 304 and entry:
+                entry["fetched"] = now
+                if "Cache-Control" in response.headers or "Expires" in response.headers:
+                    entry["max_age"] = freshness_lifetime(response.headers, now) or 0
+                entry["etag"] = response.headers.get("ETag", entry.get("etag"))
+                self.log("✓ Cached source is up to date (304 Not Modified)")
+                self._store(key, entry)
+                return self.root / entry["file"], True
+
+            response.raise_for_status()
+
+            max_age = freshness_lifetime(response.headers, now)
+            name = url.split("/")[-1].split("?")[0] or "source"
+            file_name = f"{key}{Path(name).suffix.lower()}"
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self.root / f"{file_name}.part"
+
+            total_size = int(response.headers.get("content-length", 0))
+            downloaded = 0
+            try:
+                with open(tmp, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=1024 * 1024):
+                        if should_cancel:
+                            should_cancel()
+                        f.write(chunk)
+                        downloaded += len(chunk)
+                        if total_size and progress:
+                            progress(downloaded / total_size * 100)
+                os.replace(tmp, self.root / file_name)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+
+        if max_age is None:
+            # no-store: hand out this copy once, but don't index it
+            self.log("Server forbids caching (no-store) - source is not kept")
+            return self.root / file_name, False
+
+        self._store(key, {
+            "file": file_name,
+            "name": name,
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched": now,
+            "max_age": max_age,
+            "size": downloaded,
+        })
+        return self.root / file_name, True
+
+    def fetch_youtube(self, url, should_cancel=None):
+        """
+        Return a local copy of the best audio stream of a YouTube video.
+
+        Videos are immutable per ID, so a cached copy is used without any
+        network access.
+        """
+        import yt_dlp
+
+        video_id = youtube_video_id(url)
+        if video_id:
+            entry = self._entry(self.youtube_key(video_id))
+            if entry:
+                self.log(f"✓ Using cached YouTube audio: {entry.get('name', video_id)}")
+                self._store(self.youtube_key(video_id), entry)
+                return self.root / entry["file"]
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        ydl_opts = {
+            'format': 'bestaudio[ext=m4a]/bestaudio/best',
+            'outtmpl': str(self.root / 'youtube-%(id)s.part.%(ext)s'),
+            'quiet': True,
+            'no_warnings': True,
+        }
+        if should_cancel:
+            ydl_opts['progress_hooks'] = [lambda status: should_cancel()]
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            try:
+                info = ydl.extract_info(url, download=True)
+            except BaseException:
+                for partial in self.root.glob(f"youtube-{video_id or '*'}.part.*"):
+                    partial.unlink()
+                raise
+            downloaded = Path(ydl.prepare_filename(info))
+
+        key = self.youtube_key(info["id"])
+        file_name = f"{key}{downloaded.suffix}"
+        os.replace(downloaded, self.root / file_name)
+
+        self._store(key, {
+            "file": file_name,
+            "name": info.get("title") or info["id"],
+            "url": url,
+            "duration": info.get("duration"),
+            "fetched": time.time(),
+            "size": (self.root / file_name).stat().st_size,
+        })
+        return self.root / file_name
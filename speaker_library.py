@@ -0,0 +1,114 @@
+"""
+Library of enrolled speakers.
+
+Keeps one voice embedding (the mean of all enrollments) per named person
+and recognizes them in new recordings: the diarization's speaker
+embeddings are compared with the whole library in a single matrix
+product, so thousands of enrolled speakers take milliseconds.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+
+from pipeline import SPEAKER_MATCH_THRESHOLD
+
+# Enrolled voices live next to the app (not in _cache - they are user data)
+LIBRARY_FILE = Path(__file__).parent / "speaker_library.npz"
+
+
+def _normalize(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-8)
+
+
+class SpeakerLibrary:
+    """Names + unit-length mean embeddings (one row per person)"""
+
+    def __init__(self, path=LIBRARY_FILE):
+        self.path = Path(path)
+        self.names = []
+        self.embeddings = None   # (speakers, dim) float32, rows normalized
+        self.counts = None       # Enrollments averaged into each row
+
+    @classmethod
+    def load(cls, path=LIBRARY_FILE):
+        library = cls(path)
+        if library.path.exists():
+            with np.load(library.path) as data:
+                library.names = [str(name) for name in data["names"]]
+                library.embeddings = data["embeddings"].astype(np.float32)
+                library.counts = data["counts"].astype(np.int64)
+        return library
+
+    def save(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, names=np.array(self.names), embeddings=self.embeddings, counts=self.counts)
+        os.replace(tmp, self.path)
+
+    def __len__(self):
+        return len(self.names)
+
+    def enroll(self, name, embedding):
+        """Add a person, or move their voice towards a new recording of them"""
+        vector = _normalize(embedding)
+        if name in self.names:
+            index = self.names.index(name)
+            count = self.counts[index]
+            self.embeddings[index] = _normalize(self.embeddings[index] * count + vector[0])[0]
+            self.counts[index] = count + 1
+        elif self.embeddings is None:
+            self.names = [name]
+            self.embeddings = vector
+            self.counts = np.ones(1, dtype=np.int64)
+        else:
+            if vector.shape[1] != self.embeddings.shape[1]:
+                raise ValueError(f"Embedding size {vector.shape[1]} doesn't match the library "
+                                 f"({self.embeddings.shape[1]}) - different diarization model?")
+            self.names.append(name)
+            self.embeddings = np.vstack([self.embeddings, vector])
+            self.counts = np.append(self.counts, 1)
+
+    def remove(self, name):
+        index = self.names.index(name)
+        del self.names[index]
+        self.embeddings = np.delete(self.embeddings, index, axis=0)
+        self.counts = np.delete(self.counts, index)
+        if not self.names:
+            self.embeddings = self.counts = None
+
+    def match(self, speaker_embeddings, threshold=SPEAKER_MATCH_THRESHOLD):
+        """
+        Recognize the speakers of a recording ({label: embedding}).
+
+        Returns {label: (name, similarity)} - one-to-one, most similar pairs
+        first; labels without an enrolled voice above `threshold` are left out.
+        """
+        if not self.names or not speaker_embeddings:
+            return {}
+
+        labels = list(speaker_embeddings)
+        queries = _normalize([speaker_embeddings[label] for label in labels])
+        if queries.shape[1] != self.embeddings.shape[1]:
+            return {}
+        similarity = queries @ self.embeddings.T   # (labels, library)
+
+        # Only the best few candidates per label can win - keeps the sort small
+        top = min(len(labels), len(self.names))
+        candidates = np.argpartition(-similarity, top - 1, axis=1)[:, :top]
+        pairs = sorted(
+            ((similarity[i, j], i, j) for i in range(len(labels)) for j in candidates[i]),
+            reverse=True
+        )
+
+        matches = {}
+        used = set()
+        for score, i, j in pairs:
+            if score < threshold:
+                break
+            if labels[i] in matches or j in used:
+                continue
+            matches[labels[i]] = (self.names[j], float(score))
+            used.add(j)
+        return matches
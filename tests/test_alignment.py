@@ -0,0 +1,86 @@
+import os
+import sys
+import types
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from pipeline import SAMPLE_RATE, align_segments, alignment_batch_size
+
+# Language of the Hugging Face (layer-norm) alignment model used for the equivalence test
+ALIGN_TEST_LANGUAGE = os.environ.get("MINDSCRIBE_TEST_ALIGN_LANGUAGE", "nl")
+
+# One emission frame of wav2vec2 (20ms)
+FRAME_SECONDS = 0.02
+
+
+def hf_model(feat_extract_norm):
+    return SimpleNamespace(config=SimpleNamespace(feat_extract_norm=feat_extract_norm))
+
+
+def test_only_layer_norm_hf_models_are_batched():
+    assert alignment_batch_size(hf_model("layer"), {"type": "huggingface"}, 16) == 16
+    assert alignment_batch_size(hf_model("group"), {"type": "huggingface"}, 16) == 1
+    assert alignment_batch_size(object(), {"type": "torchaudio"}, 16) == 1
+    assert alignment_batch_size(hf_model("layer"), {"type": "huggingface"}, 1) == 1
+
+
+@pytest.mark.parametrize("model, metadata", [
+    (hf_model("group"), {"type": "huggingface", "dictionary": {"a": 1}}),
+    (object(), {"type": "torchaudio", "dictionary": {"a": 1}}),
+])
+def test_models_without_padding_mask_use_whisperx_align(monkeypatch, model, metadata):
+    calls = []
+    whisperx = types.ModuleType("whisperx")
+    whisperx.align = lambda segments, model_a, *args, **kwargs: calls.append(model_a) or {"segments": segments}
+    monkeypatch.setitem(sys.modules, "whisperx", whisperx)
+
+    segments = [{"start": 0.0, "end": 1.0, "text": "a"}]
+    align_segments(segments, model, metadata, np.zeros(SAMPLE_RATE, np.float32), "cpu", batch_size=16)
+
+    assert calls == [model]
+
+
+def speechlike_audio(seconds, seed=0):
+    """Deterministic amplitude-modulated noise (the comparison doesn't need real speech)"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    return (0.2 * envelope * rng.standard_normal(t.size)).astype(np.float32)
+
+
+def word_times(result):
+    return [(word.get("start"), word.get("end")) for segment in result["segments"] for word in segment.get("words", [])]
+
+
+def test_batched_word_times_match_whisperx_align():
+    whisperx = pytest.importorskip("whisperx")
+    pytest.importorskip("torch")
+    try:
+        model_a, metadata = whisperx.load_align_model(language_code=ALIGN_TEST_LANGUAGE, device="cpu")
+    except Exception as e:
+        pytest.skip(f"Alignment model not available: {e}")
+    if alignment_batch_size(model_a, metadata, 8) == 1:
+        pytest.skip(f"Alignment model for '{ALIGN_TEST_LANGUAGE}' isn't batched")
+
+    audio = speechlike_audio(60)
+    texts = ["een twee drie", "vier", "vijf zes zeven acht negen", "tien elf", "twaalf dertien veertien"]
+    segments = []
+    start = 0.5
+    for i, text in enumerate(texts * 3):
+        length = 1.5 + (i % 4) * 1.3   # Different lengths, so batches are padded
+        segments.append({"start": start, "end": start + length, "text": text})
+        start += length + 0.4
+
+    expected = whisperx.align([dict(s) for s in segments], model_a, metadata, audio, "cpu", return_char_alignments=False)
+    for batch_size in (2, 8):
+        actual = align_segments([dict(s) for s in segments], model_a, metadata, audio, "cpu", batch_size=batch_size)
+        expected_times, actual_times = word_times(expected), word_times(actual)
+        assert len(actual_times) == len(expected_times)
+        for expected_word, actual_word in zip(expected_times, actual_times):
+            for expected_time, actual_time in zip(expected_word, actual_word):
+                if expected_time is None:
+                    assert actual_time is None
+                else:
+                    assert actual_time == pytest.approx(expected_time, abs=FRAME_SECONDS)
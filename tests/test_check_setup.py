@@ -0,0 +1,30 @@
+import pytest
+
+import check_setup
+import model_store
+from model_store import ModelStore
+
+
+@pytest.fixture
+def environment(tmp_path, monkeypatch):
+    # activate() changes os.environ - set through monkeypatch first, so it's restored afterwards
+    for name in (model_store.STORE_ENV, "HF_HUB_CACHE", "TORCH_HOME", "PYANNOTE_CACHE") + model_store.OFFLINE_ENV:
+        monkeypatch.setenv(name, "")
+        monkeypatch.delenv(name)
+    monkeypatch.setenv("HF_HOME", str(tmp_path / "hf"))
+    monkeypatch.setattr(check_setup, "PROFILE_FILE", str(tmp_path / "capabilities.json"))
+
+
+def test_profile_still_matches_with_the_model_store_active(environment, tmp_path):
+    check_setup.save_capability_profile({"version": check_setup.PROFILE_VERSION,
+                                         "fingerprint": check_setup.environment_fingerprint()})
+
+    ModelStore(tmp_path / "store").activate()
+    assert check_setup.load_capability_profile() is not None
+
+
+def test_write_reuses_a_current_profile(environment, monkeypatch):
+    profile = {"cpu": {"cores": 4, "simd": []}, "ram_mb": None, "models": []}
+    monkeypatch.setattr(check_setup, "refresh_capability_profile", lambda: pytest.fail("profile rebuilt"))
+
+    check_setup.write_capability_profile(profile)
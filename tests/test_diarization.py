@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import pipeline
+from pipeline import SAMPLE_RATE, link_chunk_speakers, run_diarization
+
+# Amplitude level of each speaker's one-second blocks in the fixture
+SPEAKER_LEVELS = {0.1: 0, 0.2: 1, 0.3: 2}
+
+
+class FakePyannote:
+    def get_segmentations(self, file, *args, **kwargs):
+        return None
+
+    def get_embeddings(self, file, *args, **kwargs):
+        return None
+
+
+class FakeDiarizeModel:
+    """
+    Deterministic stand-in for whisperx's DiarizationPipeline.
+
+    The fixture audio is built from one-second blocks whose level identifies
+    the speaker; labels are numbered by first appearance like pyannote's.
+    """
+
+    def __init__(self):
+        self.model = FakePyannote()
+        self.calls = []
+
+    def __call__(self, audio, min_speakers=None, max_speakers=None, return_embeddings=False):
+        self.calls.append(len(audio))
+        rows, labels, embeddings = [], {}, {}
+        for start in range(0, len(audio), SAMPLE_RATE):
+            block = audio[start:start + SAMPLE_RATE]
+            speaker = SPEAKER_LEVELS[round(float(block.mean()), 1)]
+            label = labels.setdefault(speaker, f"SPEAKER_{len(labels):02d}")
+            embeddings[label] = np.eye(len(SPEAKER_LEVELS))[speaker].tolist()
+            rows.append({"start": start / SAMPLE_RATE, "end": (start + len(block)) / SAMPLE_RATE, "speaker": label})
+        return pd.DataFrame(rows, columns=["start", "end", "speaker"]), embeddings
+
+
+def fixture_audio(speakers):
+    levels = {speaker: level for level, speaker in SPEAKER_LEVELS.items()}
+    noise = 0.01 * np.random.default_rng(0).standard_normal(len(speakers) * SAMPLE_RATE)
+    return (np.repeat([levels[s] for s in speakers], SAMPLE_RATE) + noise).astype(np.float32)
+
+
+def speaker_at(segments, second):
+    for start, end, speaker in zip(segments["start"], segments["end"], segments["speaker"]):
+        if start <= second < end:
+            return speaker
+    return None
+
+
+def test_chunked_labels_match_single_pass():
+    # Speaker 2 only shows up in the last chunk, speaker 1 in two of them
+    speakers = [0] * 40 + [1] * 30 + [0] * 50 + [1] * 20 + [2] * 40
+    audio = fixture_audio(speakers)
+
+    single, _ = run_diarization(FakeDiarizeModel(), audio, 1, 3)
+    model = FakeDiarizeModel()
+    chunked, embeddings = run_diarization(model, audio, 1, 3, chunk_minutes=1)
+
+    assert len(model.calls) > 1
+    assert len(embeddings) == 3
+    for second in range(len(speakers)):
+        assert speaker_at(chunked, second + 0.5) == speaker_at(single, second + 0.5)
+
+
+def test_chunks_are_cached_individually(monkeypatch, tmp_path):
+    attached = []
+
+    def attach(self, diarize_model):
+        attached.append(self.path)
+        return lambda: None
+
+    monkeypatch.setattr(pipeline.DiarizationCache, "attach", attach)
+    audio = fixture_audio([0] * 100 + [1] * 100)
+    cache = pipeline.DiarizationCache(pipeline.audio_fingerprint(audio), root=tmp_path)
+    model = FakeDiarizeModel()
+
+    run_diarization(model, audio, 1, 2, cache=cache, chunk_minutes=1)
+
+    assert len(attached) == len(model.calls) > 1
+    assert len(set(attached)) == len(attached)
+    assert all(path.parent == tmp_path for path in attached)
+
+
+def test_link_applies_min_speakers():
+    # Two similar voices, each alone in its chunk - linked as one unless two are required
+    a = [1.0, 0.0]
+    b = [0.7, 0.714]
+    chunks = [{"SPEAKER_00": a}, {"SPEAKER_00": b}]
+
+    _, embeddings = link_chunk_speakers(chunks)
+    assert len(embeddings) == 1
+
+    mappings, embeddings = link_chunk_speakers(chunks, min_speakers=2)
+    assert len(embeddings) == 2
+    assert mappings == [{"SPEAKER_00": "SPEAKER_00"}, {"SPEAKER_00": "SPEAKER_01"}]
+
+
+def test_link_applies_max_speakers():
+    chunks = [{"SPEAKER_00": [1.0, 0.0]}, {"SPEAKER_00": [0.0, 1.0]}]
+
+    _, embeddings = link_chunk_speakers(chunks, max_speakers=1)
+    assert len(embeddings) == 1
+
+
+@pytest.mark.parametrize("min_speakers", [None, 1])
+def test_min_speakers_never_splits_a_chunk_speaker(min_speakers):
+    chunks = [{"SPEAKER_00": [1.0, 0.0], "SPEAKER_01": [0.0, 1.0]}, {"SPEAKER_00": [0.0, 1.0]}]
+
+    mappings, embeddings = link_chunk_speakers(chunks, min_speakers=min_speakers)
+    assert len(embeddings) == 2
+    assert mappings[1] == {"SPEAKER_00": "SPEAKER_01"}
@@ -0,0 +1,86 @@
+from pipeline import IncrementalState
+
+SETTINGS = {"model": "large-v2", "language": "de", "diarize": True, "audio_track": "auto"}
+
+
+def recording(path, size, seed=1):
+    path.write_bytes(bytes((seed * i) % 251 for i in range(size)))
+    return path
+
+
+def grow(path, extra):
+    with open(path, "ab") as f:
+        f.write(b"\x07" * extra)
+
+
+def saved_state(tmp_path, source, snapshot=None, segments=None):
+    state = IncrementalState(tmp_path / "out" / ".rec.mindscribe.json")
+    result = {"segments": segments or [{"start": 0.0, "end": 4.0, "text": "a", "speaker": "SPEAKER_00"},
+                                       {"start": 5.0, "end": 9.0, "text": "b", "speaker": "SPEAKER_01"}]}
+    state.save(source, result, {"SPEAKER_00": [1.0, 0.0], "SPEAKER_01": [0.0, 1.0]}, 10.0, SETTINGS,
+               snapshot=snapshot)
+    return IncrementalState(state.path)
+
+
+def test_check_without_state_is_new(tmp_path):
+    source = recording(tmp_path / "rec.wav", 200_000)
+    assert IncrementalState(tmp_path / "missing.json").check(source, SETTINGS) == "new"
+
+
+def test_check_unchanged_and_append(tmp_path):
+    source = recording(tmp_path / "rec.wav", 200_000)
+    state = saved_state(tmp_path, source)
+    assert state.check(source, SETTINGS) == "unchanged"
+
+    grow(source, 50_000)
+    assert state.check(source, SETTINGS) == "append"
+    assert state.resume_at == 5.0  # Start of the last (possibly incomplete) segment
+
+
+def test_check_detects_rewritten_source_and_changed_settings(tmp_path):
+    source = recording(tmp_path / "rec.wav", 200_000)
+    state = saved_state(tmp_path, source)
+    assert state.check(source, dict(SETTINGS, model="medium")) == "new"
+
+    recording(source, 250_000, seed=3)  # Longer, but a different prefix
+    assert state.check(source, SETTINGS) == "new"
+
+
+def test_growth_during_the_job_is_not_lost(tmp_path):
+    source = recording(tmp_path / "rec.wav", 200_000)
+    snapshot = IncrementalState.snapshot(source)   # Before the audio was decoded
+    grow(source, 50_000)                           # Still recording while transcribing
+
+    state = saved_state(tmp_path, source, snapshot=snapshot)
+    assert state.check(source, SETTINGS) == "append"
+
+
+def test_merge_maps_tail_speakers_by_voice(tmp_path):
+    source = recording(tmp_path / "rec.wav", 200_000)
+    state = saved_state(tmp_path, source)
+    grow(source, 50_000)
+    assert state.check(source, SETTINGS) == "append"
+
+    tail = {"segments": [
+        {"start": 5.0, "end": 9.5, "text": "b!", "speaker": "SPEAKER_00",
+         "words": [{"word": "b!", "start": 5.0, "end": 9.5, "speaker": "SPEAKER_00"}]},
+        {"start": 10.0, "end": 12.0, "text": "c", "speaker": "SPEAKER_01"},
+    ]}
+    # Tail SPEAKER_00 is the known SPEAKER_01, tail SPEAKER_01 is new
+    merged, embeddings = state.merge(tail, {"SPEAKER_00": [0.1, 0.99], "SPEAKER_01": [-1.0, 0.0]})
+
+    assert [s["text"] for s in merged["segments"]] == ["a", "b!", "c"]
+    assert [s["speaker"] for s in merged["segments"]] == ["SPEAKER_00", "SPEAKER_01", "SPEAKER_02"]
+    assert merged["word_segments"] == [{"word": "b!", "start": 5.0, "end": 9.5, "speaker": "SPEAKER_01"}]
+    assert set(embeddings) == {"SPEAKER_00", "SPEAKER_01", "SPEAKER_02"}
+    assert embeddings["SPEAKER_01"] == [0.0, 1.0]  # Known voices keep their stored embedding
+
+
+def test_merge_without_embeddings_keeps_tail_labels(tmp_path):
+    source = recording(tmp_path / "rec.wav", 200_000)
+    state = saved_state(tmp_path, source)
+    grow(source, 50_000)
+    state.check(source, SETTINGS)
+
+    merged, _ = state.merge({"segments": [{"start": 6.0, "end": 8.0, "text": "x", "speaker": "SPEAKER_00"}]}, None)
+    assert [s["speaker"] for s in merged["segments"]] == ["SPEAKER_00", "SPEAKER_00"]
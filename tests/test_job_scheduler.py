@@ -0,0 +1,53 @@
+import threading
+import time
+
+from job_scheduler import JobScheduler
+
+
+def test_shortest_predicted_job_first():
+    scheduler = JobScheduler(aging_rate=0)
+    scheduler.put("long", 600)
+    scheduler.put("unknown")  # Ranked like the average known job
+    scheduler.put("medium", 100)
+    scheduler.put("short", 10)
+
+    assert [scheduler.get() for _ in range(2)] == ["short", "medium"]
+
+
+def test_pending_jobs_hold_back_the_queue_until_probed():
+    scheduler = JobScheduler(aging_rate=0, probe_wait=5)
+    long_job = scheduler.put("long", pending=True)
+    short_job = scheduler.put("short", pending=True)
+
+    taken = []
+    runner = threading.Thread(target=lambda: taken.append(scheduler.get()))
+    runner.start()
+
+    scheduler.update(long_job, 600)
+    time.sleep(0.1)
+    assert not taken  # "short" is still being probed
+
+    scheduler.update(short_job, 10)
+    runner.join(timeout=1)
+    assert taken == ["short"]
+    assert scheduler.get() == "long"
+
+
+def test_slow_probe_holds_back_the_queue_only_for_a_while():
+    scheduler = JobScheduler(aging_rate=0, probe_wait=0.2)
+    scheduler.put("stuck", pending=True)
+    scheduler.put("long", 1000)
+    scheduler.put("known", 10)
+
+    start = time.monotonic()
+    assert scheduler.get() == "known"
+    assert time.monotonic() - start >= 0.15
+
+
+def test_update_after_the_job_left_is_ignored():
+    scheduler = JobScheduler(probe_wait=0)
+    ticket = scheduler.put("job", pending=True)
+    assert scheduler.get() == "job"
+
+    scheduler.update(ticket, 10)
+    assert len(scheduler) == 0
@@ -0,0 +1,91 @@
+import sys
+import time
+import types
+
+import numpy as np
+import pytest
+
+import pipeline
+from pipeline import JobStop, MemoryLimitExceeded, MemoryMonitor, check_cancelled, get_rss_mb
+
+pytestmark = pytest.mark.skipif(get_rss_mb() is None, reason="RSS can't be measured here")
+
+MODEL_MB = 200
+
+
+class FakeModel:
+    """Stands in for a stage model: holds MODEL_MB of touched memory"""
+
+    def __init__(self):
+        self.weights = np.ones(MODEL_MB * 1024 * 1024 // 8)
+
+    def transcribe(self, audio, batch_size=8, language=None):
+        return {"segments": [{"start": 0.0, "end": len(audio) / 16000, "text": "hallo"}], "language": language}
+
+
+def fake_whisperx():
+    module = types.ModuleType("whisperx")
+    module.load_model = lambda *args, **kwargs: FakeModel()
+    module.load_align_model = lambda language_code, device: (FakeModel(), {"type": "fake"})
+    module.align = lambda segments, model, metadata, audio, device, return_char_alignments=False: {
+        "segments": segments, "word_segments": []
+    }
+    return module
+
+
+@pytest.fixture
+def monitors(monkeypatch):
+    """Run run_inference with fake models and collect its memory monitors"""
+    created = []
+
+    class RecordingMonitor(MemoryMonitor):
+        def __init__(self, *args, **kwargs):
+            kwargs["interval"] = 0.01
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setitem(sys.modules, "whisperx", fake_whisperx())
+    monkeypatch.setattr(pipeline, "get_device", lambda: "cpu")
+    monkeypatch.setattr(pipeline, "MemoryMonitor", RecordingMonitor)
+    return created
+
+
+def run(**settings):
+    settings = dict(model="tiny", compute_type="int8", language="de", batch_size=4,
+                    diarize=False, hf_token="", align_batch_size=1, **settings)
+    return pipeline.run_inference(np.zeros(16000 * 5, np.float32), settings, lambda *args: None, lambda text: None)
+
+
+def test_low_memory_mode_lowers_alignment_peak(monitors):
+    run(low_memory=False)
+    run(low_memory=True)
+    normal, low = monitors
+
+    # The ASR model is released before the alignment model is loaded
+    assert low.peaks["align"] < normal.peaks["align"] - MODEL_MB / 2
+
+
+def test_limit_trips_cancel_checks_while_a_stage_runs():
+    monitor = MemoryMonitor(limit_mb=get_rss_mb() + MODEL_MB / 2, interval=0.01).start()
+    monitor.stage("transcribe")
+    stop = JobStop(None, monitor)
+    try:
+        weights = np.ones(MODEL_MB * 1024 * 1024 // 8)
+        deadline = time.monotonic() + 2
+        while not stop.is_set() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with pytest.raises(MemoryLimitExceeded):
+            check_cancelled(stop)
+        del weights
+    finally:
+        monitor.stop()
+
+
+def test_limit_stops_a_job_over_the_ceiling(monitors):
+    with pytest.raises(MemoryLimitExceeded):
+        run(low_memory=True, memory_limit_mb=int(get_rss_mb() + MODEL_MB / 2))
+
+
+def test_job_under_the_ceiling_finishes(monitors):
+    result = run(low_memory=True, memory_limit_mb=int(get_rss_mb() + MODEL_MB * 4))
+    assert result["segments"]
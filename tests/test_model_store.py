@@ -0,0 +1,76 @@
+import json
+import os
+
+import pytest
+
+import model_store
+from model_store import ModelStore, active_store, job_models, job_offline, store_has
+
+JOB = {"model": "large-v2", "compute_type": "int8", "language": "de", "diarize": True, "draft_model": ""}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # activate() changes os.environ - set through monkeypatch first, so it's restored afterwards
+    for name in (model_store.STORE_ENV, "HF_HUB_CACHE", "TORCH_HOME", "PYANNOTE_CACHE") + model_store.OFFLINE_ENV:
+        monkeypatch.setenv(name, "")
+        monkeypatch.delenv(name)
+    store = ModelStore(tmp_path)
+    store.manifest_file.write_text(json.dumps({"models": ["asr:large-v2/int8", "align:de"], "files": {}}))
+    return store
+
+
+def test_job_models():
+    assert job_models(JOB) == ["asr:large-v2/int8", "align:de", "diarization"]
+    assert job_models(dict(JOB, diarize=False, draft_model="tiny")) == ["asr:large-v2/int8", "asr:tiny/int8", "align:de"]
+    assert job_models(dict(JOB, language="")) is None  # Alignment model depends on the detected language
+
+
+def test_activate_stays_online(store):
+    store.activate()
+    assert active_store().root == store.root
+    assert "HF_HUB_OFFLINE" not in os.environ
+    assert store_has("asr:large-v2/int8")
+    assert not store_has("asr:medium/int8")
+
+
+def test_job_offline_only_if_all_models_are_in_the_store(store):
+    assert not job_offline(dict(JOB, diarize=False))  # Not activated
+
+    store.activate()
+    assert job_offline(dict(JOB, diarize=False))
+    assert not job_offline(JOB)                                   # Diarization missing
+    assert not job_offline(dict(JOB, diarize=False, model="medium"))
+    assert not job_offline(dict(JOB, diarize=False, language=""))
+
+
+def test_set_offline(store):
+    store.activate(offline=True)
+    assert model_store.models_offline()
+    model_store.set_offline(False)
+    assert not model_store.models_offline()
+    assert "TRANSFORMERS_OFFLINE" not in os.environ
+
+
+def test_populate_records_files_per_model_and_warm_reads_only_those(store, monkeypatch):
+    import pipeline
+
+    def fake_loader(name, size):
+        def load(*args, **kwargs):
+            path = store.root / "hub" / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x" * size)
+        return load
+
+    monkeypatch.setattr(pipeline, "load_asr_model", fake_loader("asr.bin", 1000))
+    monkeypatch.setattr(pipeline, "load_align_model", fake_loader("align.bin", 300))
+    store.populate({"model": "tiny", "compute_type": "int8", "language": "nl"}, log=lambda message: None)
+
+    manifest = store.load_manifest()
+    assert manifest["model_files"]["asr:tiny/int8"] == ["hub/asr.bin"]
+    assert manifest["model_files"]["align:nl"] == ["hub/align.bin"]
+    assert store.has_all(["asr:tiny/int8", "align:nl", "asr:large-v2/int8"])  # Earlier entries are kept
+
+    assert store.warm(["asr:tiny/int8"])[0] == 1000
+    assert store.warm(["asr:large-v2/int8"])[0] == 0   # Stored without a file list
+    assert store.warm()[0] == 1300
@@ -0,0 +1,71 @@
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pipeline
+
+
+class FailingAsr:
+    """Fails once the diarization thread is running"""
+
+    def __init__(self, diarization_running):
+        self.diarization_running = diarization_running
+
+    def transcribe(self, audio, batch_size=8, language=None):
+        self.diarization_running.wait(5)
+        raise RuntimeError("ASR failed")
+
+
+class SlowPyannote:
+    """Runs until its progress hook raises (the job's cancel check)"""
+
+    def __init__(self):
+        self.running = threading.Event()
+        self.stopped = threading.Event()
+
+    def get_segmentations(self, file, hook=None, **kwargs):
+        self.running.set()
+        try:
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                if hook is not None:
+                    hook("segmentation", None, completed=0, total=1)
+                time.sleep(0.01)
+        finally:
+            self.stopped.set()
+
+    def get_embeddings(self, file, *args, **kwargs):
+        return None
+
+
+class SlowDiarizeModel:
+    def __init__(self):
+        self.model = SlowPyannote()
+
+    def __call__(self, audio, min_speakers=None, max_speakers=None, return_embeddings=False):
+        self.model.get_segmentations(audio)
+        return pd.DataFrame(columns=["start", "end", "speaker"]), {}
+
+
+def test_parallel_diarization_stops_when_the_job_fails(monkeypatch, tmp_path):
+    diarize_model = SlowDiarizeModel()
+    whisperx = types.ModuleType("whisperx")
+    whisperx.load_model = lambda *args, **kwargs: FailingAsr(diarize_model.model.running)
+    whisperx.load_align_model = lambda language_code, device: (object(), {"type": "fake"})
+    monkeypatch.setitem(sys.modules, "whisperx", whisperx)
+    monkeypatch.setattr(pipeline, "get_device", lambda: "cpu")
+    monkeypatch.setattr(pipeline, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(pipeline, "load_diarize_model", lambda *args: diarize_model)
+
+    settings = dict(model="tiny", compute_type="int8", language="de", batch_size=4, diarize=True,
+                    hf_token="hf_x", parallel_diarization=True, min_speakers=1, max_speakers=2)
+    with pytest.raises(RuntimeError, match="ASR failed"):
+        pipeline.run_inference(np.zeros(16000 * 5, np.float32), settings, lambda *args: None, lambda text: None)
+
+    # Joined before run_inference returned - nothing still runs on the shared pipeline
+    assert diarize_model.model.stopped.is_set()
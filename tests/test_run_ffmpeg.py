@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from pipeline import JobCancelled, run_ffmpeg
+
+# Stand-in for ffmpeg: writes its output file, floods stderr, then hangs
+FAKE_FFMPEG = """#!{python}
+import sys, time
+open(sys.argv[-1], "wb").write(b"partial")
+sys.stderr.write("frame=1\\n" * 100000)
+sys.stderr.flush()
+if "--fail" in sys.argv:
+    sys.exit(1)
+time.sleep(60)
+"""
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    if os.name == "nt":
+        pytest.skip("needs an executable script")
+    script = tmp_path / "bin" / "ffmpeg"
+    script.parent.mkdir()
+    script.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{script.parent}{os.pathsep}{os.environ['PATH']}")
+
+
+def test_cancel_stops_ffmpeg_and_deletes_the_partial_output(fake_ffmpeg, tmp_path):
+    output = tmp_path / "out.wav"
+    cancel = threading.Event()
+    threading.Timer(0.5, cancel.set).start()
+
+    start = time.monotonic()
+    with pytest.raises(JobCancelled):
+        run_ffmpeg(["-i", "in.mkv", str(output)], cancel=cancel, output=output, poll_interval=0.05)
+
+    assert time.monotonic() - start < 10
+    assert not output.exists()
+
+
+def test_failure_raises_with_stderr(fake_ffmpeg, tmp_path):
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        run_ffmpeg(["--fail", str(tmp_path / "out.wav")])
+    assert "frame=1" in error.value.stderr
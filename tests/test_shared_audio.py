@@ -0,0 +1,48 @@
+import shutil
+import threading
+import wave
+
+import numpy as np
+import pytest
+
+from inference_worker import SharedAudio
+from pipeline import JobCancelled
+
+
+def write_wav(path, samples, rate=16000, channels=1):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.astype(np.int16).tobytes())
+    return path
+
+
+def test_wav_is_decoded_into_shared_memory(tmp_path):
+    samples = (np.sin(np.arange(100_000) / 10) * 20000).astype(np.int16)
+    audio = SharedAudio.load(write_wav(tmp_path / "a.wav", samples))
+    try:
+        assert audio.shape == (100_000,)
+        assert audio.duration == pytest.approx(6.25)
+        view = audio.array()
+        np.testing.assert_array_equal(view, samples / np.float32(32768.0))  # whisperx.load_audio scaling
+        del view
+    finally:
+        audio.close()
+
+
+def test_cancel_stops_loading(tmp_path):
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(JobCancelled):
+        SharedAudio.load(write_wav(tmp_path / "a.wav", np.zeros(1000)), cancel=cancel)
+
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="ffmpeg not installed")
+def test_other_formats_are_resampled(tmp_path):
+    samples = np.zeros(44_100 * 2, np.int16)
+    audio = SharedAudio.load(write_wav(tmp_path / "a.wav", samples, rate=44_100))
+    try:
+        assert audio.duration == pytest.approx(1.0, abs=0.01)
+    finally:
+        audio.close()
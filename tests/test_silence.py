@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from pipeline import SAMPLE_RATE, OffsetMap, detect_speech
+
+
+def noise(seconds, db, seed=0):
+    """White noise with a mean square of `db` dBFS"""
+    rms = 10 ** (db / 20)
+    return (rms * np.random.default_rng(seed).standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+
+def kept(offsets, start, end):
+    """Seconds of [start, end) kept by an OffsetMap"""
+    total = 0
+    for region_start, region_end in offsets.regions / SAMPLE_RATE:
+        total += max(0.0, min(end, region_end) - max(start, region_start))
+    return total
+
+
+def test_offset_map_round_trip():
+    offsets = OffsetMap([(0, 2 * SAMPLE_RATE), (5 * SAMPLE_RATE, 6 * SAMPLE_RATE), (9 * SAMPLE_RATE, 10 * SAMPLE_RATE)],
+                        10 * SAMPLE_RATE)
+    assert offsets.kept_seconds == 4.0
+    assert offsets.removed_seconds == 6.0
+
+    original = np.array([0.0, 1.5, 5.0, 5.25, 9.0, 9.9])
+    compact = offsets.to_compact(original)
+    assert compact == pytest.approx([0.0, 1.5, 2.0, 2.25, 3.0, 3.9])
+    assert offsets.to_original(compact) == pytest.approx(original)
+
+    # A cut point starts the next region, unless it ends a segment
+    assert offsets.to_original(2.0) == pytest.approx(5.0)
+    assert offsets.to_original(2.0, end=True) == pytest.approx(2.0)
+    # Inside a cut lands on the cut
+    assert offsets.to_compact(3.0) == pytest.approx(2.0)
+
+
+def test_offset_map_compact_and_restore():
+    audio = np.arange(10 * SAMPLE_RATE, dtype=np.float32)
+    offsets = OffsetMap([(0, 2 * SAMPLE_RATE), (5 * SAMPLE_RATE, 6 * SAMPLE_RATE)], len(audio))
+    compacted = offsets.compact(audio)
+    assert len(compacted) == 3 * SAMPLE_RATE
+    assert compacted[2 * SAMPLE_RATE] == audio[5 * SAMPLE_RATE]
+
+    word = {"word": "hallo", "start": 1.5, "end": 2.5}
+    result = {"segments": [{"start": 1.0, "end": 2.5, "words": [word]}], "word_segments": [word]}
+    offsets.restore_result(result)
+    assert (result["segments"][0]["start"], result["segments"][0]["end"]) == (1.0, 5.5)
+    assert (word["start"], word["end"]) == (1.5, 5.5)  # Shared word restored once
+
+
+def test_detect_speech_cuts_long_pauses():
+    audio = np.concatenate([noise(10, -20, 1), noise(5, -70, 2), noise(10, -20, 3)])
+    offsets = detect_speech(audio)
+
+    assert offsets is not None
+    assert kept(offsets, 0, 10) == pytest.approx(10, abs=0.1)
+    assert kept(offsets, 10, 15) < 1
+    assert kept(offsets, 15, 25) == pytest.approx(10, abs=0.1)
+
+
+def test_detect_speech_keeps_continuous_speech():
+    assert detect_speech(noise(30, -20)) is None
+
+
+def test_digital_silence_does_not_hide_room_noise_pauses():
+    # A muted lead-in (exact zeros) followed by speech with -80 dB room-noise pauses
+    audio = np.concatenate([
+        np.zeros(20 * SAMPLE_RATE, np.float32),
+        noise(10, -20, 1), noise(5, -80, 2), noise(10, -20, 3), noise(5, -80, 4), noise(10, -20, 5),
+    ])
+    offsets = detect_speech(audio)
+
+    assert offsets is not None
+    assert kept(offsets, 0, 20) < 1
+    assert kept(offsets, 30, 35) < 1
+    assert kept(offsets, 45, 50) < 1
+    assert kept(offsets, 20, 30) == pytest.approx(10, abs=0.1)
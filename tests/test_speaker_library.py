@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+
+from speaker_library import SpeakerLibrary
+
+
+def library_of(tmp_path, voices):
+    library = SpeakerLibrary(tmp_path / "speakers.npz")
+    for name, embedding in voices.items():
+        library.enroll(name, embedding)
+    return library
+
+
+def test_match_is_one_to_one_most_similar_first(tmp_path):
+    library = library_of(tmp_path, {"Anna": [1.0, 0.0, 0.0], "Bert": [0.6, 0.8, 0.0]})
+
+    # Both labels are closest to Anna - the closer one gets her, the other its next best
+    matches = library.match({"SPEAKER_00": [0.9, 0.3, 0.0], "SPEAKER_01": [1.0, 0.05, 0.0]})
+
+    assert matches["SPEAKER_01"][0] == "Anna"
+    assert matches["SPEAKER_00"][0] == "Bert"
+
+
+def test_match_leaves_unknown_voices_out(tmp_path):
+    library = library_of(tmp_path, {"Anna": [1.0, 0.0, 0.0]})
+
+    matches = library.match({"SPEAKER_00": [0.0, 0.0, 1.0], "SPEAKER_01": [1.0, 0.1, 0.0]})
+    assert set(matches) == {"SPEAKER_01"}
+
+    assert library.match({"SPEAKER_00": [1.0, 0.0]}) == {}  # Different embedding size
+
+
+def test_enroll_averages_and_round_trips(tmp_path):
+    library = library_of(tmp_path, {"Anna": [1.0, 0.0]})
+    library.enroll("Anna", [0.0, 1.0])
+    library.save()
+
+    loaded = SpeakerLibrary.load(library.path)
+    assert loaded.names == ["Anna"]
+    assert loaded.counts.tolist() == [2]
+    np.testing.assert_allclose(loaded.embeddings[0], [0.7071, 0.7071], atol=1e-4)
+
+
+def test_match_against_thousands_of_speakers(tmp_path):
+    rng = np.random.default_rng(0)
+    library = SpeakerLibrary(tmp_path / "speakers.npz")
+    library.names = [f"person {i}" for i in range(5000)]
+    library.embeddings = rng.standard_normal((5000, 256)).astype(np.float32)
+    library.embeddings /= np.linalg.norm(library.embeddings, axis=1, keepdims=True)
+    library.counts = np.ones(5000, dtype=np.int64)
+
+    # Ten speakers of a recording, each a noisy take of an enrolled voice
+    enrolled = rng.choice(5000, 10, replace=False)
+    speakers = {f"SPEAKER_{i:02d}": library.embeddings[j] + 0.02 * rng.standard_normal(256)
+                for i, j in enumerate(enrolled)}
+
+    start = time.perf_counter()
+    matches = library.match(speakers)
+    elapsed = time.perf_counter() - start
+
+    assert {label: name for label, (name, _) in matches.items()} == {
+        f"SPEAKER_{i:02d}": f"person {j}" for i, j in enumerate(enrolled)}
+    assert elapsed < 1.0
@@ -0,0 +1,177 @@
+"""
+Watch folders for new recordings.
+
+Files that appear in a watched folder are handed to a callback once they
+are completely written (size and mtime unchanged for a while). Uses
+watchdog (inotify on Linux) if installed, otherwise the folders are polled.
+A folder can carry a mindscribe_profile.json with job settings for its files.
+"""
+import json
+import threading
+import time
+from pathlib import Path
+
+# Optional: watchdog gets change events from the OS instead of polling
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAIL = True
+except ImportError:
+    WATCHDOG_AVAIL = False
+
+# Per-folder job settings (any key of the GUI job settings)
+PROFILE_NAME = "mindscribe_profile.json"
+
+# Seconds a file's size/mtime must stay unchanged before it counts as complete
+SETTLE_SECONDS = 5.0
+POLL_INTERVAL = 2.0
+
+MEDIA_EXTENSIONS = {
+    '.mp3', '.wav', '.m4a', '.flac', '.ogg', '.aac', '.wma', '.opus',
+    '.mp4', '.mkv', '.mov', '.avi', '.webm', '.m4v', '.ts', '.mts', '.flv', '.wmv',
+}
+
+
+def is_media_file(path):
+    """Media files only - no hidden files or partial downloads/copies"""
+    name = path.name
+    return not name.startswith(('.', '~')) and path.suffix.lower() in MEDIA_EXTENSIONS
+
+
+def load_folder_profile(folder):
+    """Job settings of a watched folder ({} without a profile); output_dir is relative to the folder"""
+    profile_file = Path(folder) / PROFILE_NAME
+    if not profile_file.exists():
+        return {}
+
+    with open(profile_file, "r", encoding="utf-8") as f:
+        profile = json.load(f)
+
+    if profile.get("output_dir"):
+        profile["output_dir"] = str(Path(folder) / profile["output_dir"])
+    return profile
+
+
+class FolderWatcher:
+    """
+    Reports complete media files in `folders` through `on_ready(path)`.
+
+    Files already in the folders when watching starts are reported too.
+    A file is reported again only if it changes afterwards.
+    """
+
+    def __init__(self, folders, on_ready, log=None, settle_seconds=SETTLE_SECONDS, poll_interval=POLL_INTERVAL):
+        self.folders = [Path(folder) for folder in folders]
+        self.on_ready = on_ready
+        self.log = log or (lambda message, level="info": None)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+
+        self.pending = {}      # Path -> ((size, mtime), monotonic time the signature was first seen)
+        self.reported = set()  # (path, size, mtime) already handed out
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._observer = None
+        self._thread = None
+
+    def start(self):
+        for folder in self.folders:
+            self._scan(folder)
+
+        if WATCHDOG_AVAIL:
+            handler = _ChangeHandler(self)
+            self._observer = Observer()
+            for folder in self.folders:
+                self._observer.schedule(handler, str(folder), recursive=False)
+            self._observer.start()
+            self.log(f"👀 Watching {', '.join(map(str, self.folders))}")
+        else:
+            self.log(f"👀 Watching {', '.join(map(str, self.folders))} "
+                     f"(polling every {self.poll_interval:.0f}s - install watchdog for change events)")
+
+        self._thread = threading.Thread(target=self._run, name="mindscribe-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def add(self, path):
+        path = Path(path)
+        if is_media_file(path):
+            with self._lock:
+                self.pending.setdefault(path, None)
+
+    def _scan(self, folder):
+        try:
+            for path in folder.iterdir():
+                if path.is_file():
+                    self.add(path)
+        except OSError as e:
+            self.log(f"⚠ Could not read {folder}: {e}", "warning")
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self._observer:
+                for folder in self.folders:
+                    self._scan(folder)
+            for path in self._settled():
+                try:
+                    self.on_ready(path)
+                except Exception as e:
+                    self.log(f"⚠ Could not queue {path.name}: {e}", "warning")
+            self._stop.wait(self.poll_interval)
+
+    def _settled(self):
+        """Pending files whose size/mtime didn't change for settle_seconds"""
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for path, seen in list(self.pending.items()):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    del self.pending[path]  # Deleted or moved away
+                    continue
+
+                signature = (stat.st_size, stat.st_mtime_ns)
+                if seen is None or seen[0] != signature:
+                    self.pending[path] = (signature, now)
+                    continue
+                if now - seen[1] < self.settle_seconds or not stat.st_size:
+                    continue
+
+                del self.pending[path]
+                key = (str(path), *signature)
+                if key not in self.reported:
+                    self.reported.add(key)
+                    ready.append(path)
+        return ready
+
+
+if WATCHDOG_AVAIL:
+    class _ChangeHandler(FileSystemEventHandler):
+        """Feeds created/modified/moved-in files to the watcher"""
+
+        def __init__(self, watcher):
+            super().__init__()
+            self.watcher = watcher
+
+        def on_created(self, event):
+            if not event.is_directory:
+                self.watcher.add(event.src_path)
+
+        def on_modified(self, event):
+            if not event.is_directory:
+                self.watcher.add(event.src_path)
+
+        def on_moved(self, event):
+            if not event.is_directory:
+                self.watcher.add(event.dest_path)